@@ -1,6 +1,20 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def ensure_search_index(using, **kwargs):
+    # SQLite rehace la tabla de subastas en algunos AlterField/AddField y con
+    # ello se pierden los triggers del índice FTS, así que se reinstalan aquí.
+    from django.db import connections
+    from .search import install_search_index
+    install_search_index(connections[using])
 
 
 class AuctionsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'auctions'
+
+    def ready(self):
+        from .signals import connect_signals
+        post_migrate.connect(ensure_search_index, sender=self)
+        connect_signals()
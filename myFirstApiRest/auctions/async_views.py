@@ -0,0 +1,103 @@
+"""
+GET asíncronos para las vistas de lectura más usadas.
+
+Con ASGI una vista síncrona de DRF se ejecuta entera en un hilo de
+``sync_to_async``. Con ``AsyncReadMixin`` el GET se atiende en el event loop
+(``aget``) y solo las consultas salen al hilo, con el ORM asíncrono
+(``afirst``, ``aget``, ``aiterator``...). Una vista que no define ``aget``
+ejecuta su ``get`` síncrono con ``sync_to_async``. El resto de métodos (POST,
+PUT, DELETE...) siguen siendo la vista síncrona de siempre.
+
+``adispatch`` repite los pasos de ``APIView.dispatch`` (autenticación,
+permisos, negociación de contenido y tratamiento de errores), así que la
+respuesta es la misma que la de la vista síncrona. Los paginadores de DRF
+lanzan la consulta dentro de ``paginate_queryset``, por lo que la página (el
+``COUNT`` y las filas, o la consulta del cursor) se lee en un único
+``sync_to_async``, igual que hace el ORM asíncrono por dentro.
+
+Las URLs usan estas vistas con ``ASYNC_READ_VIEWS`` (activo por defecto en
+``asgi.py``). Con WSGI cada vista asíncrona necesitaría su propio event loop,
+así que allí se siguen usando las síncronas.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from django.shortcuts import aget_object_or_404
+from rest_framework.response import Response
+
+
+class AsyncReadMixin:
+    """Para vistas genéricas de DRF con un ``aget`` asíncrono equivalente a su ``get``."""
+
+    @classmethod
+    def as_read_view(cls, **initkwargs):
+        """La vista para la URL: GET asíncrono y el resto de métodos con la vista síncrona."""
+        sync_view = cls.as_view(**initkwargs)
+        sync_handler = sync_to_async(sync_view)
+
+        async def view(request, *args, **kwargs):
+            if request.method != 'GET':
+                return await sync_handler(request, *args, **kwargs)
+            self = cls(**initkwargs)
+            self.setup(request, *args, **kwargs)
+            return await self.adispatch(request, *args, **kwargs)
+
+        # Lo que as_view deja en la función (cls, view_class, csrf_exempt...) para DRF, spectacular y las métricas
+        view.__dict__.update({key: value for key, value in sync_view.__dict__.items() if key != '__wrapped__'})
+        view.__doc__ = cls.__doc__
+        return view
+
+    async def adispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        try:
+            if 'HTTP_AUTHORIZATION' in request.META:
+                # CachedJWTAuthentication puede leer el usuario de la base de datos
+                await sync_to_async(self.perform_authentication)(request)
+            self.initial(request, *args, **kwargs)
+            response = await self.aget(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def aget(self, request, *args, **kwargs):
+        # Sin aget propio se usa el get síncrono en el hilo de sync_to_async
+        handler = getattr(self, 'get', self.http_method_not_allowed)
+        return await sync_to_async(handler)(request, *args, **kwargs)
+
+    async def apaginate_queryset(self, queryset):
+        if self.paginator is None:
+            return None
+        return await sync_to_async(self.paginate_queryset)(queryset)
+
+    async def aget_object(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = await aget_object_or_404(queryset, **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (TypeError, ValueError, ValidationError):
+            raise Http404
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer([obj async for obj in queryset], many=True).data)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        return Response(self.get_serializer(await self.aget_object()).data)
+
+
+def read_view(view_class):
+    """La vista de una URL de lectura: la asíncrona con ``ASYNC_READ_VIEWS`` y si no la de siempre."""
+    if settings.ASYNC_READ_VIEWS:
+        return view_class.as_read_view()
+    return view_class.as_view()
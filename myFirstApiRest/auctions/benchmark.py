@@ -0,0 +1,291 @@
+"""
+Banco de pruebas de los endpoints de ``auctions`` y ``users``.
+
+Cada escenario es una petición (método, URL, cuerpo y rol) que se lanza dentro
+del propio proceso con ``APIClient`` contra los datos de :mod:`.datagen`. Se
+mide la latencia de cada petición (incluido el contenido de las respuestas en
+streaming) y las consultas a la base de datos, y se calcula el rendimiento y
+los percentiles p50/p95/p99.
+
+Los resultados se pueden guardar como línea base en JSON y comparar con ella:
+una latencia p95 que supera la de la base en más de ``tolerance`` o cualquier
+consulta de más se marca como regresión.
+
+Los GET anónimos pasan por la caché de respuestas (``VersionedCacheMixin``); los
+escenarios ``(auth)`` repiten algunos con token para medir la vista en sí.
+Los límites de peticiones (``myFirstApiRest/throttling.py``) se desactivan salvo
+con ``throttling=True``: si no, el login y las pujas acabarían en 429.
+"""
+import io
+import json
+import math
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import get_resolver, reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from users.models import CustomUser
+from .datagen import DEFAULT_PASSWORD, DEFAULT_PREFIX
+from .models import Auction, Bid, Category, Comment, Rating
+
+# Rutas que no tiene sentido medir petición a petición
+SKIPPED_ROUTES = {
+    'auctions:bid-stream': 'server-sent events stream, never completes',
+}
+
+
+class Scenario:
+    """
+    ``prepare`` se ejecuta fuera de la medición y devuelve los argumentos de la
+    petición que cambian en cada iteración (p. ej. una puja más alta).
+    """
+
+    def __init__(self, name, route, method, url, data=None, role=None, prepare=None, ok=(200,), **extra):
+        self.name = name
+        self.route = route
+        self.method = method
+        self.url = url
+        self.data = data
+        self.role = role
+        self.prepare = prepare
+        self.ok = ok
+        self.extra = extra
+
+
+class BenchmarkContext:
+    """Ids de los datos generados que usan los escenarios y tokens de cada rol."""
+
+    def __init__(self, prefix=DEFAULT_PREFIX, password=DEFAULT_PASSWORD):
+        self.prefix = prefix
+        self.password = password
+        generated = CustomUser.objects.filter(username__startswith=f'{prefix}-user-')
+        # El usuario con más pujas: sus listados son los más largos
+        self.user = generated.annotate(bid_total=Count('bids')).order_by('-bid_total', 'id').first()
+        self.admin = CustomUser.objects.filter(username=f'{prefix}-admin').first()
+        if self.user is None or self.admin is None:
+            raise LookupError(f'No generated data with prefix "{prefix}".')
+        auctions = Auction.objects.filter(category__name__startswith=f'{prefix}-')
+        self.category = Category.objects.filter(name__startswith=f'{prefix}-').order_by('id').first()
+        self.hot_auction = auctions.filter(closing_date__gt=timezone.now()).order_by('-bid_count').first()
+        self.auction = auctions.exclude(pk=self.hot_auction.pk).filter(closing_date__gt=timezone.now()).order_by('id').first()
+        self.bid = Bid.objects.filter(auction=self.hot_auction).order_by('id').first()
+        self.comment = Comment.objects.filter(auction=self.hot_auction).order_by('id').first() or Comment.objects.create(
+            title='Comentario', content='Texto', auction=self.hot_auction, user=self.user)
+        self.rating = Rating.objects.filter(auction=self.hot_auction).order_by('id').first() or Rating.objects.create(
+            auction=self.hot_auction, user=self.user, value=3)
+        self.counter = 0
+        self.tokens = {}
+
+    def next_id(self):
+        self.counter += 1
+        return f'{int(time.time())}-{self.counter}'
+
+    def login(self, client, user):
+        response = client.post(reverse('users:user-login'), {'username': user.username, 'password': self.password},
+                               format='json')
+        if response.status_code != 200:
+            raise LookupError(f'Cannot log in as {user.username}: {response.status_code}.')
+        return response.data
+
+    def token(self, client, role):
+        if role not in self.tokens:
+            self.tokens[role] = self.login(client, self.admin if role == 'admin' else self.user)['access']
+        return self.tokens[role]
+
+    def next_bid(self, auction):
+        current = Auction.objects.values_list('current_price', 'price').get(pk=auction.pk)
+        return (current[0] or current[1]) + Decimal('1.00')
+
+
+def build_scenarios(ctx):
+    hot, auction, user = ctx.hot_auction, ctx.auction, ctx.user
+    closing = (timezone.now() + timedelta(days=30)).strftime('%Y-%m-%dT%H:%M')
+    new_auction = {'title': 'Subasta de prueba', 'description': 'Creada por el banco de pruebas', 'price': '10.00',
+                   'stock': 1, 'brand': 'Acme', 'category': ctx.category.id, 'closing_date': closing}
+    auction_list = reverse('auctions:auction-list-create')
+
+    def import_file():
+        header = 'title,description,closing_date,price,stock,brand,category\n'
+        rows = ''.join(f'Importada {i},Texto,{closing},10.00,1,Acme,{ctx.category.id}\n' for i in range(20))
+        upload = io.BytesIO((header + rows).encode())
+        upload.name = 'catalogo.csv'
+        return {'data': {'file': upload}, 'format': 'multipart'}
+
+    return [
+        Scenario('category list', 'auctions:category-list-create', 'get', reverse('auctions:category-list-create')),
+        Scenario('category detail', 'auctions:category-detail', 'get',
+                 reverse('auctions:category-detail', args=[ctx.category.id]), role='admin'),
+        Scenario('auction list', 'auctions:auction-list-create', 'get', auction_list),
+        Scenario('auction list (auth)', 'auctions:auction-list-create', 'get', auction_list, role='user'),
+        Scenario('auction list filtered (auth)', 'auctions:auction-list-create', 'get',
+                 f'{auction_list}?category={ctx.category.id}&price_min=1&price_max=500&open=true', role='user'),
+        Scenario('auction search (auth)', 'auctions:auction-list-create', 'get',
+                 f'{auction_list}?search=reloj', role='user'),
+        Scenario('auction list cursor (auth)', 'auctions:auction-list-create', 'get',
+                 f'{auction_list}?pagination=cursor', role='user'),
+        Scenario('auction create', 'auctions:auction-list-create', 'post', auction_list, data=new_auction,
+                 role='user', ok=(201,)),
+        Scenario('auction detail', 'auctions:auction-detail', 'get', reverse('auctions:auction-detail', args=[hot.id])),
+        Scenario('bid list', 'auctions:bid-list-create', 'get', reverse('auctions:bid-list-create', args=[hot.id])),
+        Scenario('bid create', 'auctions:bid-list-create', 'post', reverse('auctions:bid-list-create', args=[hot.id]),
+                 role='user', ok=(201,), prepare=lambda: {'data': {'price': str(ctx.next_bid(hot))}}),
+        Scenario('bid detail', 'auctions:bid-detail', 'get', reverse('auctions:bid-detail', args=[hot.id, ctx.bid.id])),
+        Scenario('auctions from users', 'auctions:action-from-users', 'get',
+                 reverse('auctions:action-from-users'), role='user'),
+        Scenario('my auctions', 'auctions:user-auctions', 'get', reverse('auctions:user-auctions'), role='user'),
+        Scenario('my auctions ndjson', 'auctions:user-auctions', 'get',
+                 f"{reverse('auctions:user-auctions')}?output=ndjson", role='user'),
+        Scenario('comment list', 'auctions:comment-list-create', 'get',
+                 reverse('auctions:comment-list-create', args=[hot.id])),
+        Scenario('comment create', 'auctions:comment-list-create', 'post',
+                 reverse('auctions:comment-list-create', args=[hot.id]), data={'title': 'Pregunta', 'content': 'Texto'},
+                 role='user', ok=(201,)),
+        Scenario('comment detail', 'auctions:comment-detail', 'get',
+                 reverse('auctions:comment-detail', args=[hot.id, ctx.comment.id])),
+        Scenario('rating list', 'auctions:auction-rating', 'get', reverse('auctions:auction-rating', args=[hot.id])),
+        Scenario('rating create', 'auctions:auction-rating', 'post', reverse('auctions:auction-rating', args=[auction.id]),
+                 role='user', ok=(201,), prepare=lambda: {'data': {'value': ctx.counter % 5 + 1}}),
+        Scenario('rating detail', 'auctions:rating-detail', 'get',
+                 reverse('auctions:rating-detail', args=[hot.id, ctx.rating.id]), role='admin'),
+        Scenario('my rating', 'auctions:user-rating', 'get', reverse('auctions:user-rating', args=[hot.id]),
+                 role='user', ok=(200, 404)),
+        Scenario('my comments', 'auctions:user-comments', 'get', reverse('auctions:user-comments'), role='user'),
+        Scenario('cache stats', 'auctions:cache-stats', 'get', reverse('auctions:cache-stats'), role='admin'),
+        Scenario('bulk bids', 'auctions:bulk-bids', 'post', reverse('auctions:bulk-bids'), role='user', ok=(201,),
+                 prepare=lambda: {'data': [
+                     {'auction': auction.id, 'price': str(ctx.next_bid(auction) + i)} for i in range(10)]}),
+        Scenario('bulk comments', 'auctions:bulk-comments', 'post', reverse('auctions:bulk-comments'), role='user',
+                 data=[{'auction': auction.id, 'title': f'Comentario {i}', 'content': 'Texto'} for i in range(10)],
+                 ok=(201,)),
+        Scenario('bulk ratings', 'auctions:bulk-ratings', 'post', reverse('auctions:bulk-ratings'), role='user',
+                 data=[{'auction': auction.id, 'value': 4}], ok=(201,)),
+        Scenario('auction import', 'auctions:auction-import', 'post', reverse('auctions:auction-import'),
+                 role='admin', ok=(201,), prepare=import_file),
+        Scenario('export bids', 'auctions:export', 'get',
+                 f"{reverse('auctions:export', args=['bids'])}?output=ndjson", role='admin'),
+        Scenario('register', 'users:user-register', 'post', reverse('users:user-register'), ok=(201,),
+                 prepare=lambda: {'data': register_data(ctx)}),
+        Scenario('login', 'users:user-login', 'post', reverse('users:user-login'),
+                 data={'username': user.username, 'password': ctx.password}),
+        Scenario('user list', 'users:user-list', 'get', reverse('users:user-list'), role='admin'),
+        Scenario('user detail', 'users:user-detail', 'get', reverse('users:user-detail', args=[user.id]), role='admin'),
+        Scenario('profile', 'users:user-profile', 'get', reverse('users:user-profile'), role='user'),
+        Scenario('change password', 'users:change-password', 'post', reverse('users:change-password'), role='user',
+                 data={'old_password': ctx.password, 'new_password': ctx.password}),
+        Scenario('logout', 'users:log-out', 'post', reverse('users:log-out'), role='user', ok=(205,),
+                 prepare=lambda: {'data': {'refresh': ctx.login(APIClient(HTTP_HOST='localhost'), user)['refresh']}}),
+        Scenario('my bids', 'users:user-bids', 'get', reverse('users:user-bids'), role='user'),
+    ]
+
+
+def register_data(ctx):
+    username = f'{ctx.prefix}-bench-{ctx.next_id()}'
+    return {'username': username, 'email': f'{username}@example.com', 'password': ctx.password,
+            'first_name': 'Banco', 'last_name': 'Pruebas', 'birth_date': '1990-01-01'}
+
+
+def uncovered_routes(scenarios):
+    """Rutas con nombre de ``auctions`` y ``users`` sin escenario ni motivo para saltarlas."""
+    covered = {scenario.route for scenario in scenarios} | set(SKIPPED_ROUTES)
+    resolver = get_resolver()
+    routes = set()
+    for namespace in ('auctions', 'users'):
+        _, sub_resolver = resolver.namespace_dict[namespace]
+        routes |= {f'{namespace}:{name}' for name in sub_resolver.reverse_dict if isinstance(name, str)}
+    return sorted(routes - covered)
+
+
+def percentile(values, q):
+    """Percentil por rango más cercano de una lista ordenada."""
+    index = max(0, min(len(values), math.ceil(q / 100 * len(values))) - 1)
+    return values[index]
+
+
+def run_scenario(client, ctx, scenario, requests, warmup=0):
+    latencies, queries, errors = [], [], {}
+    for iteration in range(warmup + requests):
+        options = {'data': scenario.data, 'format': 'json', **scenario.extra}
+        if scenario.prepare is not None:
+            options.update(scenario.prepare())
+        if scenario.role:
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {ctx.token(client, scenario.role)}')
+        else:
+            client.credentials()
+        if scenario.method == 'get':
+            options.pop('format')
+
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = getattr(client, scenario.method)(scenario.url, **options)
+            if response.streaming:
+                for _ in response.streaming_content:
+                    pass
+            elapsed = time.perf_counter() - start
+        if iteration < warmup:
+            continue
+        latencies.append(elapsed)
+        queries.append(len(captured))
+        if response.status_code not in scenario.ok:
+            errors[response.status_code] = errors.get(response.status_code, 0) + 1
+
+    latencies.sort()
+    return {
+        'requests': requests,
+        'rps': round(requests / sum(latencies), 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'queries': max(queries),
+        'errors': errors,
+    }
+
+
+def run_benchmark(ctx, requests=50, warmup=3, only=None, log=None, throttling=False):
+    client = APIClient(HTTP_HOST='localhost')
+    scenarios = build_scenarios(ctx)
+    results = {}
+    # Un solo proceso: la caché local sirve como compartida y las respuestas se cachean como en producción
+    with override_settings(THROTTLING_ENABLED=throttling, CACHE_SHARED=True):
+        for scenario in scenarios:
+            if only and only not in scenario.name:
+                continue
+            results[scenario.name] = run_scenario(client, ctx, scenario, requests, warmup)
+            if log:
+                log(scenario.name, results[scenario.name])
+    return results, uncovered_routes(scenarios)
+
+
+def compare(results, baseline, tolerance=0.25, min_delta_ms=1.0):
+    """
+    Regresiones frente a ``baseline``: p95 más de ``tolerance`` por encima (y al
+    menos ``min_delta_ms`` más, para no marcar el ruido de las peticiones de 1 ms)
+    o más consultas.
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result['p95_ms'] > max(base['p95_ms'] * (1 + tolerance), base['p95_ms'] + min_delta_ms):
+            regressions.append(f'{name}: p95 {base["p95_ms"]} -> {result["p95_ms"]} ms')
+        if result['queries'] > base['queries']:
+            regressions.append(f'{name}: queries {base["queries"]} -> {result["queries"]}')
+    return regressions
+
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as stream:
+        return json.load(stream)['scenarios']
+
+
+def save_baseline(path, results):
+    with open(path, 'w', encoding='utf-8') as stream:
+        json.dump({'created': timezone.now().isoformat(), 'database': connection.vendor, 'scenarios': results},
+                  stream, indent=2, sort_keys=True)
+        stream.write('\n')
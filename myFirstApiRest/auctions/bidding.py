@@ -0,0 +1,126 @@
+"""
+Aceptación de pujas segura ante concurrencia.
+
+La subasta guarda el precio actual (``current_price``) y el número de pujas
+(``bid_count``), de modo que validar una puja no necesita recorrer ``Bid``. La
+puja se acepta con un único ``UPDATE`` condicional (compare-and-set): solo
+modifica la fila si la subasta sigue abierta y el importe supera el precio
+actual. Mientras la transacción no termina, la fila de la subasta queda
+bloqueada, así que las pujas de una misma subasta se insertan en orden y nunca
+se acepta una puja que no supere a la anterior.
+
+Editar o borrar una puja (:func:`change_bid`, :func:`remove_bid`) bloquea
+también la fila de la subasta: una puja editada tiene que superar el precio
+actual, como una nueva, y con la subasta cerrada no se puede tocar ninguna.
+"""
+import random
+import time
+
+from django.db import OperationalError, connection, transaction
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from rest_framework.exceptions import NotFound, ValidationError
+
+from .cache import bump_version
+from .models import Auction, Bid
+
+# Reintentos ante bloqueos de la base de datos (p. ej. SQLite "database is locked")
+MAX_ATTEMPTS = 5
+RETRY_DELAY = 0.01
+
+
+def place_bid(auction_id, bidder, price):
+    """Registra la puja si la subasta está abierta y ``price`` supera el precio actual."""
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            with transaction.atomic():
+                return _place_bid(auction_id, bidder, price)
+        except OperationalError:
+            # Dentro de otra transacción no se puede reintentar
+            if connection.in_atomic_block or attempt == MAX_ATTEMPTS:
+                raise
+            time.sleep(RETRY_DELAY * attempt * random.random())
+
+
+def _place_bid(auction_id, bidder, price):
+    now = timezone.now()
+    accepted = Auction.objects.filter(pk=auction_id, closing_date__gt=now, is_closed=False).filter(
+        Q(current_price__lt=price) | Q(current_price__isnull=True, price__lte=price)
+    ).update(current_price=price, bid_count=F('bid_count') + 1, updated_at=now)
+    if not accepted:
+        raise rejection(auction_id, price, now)
+    return Bid.objects.create(auction_id=auction_id, bidder=bidder, price=price)
+
+
+BID_STATE_FIELDS = ('closing_date', 'is_closed', 'current_price', 'price')
+
+
+def rejection(auction_id, price, now):
+    """Devuelve la excepción que explica por qué no se aceptó la puja."""
+    auction = Auction.objects.filter(pk=auction_id).values(*BID_STATE_FIELDS).first()
+    if auction is None:
+        return NotFound({"auction": "Auction not found."})
+    # Si entre el UPDATE y esta lectura ha cambiado la subasta, el motivo es el precio
+    return ValidationError(bid_error(auction, price, now) or {"price": "Bid must be higher than the current price."})
+
+
+def bid_error(auction, price, now):
+    """
+    Motivo por el que ``price`` no es válida para ``auction`` (un dict con
+    ``BID_STATE_FIELDS``) o ``None`` si se puede aceptar.
+    """
+    if auction['closing_date'] <= now or auction['is_closed']:
+        return {"auction": "Auction is closed."}
+    if auction['current_price'] is None:
+        if price < auction['price']:
+            return {"price": f"Bid must be at least the starting price ({auction['price']})."}
+    elif price <= auction['current_price']:
+        return {"price": f"Bid must be higher than the current price ({auction['current_price']})."}
+    return None
+
+
+def lock_bid_state(auction_id):
+    """Bloquea la fila de la subasta hasta el final de la transacción y devuelve ``BID_STATE_FIELDS``."""
+    auction = Auction.objects.select_for_update().filter(pk=auction_id).values(*BID_STATE_FIELDS).first()
+    if auction is None:
+        raise NotFound({"auction": "Auction not found."})
+    return auction
+
+
+def change_bid(bid, price):
+    """
+    Cambia el importe de una puja. Se valida como una puja nueva contra la subasta
+    bloqueada: solo se puede subir por encima del precio actual y con la subasta
+    abierta, así que el precio sigue siendo creciente.
+    """
+    with transaction.atomic():
+        error = bid_error(lock_bid_state(bid.auction_id), price, timezone.now())
+        if error:
+            raise ValidationError(error)
+        bid.price = price
+        bid.save(update_fields=['price'])
+        refresh_bid_summary([bid.auction_id])
+    return bid
+
+
+def remove_bid(bid):
+    """Borra una puja si la subasta sigue abierta (cerrada, su ganador ya no puede cambiar)."""
+    with transaction.atomic():
+        auction = lock_bid_state(bid.auction_id)
+        if auction['closing_date'] <= timezone.now() or auction['is_closed']:
+            raise ValidationError({"auction": "Auction is closed."})
+        bid.delete()
+        refresh_bid_summary([bid.auction_id])
+
+
+def refresh_bid_summary(auction_ids):
+    """Recalcula ``current_price`` y ``bid_count`` desde ``Bid`` (tras editar o borrar pujas)."""
+    bids = Bid.objects.filter(auction=OuterRef('pk')).order_by().values('auction')
+    updated = Auction.objects.filter(pk__in=auction_ids).update(
+        current_price=Subquery(bids.annotate(best=Max('price')).values('best')),
+        bid_count=Coalesce(Subquery(bids.annotate(count=Count('id')).values('count')), 0),
+        updated_at=timezone.now(),
+    )
+    bump_version(Auction._meta.label)
+    return updated
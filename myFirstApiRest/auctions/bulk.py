@@ -0,0 +1,208 @@
+"""
+Altas masivas de pujas, comentarios y valoraciones.
+
+Cada elemento se valida por separado y los que fallan se devuelven con su
+error sin abortar el resto. Las comprobaciones contra la base de datos
+(subastas, usuarios, valoraciones existentes) se hacen con una consulta por
+lote, los elementos válidos se insertan con ``bulk_create`` en una única
+transacción y los agregados de cada subasta afectada (``current_price``,
+``bid_count``, ``rating``...) se recalculan una sola vez con un ``UPDATE``
+para todas.
+
+``bulk_create`` no emite señales, así que las versiones de la caché de
+respuestas se incrementan aquí.
+"""
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+
+from myFirstApiRest.fastjson import FastJSONRenderer
+
+from .bidding import BID_STATE_FIELDS, bid_error, refresh_bid_summary
+from .cache import bump_version
+from .models import Auction, Bid, Comment, Rating
+from .pubsub import bid_channel, get_broker
+from .ratings import apply_rating_deltas
+from .serializers import (
+    BidListCreateSerializer, BulkBidSerializer, BulkCommentSerializer, BulkRatingSerializer, CommentSerializer,
+    RatingListCreateSerializer,
+)
+
+MAX_ITEMS = 1000
+# Veces que se repite el alta de valoraciones si otra petición crea una a la vez
+RATING_ATTEMPTS = 3
+
+
+class BulkOperation:
+    """Acumula el resultado de cada elemento, indexado por su posición en la petición."""
+
+    def __init__(self, request_user, items, item_serializer):
+        self.request_user = request_user
+        self.results = {}
+        self.valid = []
+        for index, item in enumerate(items):
+            serializer = item_serializer(data=item)
+            if serializer.is_valid():
+                self.valid.append((index, serializer.validated_data))
+            else:
+                self.fail(index, serializer.errors)
+        self.users = self._resolve_users()
+
+    def fail(self, index, errors, code=status.HTTP_400_BAD_REQUEST):
+        self.results[index] = {'index': index, 'status': code, 'errors': errors}
+
+    def succeed(self, index, data, code=status.HTTP_201_CREATED):
+        self.results[index] = {'index': index, 'status': code, 'data': data}
+
+    def _resolve_users(self):
+        """Usuario de cada elemento: el autenticado o, para administradores, el indicado en ``user``."""
+        users = {self.request_user.pk: self.request_user}
+        requested = {data['user'] for _, data in self.valid if data.get('user', self.request_user.pk) not in users}
+        if requested and self.request_user.is_staff:
+            users.update((user.pk, user) for user in get_user_model().objects.filter(pk__in=requested))
+        valid = []
+        for index, data in self.valid:
+            user_id = data.setdefault('user', self.request_user.pk)
+            if user_id in users:
+                valid.append((index, data))
+            elif not self.request_user.is_staff:
+                self.fail(index, {"user": ["Only staff can act on behalf of other users."]}, status.HTTP_403_FORBIDDEN)
+            else:
+                self.fail(index, {"user": ["User not found."]}, status.HTTP_404_NOT_FOUND)
+        self.valid = valid
+        return users
+
+    def auctions(self, queryset):
+        """Subastas de los elementos válidos; los que apuntan a una inexistente quedan como error."""
+        ids = {data['auction'] for _, data in self.valid}
+        found = {auction['id'] if isinstance(auction, dict) else auction.pk: auction
+                 for auction in queryset.filter(pk__in=ids)}
+        valid = []
+        for index, data in self.valid:
+            if data['auction'] in found:
+                valid.append((index, data))
+            else:
+                self.fail(index, {"auction": ["Auction not found."]}, status.HTTP_404_NOT_FOUND)
+        self.valid = valid
+        return found
+
+    @property
+    def response(self):
+        results = [self.results[index] for index in sorted(self.results)]
+        succeeded = sum(1 for result in results if 'data' in result)
+        if succeeded == len(results):
+            code = status.HTTP_201_CREATED
+        elif succeeded:
+            code = status.HTTP_207_MULTI_STATUS
+        else:
+            code = status.HTTP_400_BAD_REQUEST
+        return {'succeeded': succeeded, 'failed': len(results) - succeeded, 'results': results}, code
+
+
+def bulk_place_bids(request_user, items):
+    operation = BulkOperation(request_user, items, BulkBidSerializer)
+    with transaction.atomic():
+        # Mismo orden de bloqueo en todas las peticiones para no provocar interbloqueos
+        auctions = operation.auctions(
+            Auction.objects.order_by('id').select_for_update().values('id', *BID_STATE_FIELDS))
+        now = timezone.now()
+        accepted = []
+        for index, data in operation.valid:
+            auction = auctions[data['auction']]
+            error = bid_error(auction, data['price'], now)
+            if error:
+                operation.fail(index, {field: [message] for field, message in error.items()})
+                continue
+            # Las pujas siguientes de la misma subasta tienen que superar a esta
+            auction['current_price'] = data['price']
+            accepted.append((index, Bid(auction_id=auction['id'], bidder=operation.users[data['user']], price=data['price'])))
+
+        Bid.objects.bulk_create([bid for _, bid in accepted])
+        if accepted:
+            refresh_bid_summary({bid.auction_id for _, bid in accepted})
+            bump_version(Bid._meta.label)
+        messages = []
+        for (index, bid), data in zip(accepted, BidListCreateSerializer([bid for _, bid in accepted], many=True).data):
+            operation.succeed(index, data)
+            messages.append((bid_channel(bid.auction_id), FastJSONRenderer().render(data).decode()))
+        transaction.on_commit(lambda: [get_broker().publish(channel, message) for channel, message in messages])
+    return operation.response
+
+
+def bulk_create_comments(request_user, items):
+    operation = BulkOperation(request_user, items, BulkCommentSerializer)
+    with transaction.atomic():
+        auctions = operation.auctions(Auction.objects.select_related('category'))
+        comments = [
+            (index, Comment(title=data['title'], content=data['content'],
+                            user=operation.users[data['user']], auction=auctions[data['auction']]))
+            for index, data in operation.valid
+        ]
+        Comment.objects.bulk_create([comment for _, comment in comments])
+        if comments:
+            # El Last-Modified del listado de comentarios sale de la subasta
+            Auction.objects.filter(pk__in={comment.auction_id for _, comment in comments}).update(
+                updated_at=timezone.now())
+            bump_version(Comment._meta.label, Auction._meta.label)
+        for (index, _), data in zip(comments, CommentSerializer([comment for _, comment in comments], many=True).data):
+            operation.succeed(index, data)
+    return operation.response
+
+
+def bulk_rate_auctions(request_user, items):
+    """Crea o actualiza valoraciones; si un usuario valora dos veces la misma subasta gana la última."""
+    operation = BulkOperation(request_user, items, BulkRatingSerializer)
+    with transaction.atomic():
+        operation.auctions(Auction.objects.values('id'))
+        for attempt in range(1, RATING_ATTEMPTS + 1):
+            try:
+                with transaction.atomic():
+                    items_by_rating, deltas = _write_ratings(operation)
+                break
+            except IntegrityError:
+                # Otra petición ha creado una de las valoraciones después de leerlas: se vuelven a
+                # leer (ya confirmada, es una actualización) en lugar de abortar todo el lote
+                if attempt == RATING_ATTEMPTS:
+                    raise
+        if items_by_rating:
+            # Diferencias con F(): no se pierde lo que sumen a la vez rate_auction o change_rating
+            apply_rating_deltas(deltas)
+            bump_version(Rating._meta.label, Auction._meta.label)
+        for index, rating, updated in items_by_rating:
+            operation.succeed(index, RatingListCreateSerializer(rating).data,
+                              status.HTTP_200_OK if updated else status.HTTP_201_CREATED)
+    return operation.response
+
+
+def _write_ratings(operation):
+    """Guarda las valoraciones; devuelve el resultado de cada elemento y ``{subasta: (Δ suma, Δ número)}``."""
+    keys = {(data['user'], data['auction']) for _, data in operation.valid}
+    existing = {
+        (rating.user_id, rating.auction_id): rating
+        for rating in Rating.objects.select_for_update().filter(
+            user_id__in={user_id for user_id, _ in keys}, auction_id__in={auction_id for _, auction_id in keys},
+        ).order_by('pk')
+        if (rating.user_id, rating.auction_id) in keys
+    }
+    old_values = {key: rating.value for key, rating in existing.items()}
+    new, changed, items_by_rating = {}, {}, []
+    for index, data in operation.valid:
+        key = (data['user'], data['auction'])
+        if key in existing:
+            rating = changed.setdefault(key, existing[key])
+        else:
+            rating = new.setdefault(key, Rating(user=operation.users[data['user']], auction_id=data['auction']))
+        rating.value = data['value']
+        items_by_rating.append((index, rating, key in existing))
+
+    Rating.objects.bulk_create(list(new.values()))
+    Rating.objects.bulk_update(list(changed.values()), ['value'])
+    deltas = {}
+    for key, rating in [*new.items(), *changed.items()]:
+        value_delta, count_delta = deltas.get(rating.auction_id, (0, 0))
+        if key in old_values:
+            deltas[rating.auction_id] = (value_delta + rating.value - old_values[key], count_delta)
+        else:
+            deltas[rating.auction_id] = (value_delta + rating.value, count_delta + 1)
+    return items_by_rating, deltas
@@ -0,0 +1,168 @@
+"""
+Caché de respuestas para las lecturas anónimas, invalidada por versiones.
+
+Cada modelo tiene un contador de versión en la caché de Django que se incrementa
+en cada escritura (ver ``signals.py``). La clave de una respuesta incluye la
+ruta, los parámetros (y con ellos la paginación), el ``Accept`` y la versión de
+todos los modelos de los que depende, así que en cuanto cambia un dato la clave
+deja de existir y no hace falta adivinar un TTL. Como ``isOpen`` depende de la
+hora, las respuestas de subastas caducan además en el siguiente cierre.
+
+La versión se incrementa tras el commit de la escritura: si se incrementara
+antes, una lectura simultánea podría ver la versión nueva con las filas aún sin
+confirmar y guardar la respuesta vieja con la clave nueva.
+
+Las invalidaciones solo llegan a los procesos que comparten la caché. Con una
+caché local de cada proceso (``CACHE_SHARED = False``, el valor por defecto
+con ``LocMemCache`` salvo con ``runserver``) y varios workers, uno seguiría
+sirviendo lo que otro ya ha cambiado, así que entonces no se cachean
+respuestas. Con un único worker se activa con ``CACHE_SHARED=true``.
+"""
+import hashlib
+import time
+from datetime import timedelta
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Min
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+VERSION_KEY = 'apicache:version:{}'
+RESPONSE_KEY = 'apicache:response:{}'
+STATS_KEY = 'apicache:stats:{}'
+CACHED_HEADERS = ('Allow', 'Vary', 'ETag', 'Last-Modified')
+
+
+def _new_version():
+    # Si la caché expulsa un contador no puede volver a un valor ya usado
+    return time.time_ns()
+
+
+def bump_version(*labels):
+    """Incrementa la versión de ``labels`` tras el commit de la transacción en curso (o ya, sin transacción)."""
+    transaction.on_commit(partial(_bump, labels))
+
+
+def _bump(labels):
+    for label in labels:
+        key = VERSION_KEY.format(label)
+        try:
+            cache.incr(key)
+        except ValueError:
+            if not cache.add(key, _new_version(), timeout=None):
+                cache.incr(key)
+
+
+def get_versions(labels):
+    keys = [VERSION_KEY.format(label) for label in labels]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _new_version(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def _count(name):
+    key = STATS_KEY.format(name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def cache_stats():
+    stats = cache.get_many([STATS_KEY.format('hits'), STATS_KEY.format('misses')])
+    hits = stats.get(STATS_KEY.format('hits'), 0)
+    misses = stats.get(STATS_KEY.format('misses'), 0)
+    total = hits + misses
+    return {'hits': hits, 'misses': misses, 'hit_ratio': round(hits / total, 4) if total else 0.0}
+
+
+def next_auction_closing():
+    from .models import Auction
+    return Auction.objects.filter(closing_date__gt=timezone.now()).aggregate(next=Min('closing_date'))['next']
+
+
+class VersionedCacheMixin:
+    """
+    Cachea los GET anónimos de una vista DRF. ``cache_models`` son las etiquetas
+    (``app_label.Model``) de los modelos que aparecen en la respuesta.
+    """
+    cache_models = ()
+    cache_until_auction_closes = False
+
+    def is_cacheable(self, request):
+        return settings.CACHE_SHARED and request.method == 'GET' and 'HTTP_AUTHORIZATION' not in request.META
+
+    def get_cache_key(self, request):
+        parts = [
+            request.scheme, request.get_host(), request.path,
+            sorted(request.GET.lists()), request.META.get('HTTP_ACCEPT', ''),
+            get_versions(self.cache_models),
+        ]
+        return RESPONSE_KEY.format(hashlib.sha1(repr(parts).encode()).hexdigest())
+
+    def get_cache_timeout(self):
+        timeout = settings.API_CACHE_TIMEOUT
+        if self.cache_until_auction_closes:
+            closing = next_auction_closing()
+            if closing is not None:
+                timeout = min(timeout, (closing - timezone.now()) / timedelta(seconds=1))
+        return max(int(timeout), 0)
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self.is_cacheable(request):
+            return super().dispatch(request, *args, **kwargs)
+        key, response = self.cached_response(request)
+        if response is None:
+            response = self.store_response(key, super().dispatch(request, *args, **kwargs))
+        return response
+
+    async def adispatch(self, request, *args, **kwargs):
+        # Igual que dispatch; la caché (y la consulta del próximo cierre) en un solo sync_to_async cada vez
+        if not self.is_cacheable(request):
+            return await super().adispatch(request, *args, **kwargs)
+        key, response = await sync_to_async(self.cached_response)(request)
+        if response is None:
+            response = await sync_to_async(self.store_response)(key, await super().adispatch(request, *args, **kwargs))
+        return response
+
+    def cached_response(self, request):
+        """La clave de la petición y la respuesta guardada (o ``None``)."""
+        key = self.get_cache_key(request)
+        cached = cache.get(key)
+        if cached is None:
+            _count('misses')
+            return key, None
+        _count('hits')
+        content, content_type, headers = cached
+        headers = dict(headers)
+        # Los validadores guardados corresponden al contenido guardado
+        last_modified = headers.get('Last-Modified')
+        response = get_conditional_response(
+            request, etag=headers.get('ETag'),
+            last_modified=last_modified and parse_http_date_safe(last_modified))
+        if response is None:
+            response = HttpResponse(content, content_type=content_type)
+        for header, value in headers.items():
+            response[header] = value
+        response['X-Cache'] = 'HIT'
+        return key, response
+
+    def store_response(self, key, response):
+        if response.status_code == 200 and not response.streaming:
+            response.render()
+            timeout = self.get_cache_timeout()
+            if timeout:
+                headers = [(header, response[header]) for header in CACHED_HEADERS if response.has_header(header)]
+                cache.set(key, (response.content, response['Content-Type'], headers), timeout)
+        response['X-Cache'] = 'MISS'
+        return response
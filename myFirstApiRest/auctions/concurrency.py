@@ -0,0 +1,197 @@
+"""
+Banco de pruebas de concurrencia de los GET de lectura: WSGI frente a ASGI.
+
+Se lanza dentro del propio proceso y sin red contra los datos de
+:mod:`.datagen`, con los mismos manejadores que usan los servidores:
+
+* ``wsgi``: ``WSGIHandler`` con un pool de ``concurrency`` hilos, como
+  gunicorn con workers ``gthread``.
+* ``asgi-sync``: ``ASGIHandler`` en un event loop con las vistas síncronas,
+  que Django ejecuta en un hilo por petición.
+* ``asgi-async``: ``ASGIHandler`` con las vistas de ``async_views.py``.
+
+Cada objetivo recibe ``requests`` peticiones con ``concurrency`` en vuelo a la
+vez; se mide el rendimiento (peticiones por segundo de reloj) y la latencia de
+cada petición. La primera respuesta de cada objetivo se compara entre modos:
+el cuerpo y el estado deben ser idénticos.
+"""
+import asyncio
+import importlib
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.test.utils import override_settings
+from django.urls import clear_url_caches, reverse
+
+from users.tokens import RefreshToken
+from .benchmark import percentile
+
+MODES = ('wsgi', 'asgi-sync', 'asgi-async')
+
+
+def build_targets(ctx):
+    """``(nombre, url, cabeceras)`` de los GET de las vistas con versión asíncrona."""
+    auth = {'Authorization': f'Bearer {RefreshToken.for_user(ctx.user).access_token}'}
+    auctions = reverse('auctions:auction-list-create')
+    hot = ctx.hot_auction.id
+    return [
+        ('category list', reverse('auctions:category-list-create'), {}),
+        ('auction list', auctions, {}),
+        ('auction list (auth)', auctions, auth),
+        ('auction list filtered (auth)', f'{auctions}?category={ctx.category.id}&open=true&price_min=10', auth),
+        ('auction detail (auth)', reverse('auctions:auction-detail', args=[hot]), auth),
+        ('bid list', reverse('auctions:bid-list-create', args=[hot]), {}),
+        ('bid list cursor', reverse('auctions:bid-list-create', args=[hot]) + '?pagination=cursor', {}),
+        ('comment list', reverse('auctions:comment-list-create', args=[hot]), {}),
+    ]
+
+
+def _reload_urls():
+    for name in ('auctions.urls', settings.ROOT_URLCONF):
+        importlib.reload(importlib.import_module(name))
+    clear_url_caches()
+
+
+@contextmanager
+def read_views(async_reads):
+    """Reconstruye las URLs con ``ASYNC_READ_VIEWS`` (se leen al importar ``urls.py``)."""
+    try:
+        with override_settings(ASYNC_READ_VIEWS=async_reads):
+            _reload_urls()
+            yield
+    finally:
+        _reload_urls()
+
+
+def wsgi_get(app, url, headers):
+    parts = urlsplit(url)
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': parts.path, 'QUERY_STRING': parts.query, 'SCRIPT_NAME': '',
+        'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'HTTP_HOST': 'localhost', 'REMOTE_ADDR': '127.0.0.1',
+        'SERVER_PROTOCOL': 'HTTP/1.1', 'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(),
+        'wsgi.errors': io.StringIO(), 'wsgi.version': (1, 0), 'wsgi.multithread': True,
+        'wsgi.multiprocess': False, 'wsgi.run_once': False,
+        **{'HTTP_' + name.upper().replace('-', '_'): value for name, value in headers.items()},
+    }
+    status = []
+    response = app(environ, lambda line, response_headers, exc_info=None: status.append(int(line.split()[0])))
+    try:
+        body = b''.join(response)
+    finally:
+        response.close()
+    return status[0], body
+
+
+async def asgi_get(app, url, headers):
+    parts = urlsplit(url)
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+        'path': parts.path, 'raw_path': parts.path.encode(), 'query_string': parts.query.encode(), 'root_path': '',
+        'headers': [(b'host', b'localhost')] + [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+        'client': ('127.0.0.1', 50000), 'server': ('localhost', 80),
+    }
+    body_sent = False
+    messages = []
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # El cliente no se desconecta: Django cancela la espera al terminar la respuesta
+        await asyncio.Event().wait()
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    return messages[0]['status'], b''.join(message.get('body', b'') for message in messages[1:])
+
+
+def _summary(latencies, elapsed, errors):
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'errors': errors,
+    }
+
+
+def run_wsgi(app, url, headers, requests, concurrency):
+    latencies, errors = [], {}
+
+    def one(_):
+        start = time.perf_counter()
+        status, body = wsgi_get(app, url, headers)
+        latencies.append(time.perf_counter() - start)
+        if status != 200:
+            errors[status] = errors.get(status, 0) + 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    return _summary(latencies, time.perf_counter() - start, errors)
+
+
+async def run_asgi(app, url, headers, requests, concurrency):
+    latencies, errors = [], {}
+    pending = iter(range(requests))
+
+    async def worker():
+        for _ in pending:
+            start = time.perf_counter()
+            status, body = await asgi_get(app, url, headers)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors[status] = errors.get(status, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return _summary(latencies, time.perf_counter() - start, errors)
+
+
+def run_mode(mode, targets, requests, concurrencies, warmup=5, log=None):
+    """``({(objetivo, concurrencia): resultado}, {objetivo: (estado, cuerpo)})`` de un modo."""
+    results, first = {}, {}
+    with read_views(mode == 'asgi-async'):
+        if mode == 'wsgi':
+            app = WSGIHandler()
+            fetch = lambda url, headers: wsgi_get(app, url, headers)
+            run = lambda url, headers, n, c: run_wsgi(app, url, headers, n, c)
+        else:
+            app = ASGIHandler()
+            fetch = lambda url, headers: asyncio.run(asgi_get(app, url, headers))
+            run = lambda url, headers, n, c: asyncio.run(run_asgi(app, url, headers, n, c))
+        for name, url, headers in targets:
+            first[name] = fetch(url, headers)
+            for _ in range(warmup):
+                fetch(url, headers)
+            for concurrency in concurrencies:
+                results[name, concurrency] = run(url, headers, requests, concurrency)
+                if log:
+                    log(mode, name, concurrency, results[name, concurrency])
+    return results, first
+
+
+def run_concurrency(ctx, modes=MODES, requests=200, concurrencies=(1, 8, 32), warmup=5, log=None):
+    """Resultados por modo y las respuestas que no coinciden con las del primer modo."""
+    targets = build_targets(ctx)
+    results, responses = {}, {}
+    # Como en bench_endpoints, los límites de peticiones no cuentan. Con decenas de peticiones
+    # en vuelo cualquier consulta pasa de SLOW_QUERY_MS esperando al GIL: no se registran
+    with override_settings(THROTTLING_ENABLED=False, SLOW_QUERY_MS=float('inf'), CACHE_SHARED=True):
+        for mode in modes:
+            results[mode], responses[mode] = run_mode(mode, targets, requests, concurrencies, warmup, log)
+    reference = responses[modes[0]]
+    mismatches = [f'{name}: {mode} differs from {modes[0]}'
+                  for mode in modes[1:] for name, _, _ in targets if responses[mode][name] != reference[name]]
+    return results, mismatches
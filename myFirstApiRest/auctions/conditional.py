@@ -0,0 +1,147 @@
+"""
+Peticiones condicionales (``If-None-Match`` / ``If-Modified-Since``).
+
+Los validadores se sacan con una única consulta barata sobre la fila de la
+subasta (``updated_at``, ``bid_count``...) en lugar de serializar la respuesta,
+así que un 304 no ejecuta el serializer ni la consulta del listado. Cada
+validador tiene una versión asíncrona (``a...``) con la misma consulta para las
+vistas de ``async_views.py``.
+
+``Last-Modified`` va en segundos enteros: si el último cambio es del segundo
+en curso no se envía, porque otro cambio en ese mismo segundo daría un 304 con
+datos viejos a quien solo mande ``If-Modified-Since``. El ETag sí lo distingue
+e incluye el tipo de la respuesta negociada (JSON o la API navegable).
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .models import Auction, Bid
+
+
+def _validators(request, result):
+    etag_parts, last_modified = result
+    etag_parts = (etag_parts, getattr(request, 'accepted_media_type', None))
+    etag = quote_etag(hashlib.sha1(repr(etag_parts).encode()).hexdigest())
+    timestamp = int(last_modified.timestamp())
+    if timestamp >= int(time.time()):
+        timestamp = None
+    return etag, timestamp, get_conditional_response(request, etag=etag, last_modified=timestamp)
+
+
+def _add_validators(response, etag, timestamp):
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+    return response
+
+
+def conditional_get(validators):
+    """
+    Decora el ``get`` de una vista. ``validators(request, **kwargs)`` devuelve
+    ``(partes_del_etag, last_modified)`` o ``None`` si el recurso no existe.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            result = validators(request, **kwargs)
+            if result is None:
+                return method(self, request, *args, **kwargs)
+            etag, timestamp, response = _validators(request, result)
+            if response is None:
+                response = method(self, request, *args, **kwargs)
+            return _add_validators(response, etag, timestamp)
+        return wrapper
+    return decorator
+
+
+def aconditional_get(validators):
+    """Como :func:`conditional_get` para un ``aget`` asíncrono, con los validadores asíncronos."""
+    def decorator(method):
+        @wraps(method)
+        async def wrapper(self, request, *args, **kwargs):
+            result = await validators(request, **kwargs)
+            if result is None:
+                return await method(self, request, *args, **kwargs)
+            etag, timestamp, response = _validators(request, result)
+            if response is None:
+                response = await method(self, request, *args, **kwargs)
+            return _add_validators(response, etag, timestamp)
+        return wrapper
+    return decorator
+
+
+def list_params(request):
+    """Los parámetros (página, cursor, filtros) forman parte del ETag de un listado."""
+    return sorted(request.query_params.lists())
+
+
+def _auction_row(pk):
+    return Auction.objects.filter(pk=pk).values('updated_at', 'closing_date')
+
+
+def _auction_result(pk, row):
+    if row is None:
+        return None
+    # isOpen cambia al llegar el cierre aunque la fila no se toque
+    is_open = row['closing_date'] > timezone.now()
+    last_modified = row['updated_at'] if is_open else max(row['updated_at'], row['closing_date'])
+    return (pk, row['updated_at'].isoformat(), is_open), last_modified
+
+
+def auction_validators(request, pk):
+    return _auction_result(pk, _auction_row(pk).first())
+
+
+async def aauction_validators(request, pk):
+    return _auction_result(pk, await _auction_row(pk).afirst())
+
+
+def _bid_list_row(auction_id):
+    # place_bid y refresh_bid_summary actualizan bid_count y updated_at de la subasta
+    last_bid = Bid.objects.filter(auction=OuterRef('pk')).order_by('-id').values('id')[:1]
+    return Auction.objects.filter(pk=auction_id).values('updated_at', 'bid_count').annotate(last_bid=Subquery(last_bid))
+
+
+def _bid_list_result(request, auction_id, row):
+    if row is None:
+        return None
+    parts = (auction_id, row['updated_at'].isoformat(), row['bid_count'], row['last_bid'], list_params(request))
+    return parts, row['updated_at']
+
+
+def bid_list_validators(request, auction_id):
+    return _bid_list_result(request, auction_id, _bid_list_row(auction_id).first())
+
+
+async def abid_list_validators(request, auction_id):
+    return _bid_list_result(request, auction_id, await _bid_list_row(auction_id).afirst())
+
+
+def _comment_list_row(auction_id):
+    # Los comentarios muestran datos de la subasta, y borrar uno actualiza su updated_at
+    return Auction.objects.filter(pk=auction_id).values('updated_at').annotate(
+        count=Count('comments'), last_id=Max('comments__id'), last_updated=Max('comments__updated_at'),
+    ).order_by('updated_at')
+
+
+def _comment_list_result(request, auction_id, row):
+    if row is None:
+        return None
+    parts = (auction_id, row['updated_at'].isoformat(), row['count'], row['last_id'],
+             row['last_updated'] and row['last_updated'].isoformat(), list_params(request))
+    return parts, max(filter(None, (row['updated_at'], row['last_updated'])))
+
+
+def comment_list_validators(request, auction_id):
+    return _comment_list_result(request, auction_id, _comment_list_row(auction_id).first())
+
+
+async def acomment_list_validators(request, auction_id):
+    return _comment_list_result(request, auction_id, await _comment_list_row(auction_id).afirst())
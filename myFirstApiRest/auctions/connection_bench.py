@@ -0,0 +1,124 @@
+"""
+Banco de pruebas del coste de abrir las conexiones a la base de datos.
+
+Lanza en serie, dentro del propio proceso y con ``WSGIHandler``, los GET de
+lectura de :mod:`.concurrency` con cada estrategia de conexión:
+
+* ``per-request``: ``CONN_MAX_AGE = 0`` y sin pool, una conexión nueva en cada
+  petición (lo que había antes de ``myFirstApiRest/database.py``).
+* ``persistent``: la conexión se conserva entre peticiones (``CONN_MAX_AGE`` de
+  la configuración, o 60 s si allí es 0).
+* ``pool``: el pool de psycopg 3. Solo con PostgreSQL y ``psycopg[pool]``.
+
+Cada modo mide además lo que cuesta abrir una conexión sin petición por medio
+(``connect``) y cuenta las conexiones que se abren durante las peticiones. Con
+pool cada petición cuenta como una conexión, pero es un préstamo del pool.
+
+Los GET anónimos salen casi siempre de la caché de respuestas sin tocar la
+base de datos; la diferencia se ve en los ``(auth)`` y en las listas de pujas
+y comentarios.
+"""
+import importlib.util
+import time
+from contextlib import contextmanager
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+
+from .benchmark import percentile
+from .concurrency import build_targets, wsgi_get
+
+MODES = ('per-request', 'persistent', 'pool')
+
+
+def available_modes(connection):
+    if connection.vendor == 'postgresql':
+        from django.db.backends.postgresql.psycopg_any import is_psycopg3
+        if is_psycopg3 and importlib.util.find_spec('psycopg_pool'):
+            return MODES
+    return MODES[:2]
+
+
+@contextmanager
+def connection_mode(mode, alias=DEFAULT_DB_ALIAS):
+    """Aplica a ``alias`` la estrategia ``mode`` y al salir deja la configuración como estaba."""
+    connection = connections[alias]
+    settings_dict = connection.settings_dict
+    max_age, options = settings_dict['CONN_MAX_AGE'], settings_dict['OPTIONS']
+    pool = options.get('pool')
+    connection.close()
+    settings_dict['CONN_MAX_AGE'] = {'per-request': 0, 'persistent': max_age if max_age != 0 else 60, 'pool': 0}[mode]
+    settings_dict['OPTIONS'] = {key: value for key, value in options.items() if key != 'pool'}
+    if mode == 'pool':
+        settings_dict['OPTIONS']['pool'] = pool or True
+    try:
+        yield connection
+    finally:
+        connection.close()
+        if mode == 'pool':
+            connection.close_pool()
+        settings_dict['CONN_MAX_AGE'], settings_dict['OPTIONS'] = max_age, options
+
+
+def time_connects(connection, connects):
+    """Milisegundos que tarda ``ensure_connection`` con la conexión cerrada."""
+    durations = []
+    for _ in range(connects):
+        connection.close()
+        start = time.perf_counter()
+        connection.ensure_connection()
+        durations.append(time.perf_counter() - start)
+    connection.close()
+    durations.sort()
+    return {'p50_ms': round(percentile(durations, 50) * 1000, 3), 'p95_ms': round(percentile(durations, 95) * 1000, 3)}
+
+
+def run_target(app, url, headers, requests):
+    latencies, errors, opened = [], {}, []
+
+    def count(sender, connection, **kwargs):
+        opened.append(connection.alias)
+
+    connection_created.connect(count)
+    try:
+        for _ in range(requests):
+            start = time.perf_counter()
+            status, body = wsgi_get(app, url, headers)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors[status] = errors.get(status, 0) + 1
+    finally:
+        connection_created.disconnect(count)
+    latencies.sort()
+    return {
+        'requests': requests,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'mean_ms': round(sum(latencies) / requests * 1000, 2),
+        'connections': len(opened),
+        'errors': errors,
+    }
+
+
+def run_connections(ctx, modes=None, requests=200, warmup=5, connects=50, log=None):
+    """``{modo: {'connect': ..., objetivo: resultado}}`` con los modos disponibles (o ``modes``)."""
+    connection = connections[DEFAULT_DB_ALIAS]
+    modes = modes or available_modes(connection)
+    targets = build_targets(ctx)
+    app = WSGIHandler()
+    results = {}
+    with override_settings(THROTTLING_ENABLED=False, CACHE_SHARED=True):
+        for mode in modes:
+            with connection_mode(mode) as connection:
+                results[mode] = {'connect': time_connects(connection, connects)}
+                if log:
+                    log(mode, 'connect', results[mode]['connect'])
+                for name, url, headers in targets:
+                    for _ in range(warmup):
+                        wsgi_get(app, url, headers)
+                    results[mode][name] = run_target(app, url, headers, requests)
+                    if log:
+                        log(mode, name, results[mode][name])
+    return results
@@ -0,0 +1,177 @@
+"""
+Generador de datos sintéticos para pruebas de carga.
+
+Crea usuarios, categorías, subastas, pujas, valoraciones y comentarios con
+``bulk_create`` por bloques. La actividad se reparte con una distribución de
+Zipf de exponente ``skew`` sobre las subastas (y sobre los usuarios y las
+categorías), así que con el valor por defecto unas pocas subastas concentran
+la mayor parte de las pujas y los comentarios; con ``skew=0`` el reparto es
+uniforme.
+
+Todo lo generado lleva el prefijo ``prefix`` en el nombre de usuario y de la
+categoría, y :func:`clear_generated` lo borra en cascada.
+"""
+import random
+from bisect import bisect_left
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+
+from users.models import CustomUser
+from .bidding import refresh_bid_summary
+from .cache import bump_version
+from .models import Auction, Bid, Category, Comment, Rating
+from .ratings import recompute_rating_aggregates
+
+DEFAULT_PREFIX = 'gen'
+DEFAULT_PASSWORD = 'Bench.12345'
+CHUNK_SIZE = 5000
+# Parte de las subastas que ya han cerrado
+CLOSED_SHARE = 0.2
+
+TITLES = ['Reloj', 'Bicicleta', 'Cámara', 'Guitarra', 'Portátil', 'Sofá', 'Lámpara', 'Consola', 'Libro', 'Cuadro']
+BRANDS = ['Acme', 'Nortec', 'Zenit', 'Orbis', 'Luma', 'Kappa']
+DESCRIPTIONS = [
+    'En perfecto estado, apenas usado.',
+    'Con caja original y todos los accesorios.',
+    'Pequeños arañazos en la parte trasera, funciona correctamente.',
+    'Edición limitada, difícil de encontrar.',
+    'Envío a toda la península incluido en el precio.',
+]
+
+
+class ZipfSampler:
+    """Índices ``0..n-1`` con probabilidad proporcional a ``1 / (i + 1) ** skew``."""
+
+    def __init__(self, n, skew, rng):
+        self.rng = rng
+        self.cum_weights = list(accumulate(1 / (i + 1) ** skew for i in range(n)))
+
+    def sample(self, k=1):
+        return self.rng.choices(range(len(self.cum_weights)), cum_weights=self.cum_weights, k=k)
+
+    def sample_distinct(self, k):
+        """``k`` índices distintos (como mucho ``n``), más probables los de más peso."""
+        total = self.cum_weights[-1]
+        chosen = set()
+        k = min(k, len(self.cum_weights))
+        while len(chosen) < k:
+            chosen.add(bisect_left(self.cum_weights, self.rng.random() * total))
+        return chosen
+
+
+def _chunks(items, size=CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _bulk_create(model, objects):
+    created = []
+    for chunk in _chunks(objects):
+        created += model.objects.bulk_create(chunk)
+    return created
+
+
+def generate(users=200, categories=20, auctions=2000, bids=50000, ratings=10000, comments=10000,
+             skew=1.1, prefix=DEFAULT_PREFIX, password=DEFAULT_PASSWORD, seed=None, log=None):
+    """Genera los datos y devuelve cuántas filas de cada tipo se han creado."""
+    rng = random.Random(seed)
+    log = log or (lambda message: None)
+    now = timezone.now()
+
+    # Un único hash: calcular uno por usuario costaría segundos por cada cien
+    password_hash = make_password(password)
+    user_rows = [
+        CustomUser(username=f'{prefix}-user-{i}', email=f'{prefix}-user-{i}@example.com', password=password_hash,
+                   birth_date=date(1960 + i % 45, 1 + i % 12, 1 + i % 28), first_name='Usuario', last_name=str(i))
+        for i in range(users)
+    ]
+    user_rows.append(CustomUser(username=f'{prefix}-admin', email=f'{prefix}-admin@example.com',
+                                password=password_hash, birth_date=date(1980, 1, 1), is_staff=True))
+    user_ids = [user.pk for user in _bulk_create(CustomUser, user_rows)]
+    if user_ids[0] is None:
+        # Backends sin RETURNING
+        user_ids = list(CustomUser.objects.filter(username__startswith=f'{prefix}-').order_by('id').values_list('id', flat=True))
+    user_ids = user_ids[:users]
+    log(f'{users} users (+1 staff)')
+
+    category_ids = [category.pk for category in _bulk_create(
+        Category, [Category(name=f'{prefix}-category-{i}') for i in range(categories)])]
+    if category_ids[0] is None:
+        category_ids = list(Category.objects.filter(name__startswith=f'{prefix}-').order_by('id').values_list('id', flat=True))
+    log(f'{categories} categories')
+
+    pick_user = ZipfSampler(users, skew, rng)
+    pick_category = ZipfSampler(categories, skew, rng)
+    auction_rows = []
+    for i in range(auctions):
+        price = Decimal(rng.randint(100, 100000)) / 100
+        closed = rng.random() < CLOSED_SHARE
+        closing = now + (timedelta(days=-rng.randint(1, 60)) if closed else timedelta(days=rng.randint(15, 90)))
+        auction_rows.append(Auction(
+            title=f'{rng.choice(TITLES)} {i}', description=rng.choice(DESCRIPTIONS), price=price,
+            stock=rng.randint(1, 10), brand=rng.choice(BRANDS), category_id=category_ids[pick_category.sample()[0]],
+            auctioneer_id=user_ids[pick_user.sample()[0]], closing_date=closing,
+            thumbnail=f'https://example.com/{prefix}/{i}.jpg'))
+    created = _bulk_create(Auction, auction_rows)
+    auction_ids = [auction.pk for auction in created]
+    if auction_ids[0] is None:
+        auction_ids = list(Auction.objects.filter(category_id__in=category_ids).order_by('id').values_list('id', flat=True))
+    starting_prices = [auction.price for auction in auction_rows]
+    log(f'{auctions} auctions')
+
+    # Pujas crecientes por subasta, en el orden en que se insertan
+    pick_auction = ZipfSampler(auctions, skew, rng)
+    current = list(starting_prices)
+    bid_rows = []
+    for index in pick_auction.sample(bids):
+        current[index] += Decimal(rng.randint(1, 500)) / 100
+        bid_rows.append(Bid(auction_id=auction_ids[index], bidder_id=user_ids[pick_user.sample()[0]],
+                            price=current[index]))
+        if len(bid_rows) == CHUNK_SIZE:
+            Bid.objects.bulk_create(bid_rows)
+            bid_rows = []
+    Bid.objects.bulk_create(bid_rows)
+    for chunk in _chunks(auction_ids):
+        refresh_bid_summary(chunk)
+    log(f'{bids} bids')
+
+    # Una valoración por usuario y subasta como mucho
+    per_auction = {}
+    for index in pick_auction.sample(ratings):
+        per_auction[index] = per_auction.get(index, 0) + 1
+    rating_rows = [
+        Rating(auction_id=auction_ids[index], user_id=user_ids[user_index], value=rng.randint(1, 5))
+        for index, count in per_auction.items() for user_index in pick_user.sample_distinct(count)
+    ]
+    _bulk_create(Rating, rating_rows)
+    for chunk in _chunks(auction_ids):
+        recompute_rating_aggregates(chunk)
+    log(f'{len(rating_rows)} ratings')
+
+    _bulk_create(Comment, [
+        Comment(title=f'Comentario {n}', content=rng.choice(DESCRIPTIONS), auction_id=auction_ids[index],
+                user_id=user_ids[pick_user.sample()[0]])
+        for n, index in enumerate(pick_auction.sample(comments))
+    ])
+    log(f'{comments} comments')
+    # bulk_create no emite señales
+    bump_version(*(model._meta.label for model in (Auction, Bid, Category, Comment, Rating)))
+
+    return {'users': users + 1, 'categories': categories, 'auctions': auctions, 'bids': bids,
+            'ratings': len(rating_rows), 'comments': comments}
+
+
+def clear_generated(prefix=DEFAULT_PREFIX):
+    """Borra los datos generados con ``prefix`` (subastas, pujas... caen en cascada)."""
+    auction_ids = list(Auction.objects.filter(category__name__startswith=f'{prefix}-').values_list('id', flat=True))
+    for chunk in _chunks(auction_ids, 500):
+        Auction.objects.filter(pk__in=chunk).delete()
+    Category.objects.filter(name__startswith=f'{prefix}-').delete()
+    user_ids = list(CustomUser.objects.filter(username__startswith=f'{prefix}-').values_list('id', flat=True))
+    for chunk in _chunks(user_ids, 500):
+        CustomUser.objects.filter(pk__in=chunk).delete()
+
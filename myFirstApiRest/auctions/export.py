@@ -0,0 +1,158 @@
+"""
+Volcado completo de subastas, pujas y valoraciones en CSV o NDJSON.
+
+Las filas se leen con ``values_list(...).iterator(chunk_size=...)``: en
+PostgreSQL es un cursor del lado del servidor y en SQLite ``fetchmany``, así
+que nunca hay más de un bloque en memoria. Cada bloque se convierte a texto y
+se entrega como un único fragmento, tanto a ``StreamingHttpResponse`` como al
+comando ``export_data``.
+
+Con ASGI, Django lee entero un iterador síncrono antes de enviar la respuesta;
+allí se usa :func:`astream_export`, con ``aiterator()``, que entrega los
+mismos fragmentos.
+"""
+import csv
+import json
+from datetime import datetime, time
+
+from django.db import models
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Auction, Bid, Rating
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+CHUNK_SIZE = 2000
+
+EXPORTS = {
+    'auctions': (Auction, (
+        'id', 'title', 'description', 'price', 'rating', 'rating_count', 'stock', 'brand', 'category',
+        'auctioneer', 'thumbnail', 'creation_date', 'closing_date', 'current_price', 'bid_count', 'is_closed',
+    )),
+    'bids': (Bid, ('id', 'auction', 'bidder', 'price', 'creation_date')),
+    'ratings': (Rating, ('id', 'auction', 'user', 'value', 'creation_date')),
+}
+OUTPUTS = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+
+def parse_moment(value):
+    """Fecha o fecha y hora ISO 8601 (sin zona, la actual); ``ValueError`` si no lo es."""
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f'"{value}" is not an ISO 8601 date or datetime.')
+        parsed = datetime.combine(day, time.min)
+    return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+
+def export_queryset(name, since=None, until=None):
+    """Filas de ``name`` ordenadas por id, con ``since <= creation_date < until``."""
+    model, fields = EXPORTS[name]
+    queryset = model.objects.order_by('id')
+    if since is not None:
+        queryset = queryset.filter(creation_date__gte=since)
+    if until is not None:
+        queryset = queryset.filter(creation_date__lt=until)
+    return queryset.values_list(*fields)
+
+
+def _converters(model, fields):
+    # Fechas en ISO 8601 y decimales como texto, igual en CSV y en NDJSON
+    converters = []
+    for name in fields:
+        field = model._meta.get_field(name)
+        if isinstance(field, models.DateTimeField):
+            converters.append(lambda value: value.isoformat())
+        elif isinstance(field, models.DecimalField):
+            converters.append(str)
+        else:
+            converters.append(None)
+    return converters
+
+
+class _Lines:
+    """Destino de ``csv.writer`` que acumula las líneas de un bloque."""
+
+    def __init__(self):
+        self.lines = []
+
+    def write(self, line):
+        self.lines.append(line)
+
+    def pop(self):
+        text = ''.join(self.lines)
+        self.lines.clear()
+        return text
+
+
+def _dumps(row):
+    if orjson is not None:
+        return orjson.dumps(row).decode()
+    return json.dumps(row, ensure_ascii=False, separators=(',', ':'))
+
+
+class _ExportWriter:
+    """Convierte las filas de ``name`` a CSV o NDJSON y las agrupa en bloques de ``chunk_size``."""
+
+    def __init__(self, name, output, chunk_size):
+        model, fields = EXPORTS[name]
+        self.converters = list(enumerate(_converters(model, fields)))
+        self.chunk_size = chunk_size
+        self.pending = 0
+        self.buffer = _Lines()
+        if output == 'csv':
+            writer = csv.writer(self.buffer)
+            writer.writerow(fields)
+            self.write = writer.writerow
+        else:
+            self.write = lambda row: self.buffer.write(_dumps(dict(zip(fields, row))) + '\n')
+
+    def add(self, row):
+        """El bloque de texto si con ``row`` se completa, y si no ``None``."""
+        row = list(row)
+        for index, convert in self.converters:
+            if convert is not None and row[index] is not None:
+                row[index] = convert(row[index])
+        self.write(row)
+        self.pending += 1
+        if self.pending == self.chunk_size:
+            self.pending = 0
+            return self.buffer.pop()
+        return None
+
+    def rest(self):
+        return self.buffer.pop()
+
+
+def stream_export(name, output, since=None, until=None, chunk_size=CHUNK_SIZE):
+    """Genera el volcado como fragmentos de texto de hasta ``chunk_size`` filas."""
+    writer = _ExportWriter(name, output, chunk_size)
+    for row in export_queryset(name, since, until).iterator(chunk_size=chunk_size):
+        chunk = writer.add(row)
+        if chunk:
+            yield chunk
+    remaining = writer.rest()
+    if remaining:
+        yield remaining
+
+
+async def astream_export(name, output, since=None, until=None, chunk_size=CHUNK_SIZE):
+    """:func:`stream_export` con ``aiterator()``, para servir el volcado por bloques con ASGI."""
+    writer = _ExportWriter(name, output, chunk_size)
+    fields = EXPORTS[name][1]
+    # aiterator() sobre values_list() lanza la consulta desde el event loop (Django 5.1): se lee con values()
+    rows = export_queryset(name, since, until).values(*fields)
+    async for row in rows.aiterator(chunk_size=chunk_size):
+        chunk = writer.add([row[field] for field in fields])
+        if chunk:
+            yield chunk
+    remaining = writer.rest()
+    if remaining:
+        yield remaining
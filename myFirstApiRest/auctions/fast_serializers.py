@@ -0,0 +1,186 @@
+"""
+Serialización de solo lectura para los listados grandes.
+
+Un ``ModelSerializer`` crea una instancia del modelo (y de cada relación) por
+fila y recorre sus campos resolviendo ``source`` atributo a atributo. Aquí se
+compila una vez por clase un plan a partir de los campos del serializer de DRF
+(nombre de salida, clave de ``values()`` y conversión) y cada fila se construye
+directamente desde ``QuerySet.values()``: las relaciones (``auctioneer.username``,
+``auction.category.name``...) se traen con JOIN y no se instancia ningún modelo.
+
+La conversión de cada valor es el ``to_representation`` del propio campo de
+DRF, así que el formato de decimales y fechas es el mismo; ``tests.py`` compara
+la salida con la del serializer original.
+"""
+from itertools import islice
+
+from django.core.exceptions import ImproperlyConfigured
+from django.http import StreamingHttpResponse
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from myFirstApiRest.fastjson import FastJSONRenderer
+from myFirstApiRest.metrics import timed
+
+from .serializers import (
+    AuctionListCreateSerializer, BidDetailSerializer, BidListCreateSerializer, CommentSerializer,
+)
+
+STREAM_CHUNK_SIZE = 2000
+
+
+class FastSerializer:
+    """
+    ``serializer_class`` es el serializer de DRF del que se copian los campos.
+    Los ``SerializerMethodField`` necesitan una entrada en ``method_fields`` con
+    la clave de ``values()`` (p. ej. una anotación) que ya trae su valor.
+    """
+    serializer_class = None
+    method_fields = {}
+    _plan = None
+
+    @classmethod
+    def get_plan(cls):
+        if cls.__dict__.get('_plan') is None:
+            cls._plan = cls.compile_plan()
+        return cls._plan
+
+    @classmethod
+    def compile_plan(cls):
+        plan = []
+        for name, field in cls.serializer_class().fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.SerializerMethodField):
+                if name not in cls.method_fields:
+                    raise ImproperlyConfigured(f'{cls.__name__}.method_fields needs an entry for "{name}".')
+                plan.append((name, cls.method_fields[name], None))
+            elif isinstance(field, serializers.PrimaryKeyRelatedField):
+                # values() ya devuelve la clave primaria
+                plan.append((name, field.source.replace('.', '__'), None))
+            elif isinstance(field, (serializers.BaseSerializer, serializers.RelatedField, serializers.ManyRelatedField)) \
+                    or field.source == '*':
+                raise ImproperlyConfigured(f'{cls.__name__} does not support field "{name}".')
+            else:
+                plan.append((name, field.source.replace('.', '__'), field.to_representation))
+        return tuple(plan)
+
+    @classmethod
+    def values(cls, queryset):
+        """El ``queryset`` con los ``values()`` que necesita el plan (se puede paginar)."""
+        return queryset.values(*dict.fromkeys(key for _, key, _ in cls.get_plan()))
+
+    @classmethod
+    def to_representation(cls, rows):
+        """Convierte filas de :meth:`values` en la misma salida que el serializer de DRF."""
+        plan = cls.get_plan()
+        data = []
+        with timed('serialize'):
+            for row in rows:
+                item = {}
+                for name, key, convert in plan:
+                    value = row[key]
+                    item[name] = value if value is None or convert is None else convert(value)
+                data.append(item)
+        return data
+
+    @classmethod
+    def serialize(cls, queryset):
+        return cls.to_representation(cls.values(queryset))
+
+    @classmethod
+    def iter_chunks(cls, queryset, chunk_size=STREAM_CHUNK_SIZE):
+        """Como :meth:`serialize`, en listas de ``chunk_size`` filas leídas con ``iterator()``."""
+        rows = cls.values(queryset).iterator(chunk_size=chunk_size)
+        while True:
+            chunk = cls.to_representation(islice(rows, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+    @classmethod
+    async def aiter_chunks(cls, queryset, chunk_size=STREAM_CHUNK_SIZE):
+        """:meth:`iter_chunks` con ``aiterator()``, para las vistas asíncronas."""
+        rows = []
+        async for row in cls.values(queryset).aiterator(chunk_size=chunk_size):
+            rows.append(row)
+            if len(rows) == chunk_size:
+                yield cls.to_representation(rows)
+                rows = []
+        if rows:
+            yield cls.to_representation(rows)
+
+
+class FastListMixin:
+    """
+    Para ``ListAPIView``: el GET de listado usa ``fast_serializer_class`` sobre
+    ``values()``. La creación y la documentación siguen usando ``serializer_class``.
+
+    Con ``ndjson_output = True``, ``?output=ndjson`` devuelve el listado completo
+    sin paginar, un objeto JSON por línea, generado por bloques con
+    ``StreamingHttpResponse``. Solo en las vistas de las filas del propio
+    usuario: en los listados públicos permitiría volcar la tabla entera.
+    """
+    fast_serializer_class = None
+    output_query_param = 'output'
+    ndjson_output = False
+
+    def get_output(self, request):
+        output = request.query_params.get(self.output_query_param, 'json')
+        if not self.ndjson_output:
+            if output != 'json':
+                raise ValidationError({self.output_query_param: "Output must be json."})
+        elif output not in ('json', 'ndjson'):
+            raise ValidationError({self.output_query_param: "Output must be json or ndjson."})
+        return output
+
+    def list(self, request, *args, **kwargs):
+        if self.get_output(request) == 'ndjson':
+            return StreamingHttpResponse(
+                self.stream_ndjson(self.filter_queryset(self.get_queryset())), content_type='application/x-ndjson')
+        rows = self.fast_serializer_class.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(self.fast_serializer_class.to_representation(page))
+        return Response(self.fast_serializer_class.to_representation(rows))
+
+    def stream_ndjson(self, queryset):
+        renderer = FastJSONRenderer()
+        for chunk in self.fast_serializer_class.iter_chunks(queryset):
+            yield b''.join(renderer.render(item) + b'\n' for item in chunk)
+
+    async def alist(self, request, *args, **kwargs):
+        """``list`` para el ``aget`` de las vistas con ``AsyncReadMixin``."""
+        output = self.get_output(request)
+        queryset = self.filter_queryset(self.get_queryset())
+        if output == 'ndjson':
+            return StreamingHttpResponse(self.astream_ndjson(queryset), content_type='application/x-ndjson')
+        rows = self.fast_serializer_class.values(queryset)
+        page = await self.apaginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(self.fast_serializer_class.to_representation(page))
+        return Response(self.fast_serializer_class.to_representation([row async for row in rows]))
+
+    async def astream_ndjson(self, queryset):
+        renderer = FastJSONRenderer()
+        async for chunk in self.fast_serializer_class.aiter_chunks(queryset):
+            yield b''.join(renderer.render(item) + b'\n' for item in chunk)
+
+
+class AuctionListFastSerializer(FastSerializer):
+    serializer_class = AuctionListCreateSerializer
+    # Anotación de views.annotate_is_open
+    method_fields = {'isOpen': 'is_open'}
+
+
+class BidListFastSerializer(FastSerializer):
+    serializer_class = BidListCreateSerializer
+
+
+class BidDetailFastSerializer(FastSerializer):
+    serializer_class = BidDetailSerializer
+
+
+class CommentFastSerializer(FastSerializer):
+    serializer_class = CommentSerializer
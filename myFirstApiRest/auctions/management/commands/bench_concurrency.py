@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from auctions.benchmark import BenchmarkContext
+from auctions.concurrency import MODES, run_concurrency
+from auctions.datagen import DEFAULT_PASSWORD, DEFAULT_PREFIX
+
+
+class Command(BaseCommand):
+    help = ('Compara con peticiones concurrentes los GET de lectura con WSGI, con ASGI y vistas síncronas y con '
+            'ASGI y vistas asíncronas, sobre los datos de generate_data.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Peticiones por objetivo y concurrencia.')
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32],
+                            help='Peticiones en vuelo a la vez (se pueden dar varios valores).')
+        parser.add_argument('--mode', choices=MODES, nargs='+', default=list(MODES))
+        parser.add_argument('--warmup', type=int, default=5, help='Peticiones previas que no se miden.')
+        parser.add_argument('--prefix', default=DEFAULT_PREFIX)
+        parser.add_argument('--password', default=DEFAULT_PASSWORD)
+
+    def handle(self, *args, **options):
+        try:
+            ctx = BenchmarkContext(options['prefix'], options['password'])
+        except LookupError as exc:
+            raise CommandError(f'{exc} Run generate_data first.')
+
+        self.stdout.write(f'{"mode":<12}{"target":<32}{"conc":>6}{"req/s":>9}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}')
+
+        def log(mode, name, concurrency, result):
+            errors = f'  errors {result["errors"]}' if result['errors'] else ''
+            self.stdout.write(
+                f'{mode:<12}{name:<32}{concurrency:>6}{result["rps"]:>9,.0f}{result["p50_ms"]:>9.2f}'
+                f'{result["p95_ms"]:>9.2f}{result["p99_ms"]:>9.2f}{errors}')
+
+        results, mismatches = run_concurrency(ctx, options['mode'], options['requests'], options['concurrency'],
+                                              options['warmup'], log)
+        for line in mismatches:
+            self.stdout.write(self.style.ERROR(line))
+        if len(options['mode']) > 1 and not mismatches:
+            self.stdout.write(self.style.SUCCESS('Responses are identical in every mode.'))
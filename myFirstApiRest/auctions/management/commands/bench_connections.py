@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from auctions.benchmark import BenchmarkContext
+from auctions.connection_bench import MODES, available_modes, run_connections
+from auctions.datagen import DEFAULT_PASSWORD, DEFAULT_PREFIX
+
+
+class Command(BaseCommand):
+    help = ('Compara la latencia de los GET de lectura abriendo una conexión por petición, con conexiones '
+            'persistentes y con el pool de psycopg 3, sobre los datos de generate_data.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Peticiones por objetivo y modo.')
+        parser.add_argument('--mode', choices=MODES, nargs='+', help='Por defecto, todos los disponibles.')
+        parser.add_argument('--warmup', type=int, default=5, help='Peticiones previas que no se miden.')
+        parser.add_argument('--connects', type=int, default=50, help='Conexiones abiertas para medir su coste.')
+        parser.add_argument('--prefix', default=DEFAULT_PREFIX)
+        parser.add_argument('--password', default=DEFAULT_PASSWORD)
+
+    def handle(self, *args, **options):
+        unavailable = set(options['mode'] or ()) - set(available_modes(connection))
+        if unavailable:
+            raise CommandError(f'Not available with this database: {", ".join(sorted(unavailable))} '
+                               '(the pool needs PostgreSQL and psycopg[pool]).')
+        try:
+            ctx = BenchmarkContext(options['prefix'], options['password'])
+        except LookupError as exc:
+            raise CommandError(f'{exc} Run generate_data first.')
+
+        self.stdout.write(f'{connection.vendor}: {connection.settings_dict["NAME"]}')
+        self.stdout.write(f'{"mode":<13}{"target":<32}{"p50 ms":>9}{"p95 ms":>9}{"mean ms":>9}{"conns":>7}')
+
+        def log(mode, name, result):
+            if name == 'connect':
+                self.stdout.write(f'{mode:<13}{name:<32}{result["p50_ms"]:>9.3f}{result["p95_ms"]:>9.3f}')
+                return
+            errors = f'  errors {result["errors"]}' if result['errors'] else ''
+            self.stdout.write(
+                f'{mode:<13}{name:<32}{result["p50_ms"]:>9.2f}{result["p95_ms"]:>9.2f}{result["mean_ms"]:>9.2f}'
+                f'{result["connections"]:>7}{errors}')
+
+        run_connections(ctx, options['mode'], options['requests'], options['warmup'], options['connects'], log)
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from auctions.benchmark import BenchmarkContext, compare, load_baseline, run_benchmark, save_baseline
+from auctions.datagen import DEFAULT_PASSWORD, DEFAULT_PREFIX
+
+
+class Command(BaseCommand):
+    help = ('Mide todos los endpoints de auctions y users dentro del proceso sobre los datos de generate_data '
+            'y compara con una línea base.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help='Peticiones medidas por escenario.')
+        parser.add_argument('--warmup', type=int, default=3, help='Peticiones previas que no se miden.')
+        parser.add_argument('--only', help='Solo los escenarios cuyo nombre contiene este texto.')
+        parser.add_argument('--prefix', default=DEFAULT_PREFIX)
+        parser.add_argument('--password', default=DEFAULT_PASSWORD)
+        parser.add_argument('--baseline', help='Fichero JSON con la línea base con la que comparar.')
+        parser.add_argument('--save-baseline', help='Guarda los resultados como línea base en este fichero.')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='Aumento de p95 admitido frente a la línea base (0.25 = 25%%).')
+        parser.add_argument('--min-delta-ms', type=float, default=1.0,
+                            help='Aumento mínimo de p95 en milisegundos para considerarlo regresión.')
+        parser.add_argument('--fail-on-regression', action='store_true')
+        parser.add_argument('--throttling', action='store_true',
+                            help='Mantiene los límites de peticiones (por defecto se desactivan).')
+
+    def handle(self, *args, **options):
+        try:
+            ctx = BenchmarkContext(options['prefix'], options['password'])
+        except LookupError as exc:
+            raise CommandError(f'{exc} Run generate_data first.')
+        baseline = load_baseline(options['baseline']) if options['baseline'] else {}
+
+        self.stdout.write(f'{"scenario":<32}{"req/s":>9}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}{"queries":>9}  vs baseline p95')
+
+        def log(name, result):
+            base = baseline.get(name)
+            delta = f'{(result["p95_ms"] / base["p95_ms"] - 1) * 100:+.0f}%' if base and base['p95_ms'] else ''
+            errors = f'  errors {result["errors"]}' if result['errors'] else ''
+            self.stdout.write(
+                f'{name:<32}{result["rps"]:>9,.0f}{result["p50_ms"]:>9.2f}{result["p95_ms"]:>9.2f}'
+                f'{result["p99_ms"]:>9.2f}{result["queries"]:>9}  {delta}{errors}')
+
+        results, uncovered = run_benchmark(ctx, options['requests'], options['warmup'], options['only'], log,
+                                          options['throttling'])
+        if uncovered:
+            self.stdout.write(self.style.WARNING(f'Routes without a scenario: {", ".join(uncovered)}'))
+        if options['save_baseline']:
+            save_baseline(options['save_baseline'], results)
+            self.stdout.write(f'Baseline saved to {options["save_baseline"]}.')
+
+        failed = [f'{name}: unexpected status {result["errors"]}' for name, result in results.items() if result['errors']]
+        regressions = compare(results, baseline, options['tolerance'], options['min_delta_ms']) if baseline else []
+        for line in failed + regressions:
+            self.stdout.write(self.style.ERROR(line))
+        if options['fail_on_regression'] and (failed or regressions):
+            raise CommandError(f'{len(failed)} failing scenarios and {len(regressions)} regressions.')
+        if baseline and not regressions:
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline.'))
@@ -0,0 +1,70 @@
+import io
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from auctions.models import Auction, Category
+from auctions.serializers import AuctionListCreateSerializer
+from myFirstApiRest.fastjson import FastJSONParser, FastJSONRenderer, orjson
+from users.models import CustomUser
+
+
+def build_auctions(rows):
+    """Subastas en memoria (sin base de datos) con los campos que muestra el listado."""
+    now = timezone.now()
+    category = Category(id=1, name='Electrónica')
+    auctioneer = CustomUser(id=1, username='subastador')
+    return [
+        Auction(
+            id=i, title=f'Subasta {i}', description='Descripción de prueba ' * 4, price=Decimal('10.00') + i,
+            rating=Decimal('3.75'), stock=1, brand='Marca', category=category, auctioneer=auctioneer,
+            thumbnail=f'https://example.com/{i}.jpg', creation_date=now, closing_date=now + timedelta(days=i % 30 + 1),
+            current_price=Decimal('12.50') + i if i % 3 else None, bid_count=i % 7)
+        for i in range(1, rows + 1)
+    ]
+
+
+def measure(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+class Command(BaseCommand):
+    help = 'Compara la velocidad de JSONRenderer/JSONParser de DRF con los de orjson en páginas de subastas.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            raise CommandError('orjson is not installed.')
+        rows, repeat = options['rows'], options['repeat']
+        auctions = build_auctions(rows)
+        page = {'count': rows, 'next': None, 'previous': None,
+                'results': AuctionListCreateSerializer(auctions, many=True).data}
+
+        expected = JSONRenderer().render(page)
+        if FastJSONRenderer().render(page) != expected:
+            raise CommandError('FastJSONRenderer output differs from JSONRenderer.')
+        self.stdout.write(f'{rows}-row page, {len(expected) / 1024:.1f} KiB, byte-identical output')
+
+        serialize = measure(lambda: AuctionListCreateSerializer(auctions, many=True).data, max(repeat // 10, 1))
+        self.stdout.write(f'{"serializer (reference)":<24}{serialize * 1000:9.2f} ms/page')
+        for name, stock, fast in (
+            ('render', lambda: JSONRenderer().render(page), lambda: FastJSONRenderer().render(page)),
+            ('parse', lambda: JSONParser().parse(io.BytesIO(expected)),
+             lambda: FastJSONParser().parse(io.BytesIO(expected))),
+        ):
+            stock_time, fast_time = measure(stock, repeat), measure(fast, repeat)
+            self.stdout.write(
+                f'{name:<8}DRF {stock_time * 1000:7.2f} ms/page ({rows / stock_time:,.0f} rows/s)   '
+                f'orjson {fast_time * 1000:7.2f} ms/page ({rows / fast_time:,.0f} rows/s)   '
+                f'x{stock_time / fast_time:.1f}')
@@ -0,0 +1,74 @@
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from auctions.fast_serializers import AuctionListFastSerializer, BidListFastSerializer, CommentFastSerializer
+from auctions.models import Auction, Bid, Category, Comment
+from auctions.serializers import AuctionListCreateSerializer, BidListCreateSerializer, CommentSerializer
+from auctions.views import annotate_is_open
+from users.models import CustomUser
+
+
+def seed(rows):
+    suffix = f'{int(time.time() * 1000)}-{random.randint(0, 9999)}'
+    category = Category.objects.create(name=f'bench-{suffix}')
+    user = CustomUser.objects.create(username=f'bench-{suffix}', birth_date=date(1990, 1, 1))
+    closing = timezone.now() + timedelta(days=30)
+    Auction.objects.bulk_create([
+        Auction(title=f'Subasta {i}', description='Descripción de prueba', price=Decimal('10.00') + i, stock=1,
+                brand='Marca', category=category, closing_date=closing, auctioneer=user,
+                current_price=Decimal('12.50') + i, bid_count=1)
+        for i in range(rows)
+    ])
+    auction = Auction.objects.filter(category=category).first()
+    Bid.objects.bulk_create([Bid(auction=auction, bidder=user, price=Decimal('10.00') + i) for i in range(rows)])
+    Comment.objects.bulk_create([
+        Comment(title=f'Comentario {i}', content='Texto', user=user, auction=auction) for i in range(rows)
+    ])
+    return category, user, auction
+
+
+def measure(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        data = func()
+    return (time.perf_counter() - start) / repeat, data
+
+
+class Command(BaseCommand):
+    help = 'Compara ModelSerializer con los serializers sobre values() en los listados de subastas, pujas y comentarios.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        category, user, auction = seed(rows)
+        try:
+            auctions = annotate_is_open(Auction.objects.filter(category=category))
+            bids = Bid.objects.filter(auction=auction)
+            comments = Comment.objects.filter(auction=auction)
+            cases = (
+                ('auctions', AuctionListCreateSerializer, AuctionListFastSerializer,
+                 auctions.select_related('auctioneer', 'category'), auctions),
+                ('bids', BidListCreateSerializer, BidListFastSerializer, bids.select_related('bidder'), bids),
+                ('comments', CommentSerializer, CommentFastSerializer,
+                 comments.select_related('user', 'auction__category'), comments),
+            )
+            for name, serializer_class, fast_class, related, queryset in cases:
+                # Incluye la consulta: values() también ahorra instanciar los modelos
+                stock_time, expected = measure(lambda: serializer_class(related.all(), many=True).data, repeat)
+                fast_time, data = measure(lambda: fast_class.serialize(queryset.all()), repeat)
+                if data != expected:
+                    raise CommandError(f'{fast_class.__name__} output differs from {serializer_class.__name__}.')
+                self.stdout.write(
+                    f'{name:<10}DRF {rows / stock_time:10,.0f} rows/s   '
+                    f'values() {rows / fast_time:10,.0f} rows/s   x{stock_time / fast_time:.1f}')
+        finally:
+            category.delete()
+            user.delete()
@@ -0,0 +1,36 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from auctions.export import CHUNK_SIZE, EXPORTS, OUTPUTS, parse_moment, stream_export
+
+
+class Command(BaseCommand):
+    help = 'Vuelca subastas, pujas o valoraciones en CSV o NDJSON leyendo la tabla por bloques.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=sorted(EXPORTS))
+        parser.add_argument('--output', choices=sorted(OUTPUTS), default='csv')
+        parser.add_argument('--file', help='Fichero de salida (por defecto, la salida estándar).')
+        parser.add_argument('--since', help='creation_date >= since')
+        parser.add_argument('--until', help='creation_date < until')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            since, until = parse_moment(options['since']), parse_moment(options['until'])
+        except ValueError as exc:
+            raise CommandError(exc)
+        target = open(options['file'], 'w', encoding='utf-8', newline='') if options['file'] else self.stdout
+        start = perf_counter()
+        try:
+            for chunk in stream_export(options['name'], options['output'], since, until, options['chunk_size']):
+                if target is self.stdout:
+                    self.stdout.write(chunk, ending='')
+                else:
+                    target.write(chunk)
+        finally:
+            if target is not self.stdout:
+                target.close()
+        if options['file']:
+            self.stderr.write(f'Exported {options["name"]} to {options["file"]} in {perf_counter() - start:.2f}s.')
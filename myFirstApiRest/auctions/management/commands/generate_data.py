@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from auctions.datagen import DEFAULT_PASSWORD, DEFAULT_PREFIX, clear_generated, generate
+
+
+class Command(BaseCommand):
+    help = 'Genera usuarios, categorías, subastas, pujas, valoraciones y comentarios sintéticos para pruebas de carga.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--auctions', type=int, default=2000)
+        parser.add_argument('--bids', type=int, default=50000)
+        parser.add_argument('--ratings', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=10000)
+        parser.add_argument('--skew', type=float, default=1.1,
+                            help='Exponente de Zipf del reparto de la actividad (0 = uniforme).')
+        parser.add_argument('--seed', type=int, help='Semilla para repetir exactamente los mismos datos.')
+        parser.add_argument('--prefix', default=DEFAULT_PREFIX, help='Prefijo de usuarios y categorías generados.')
+        parser.add_argument('--password', default=DEFAULT_PASSWORD, help='Contraseña de los usuarios generados.')
+        parser.add_argument('--clear', action='store_true', help='Borra antes los datos generados con el mismo prefijo.')
+        parser.add_argument('--clear-only', action='store_true', help='Solo borra los datos generados.')
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if options['clear'] or options['clear_only']:
+            clear_generated(prefix)
+            self.stdout.write(f'Removed data generated with prefix "{prefix}".')
+            if options['clear_only']:
+                return
+        start = time.perf_counter()
+        counts = generate(
+            users=options['users'], categories=options['categories'], auctions=options['auctions'],
+            bids=options['bids'], ratings=options['ratings'], comments=options['comments'], skew=options['skew'],
+            prefix=prefix, password=options['password'], seed=options['seed'], log=self.stdout.write)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {sum(counts.values()):,} rows in {elapsed:.1f}s. '
+            f'Staff user: {prefix}-admin / {options["password"]}'))
@@ -0,0 +1,47 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from auctions.importer import CHUNK_SIZE, READERS, AuctionImporter, guess_format
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = 'Importa subastas desde un fichero CSV o NDJSON insertándolas por bloques.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Fichero de entrada, o - para leer de la entrada estándar.')
+        parser.add_argument('--auctioneer', required=True, help='Usuario al que se asignan las subastas.')
+        parser.add_argument('--input-format', choices=sorted(READERS), help='Por defecto, según la extensión.')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument('--rejected', help='Fichero NDJSON con las filas rechazadas (por defecto <path>.rejected.ndjson).')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        input_format = options['input_format'] or guess_format(path)
+        if input_format is None:
+            raise CommandError('Cannot guess the input format, use --input-format.')
+        try:
+            auctioneer = CustomUser.objects.get(username=options['auctioneer'])
+        except CustomUser.DoesNotExist:
+            raise CommandError(f'User "{options["auctioneer"]}" does not exist.')
+        rejected_path = options['rejected'] or (None if path == '-' else f'{path}.rejected.ndjson')
+
+        source = sys.stdin if path == '-' else open(path, encoding='utf-8-sig', newline='')
+        rejected_file = open(rejected_path, 'w', encoding='utf-8') if rejected_path else None
+        try:
+            importer = AuctionImporter(auctioneer, options['chunk_size'], rejected_file)
+            importer.run(READERS[input_format](source))
+        except UnicodeDecodeError:
+            raise CommandError('The input file must be UTF-8.')
+        finally:
+            if source is not sys.stdin:
+                source.close()
+            if rejected_file is not None:
+                rejected_file.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {importer.created} auctions, rejected {importer.rejected} rows in '
+            f'{importer.elapsed:.2f}s ({importer.rows_per_second:,.0f} rows/s).'))
+        if importer.rejected and rejected_path:
+            self.stdout.write(f'Rejected rows written to {rejected_path}.')
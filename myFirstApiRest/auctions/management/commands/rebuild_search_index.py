@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from auctions.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el índice de texto completo de las subastas."
+
+    def handle(self, *args, **options):
+        rebuild_search_index(connection)
+        self.stdout.write(self.style.SUCCESS(f"Search index rebuilt ({connection.vendor})."))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from auctions.ratings import rating_mismatches, recompute_rating_aggregates
+
+
+class Command(BaseCommand):
+    help = 'Comprueba (y con --fix corrige) los agregados de valoraciones de las subastas.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help='Recalcula las subastas descuadradas.')
+        parser.add_argument('--all', action='store_true', help='Recalcula todas las subastas sin comprobar.')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        if options['all']:
+            updated = recompute_rating_aggregates()
+            self.stdout.write(self.style.SUCCESS(f'Recomputed rating aggregates for {updated} auctions.'))
+            return
+
+        mismatched = []
+        for auction_id, stored, expected in rating_mismatches(options['chunk_size']):
+            mismatched.append(auction_id)
+            self.stdout.write(
+                f'Auction {auction_id}: stored sum/count {stored[0]}/{stored[1]}, '
+                f'ratings table {expected[0]}/{expected[1]}')
+
+        if not mismatched:
+            self.stdout.write(self.style.SUCCESS('All rating aggregates are consistent.'))
+            return
+        if not options['fix']:
+            self.stdout.write(self.style.WARNING(f'{len(mismatched)} auctions out of sync (use --fix).'))
+            return
+        for start in range(0, len(mismatched), options['chunk_size']):
+            recompute_rating_aggregates(mismatched[start:start + options['chunk_size']])
+        self.stdout.write(self.style.SUCCESS(f'Fixed {len(mismatched)} auctions.'))
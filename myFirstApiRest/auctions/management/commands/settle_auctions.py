@@ -0,0 +1,86 @@
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from auctions.models import Auction, Bid, Category
+from auctions.settlement import DEFAULT_BATCH_SIZE, settle_all
+from users.models import CustomUser
+
+
+def seed_expired_auctions(count, bids_per_auction, chunk_size=5000):
+    """Crea ``count`` subastas ya vencidas con sus pujas para medir la liquidación."""
+    suffix = f'{int(time.time() * 1000)}-{random.randint(0, 9999)}'
+    category = Category.objects.create(name=f'settle-{suffix}')
+    bidders = CustomUser.objects.bulk_create([
+        CustomUser(username=f'settle-{suffix}-{i}', birth_date=date(1990, 1, 1))
+        for i in range(max(bids_per_auction, 1))
+    ])
+    closing = timezone.now() - timedelta(minutes=1)
+    for start in range(0, count, chunk_size):
+        size = min(chunk_size, count - start)
+        auctions = Auction.objects.bulk_create([
+            Auction(title=f'Settle {start + i}', description='Seeded', price=Decimal('1.00'), stock=1,
+                    brand='seed', category=category, closing_date=closing, auctioneer=bidders[0],
+                    current_price=Decimal(bids_per_auction) if bids_per_auction else None,
+                    bid_count=bids_per_auction)
+            for i in range(size)
+        ])
+        if not auctions[0].pk:
+            # Backends sin RETURNING: se recuperan los ids creados
+            auctions = list(Auction.objects.filter(category=category).order_by('-id')[:size])
+        Bid.objects.bulk_create([
+            Bid(auction=auction, bidder=bidders[n], price=Decimal(n + 1))
+            for auction in auctions for n in range(bids_per_auction)
+        ])
+    return category, f'settle-{suffix}-'
+
+
+def delete_seeded(category, chunk_size=1000):
+    # Por lotes: el borrado en cascada de una sola vez supera el límite de parámetros de SQLite
+    auction_ids = list(Auction.objects.filter(category=category).values_list('id', flat=True))
+    for start in range(0, len(auction_ids), chunk_size):
+        Auction.objects.filter(pk__in=auction_ids[start:start + chunk_size]).delete()
+    category.delete()
+
+
+class Command(BaseCommand):
+    help = 'Liquida por lotes las subastas vencidas: registra la puja ganadora y marca la subasta como cerrada.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true', help='Sigue en ejecución liquidando lo que vaya venciendo.')
+        parser.add_argument('--interval', type=float, default=5.0, help='Segundos de espera sin trabajo (con --loop).')
+        parser.add_argument('--seed', type=int, default=0, help='Crea antes N subastas vencidas para medir el rendimiento.')
+        parser.add_argument('--seed-bids', type=int, default=3, help='Pujas por subasta creada con --seed.')
+        parser.add_argument('--keep', action='store_true', help='No borrar los datos creados con --seed.')
+
+    def handle(self, *args, **options):
+        category = None
+        if options['seed']:
+            start = time.perf_counter()
+            category, username_prefix = seed_expired_auctions(options['seed'], options['seed_bids'])
+            self.stdout.write(f"Seeded {options['seed']} expired auctions in {time.perf_counter() - start:.2f}s")
+
+        try:
+            while True:
+                start = time.perf_counter()
+                settled = settle_all(options['batch_size'])
+                elapsed = time.perf_counter() - start
+                if settled:
+                    self.stdout.write(
+                        f'Settled {settled} auctions in {elapsed:.2f}s ({settled / elapsed:.1f} auctions/s)')
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if category is not None and not options['keep']:
+                delete_seeded(category)
+                CustomUser.objects.filter(username__startswith=username_prefix).delete()
+        if not options['loop']:
+            self.stdout.write(self.style.SUCCESS('No expired auctions left to settle.'))
@@ -0,0 +1,100 @@
+import random
+import threading
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from auctions.bidding import place_bid
+from auctions.models import Auction, Bid, Category
+from users.models import CustomUser
+
+
+def bidder_loop(auction_id, bidder, bids, stats, lock):
+    accepted = rejected = failed = 0
+    try:
+        for _ in range(bids):
+            try:
+                current_price, price = Auction.objects.values_list('current_price', 'price').get(pk=auction_id)
+                amount = (current_price or price) + Decimal(random.randint(1, 5))
+                place_bid(auction_id, bidder, amount)
+                accepted += 1
+            except ValidationError:
+                rejected += 1
+            except OperationalError:
+                # Bloqueo de la base de datos tras agotar los reintentos: la puja no se guarda
+                failed += 1
+    finally:
+        connections.close_all()
+        with lock:
+            stats['accepted'] += accepted
+            stats['rejected'] += rejected
+            stats['failed'] += failed
+
+
+def check_invariants(auction_id, accepted):
+    """Las pujas aceptadas deben ser estrictamente crecientes y cuadrar con la subasta."""
+    auction = Auction.objects.get(pk=auction_id)
+    prices = list(Bid.objects.filter(auction_id=auction_id).order_by('id').values_list('price', flat=True))
+    errors = []
+    if len(prices) != accepted or auction.bid_count != accepted:
+        errors.append(f'{accepted} bids accepted but {len(prices)} stored and bid_count={auction.bid_count}')
+    if any(later <= earlier for earlier, later in zip(prices, prices[1:])):
+        errors.append('stored bids are not strictly increasing')
+    if prices and auction.current_price != prices[-1]:
+        errors.append(f'current_price {auction.current_price} != last bid {prices[-1]}')
+    return errors
+
+
+class Command(BaseCommand):
+    help = 'Lanza pujas concurrentes contra una subasta y comprueba que no se pierde ninguna.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--bids', type=int, default=50, help='Pujas por hilo.')
+        parser.add_argument('--keep', action='store_true', help='No borrar los datos creados.')
+
+    def handle(self, *args, **options):
+        suffix = f'{int(time.time() * 1000)}-{random.randint(0, 9999)}'
+        category = Category.objects.create(name=f'stress-{suffix}')
+        bidders = [
+            CustomUser.objects.create(username=f'stress-{suffix}-{i}', birth_date=date(1990, 1, 1))
+            for i in range(options['threads'])
+        ]
+        auction = Auction.objects.create(
+            title='Stress test', description='Concurrent bids', price=Decimal('1.00'), stock=1,
+            brand='stress', category=category, closing_date=timezone.now() + timedelta(days=1),
+            auctioneer=bidders[0])
+        try:
+            stats = {'accepted': 0, 'rejected': 0, 'failed': 0}
+            lock = threading.Lock()
+            threads = [
+                threading.Thread(target=bidder_loop, args=(auction.id, bidder, options['bids'], stats, lock))
+                for bidder in bidders
+            ]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+
+            attempts = stats['accepted'] + stats['rejected'] + stats['failed']
+            self.stdout.write(
+                f"{attempts} bids in {elapsed:.2f}s with {options['threads']} threads: "
+                f"{stats['accepted']} accepted, {stats['rejected']} rejected, {stats['failed']} lock failures")
+            self.stdout.write(
+                f'{attempts / elapsed:.1f} bids/s attempted, {stats["accepted"] / elapsed:.1f} bids/s accepted')
+            errors = check_invariants(auction.id, stats['accepted'])
+            if errors:
+                raise CommandError('; '.join(errors))
+            self.stdout.write(self.style.SUCCESS('No lost or out-of-order winning bids.'))
+        finally:
+            if not options['keep']:
+                auction.delete()
+                CustomUser.objects.filter(pk__in=[bidder.pk for bidder in bidders]).delete()
+                category.delete()
@@ -0,0 +1,26 @@
+from django.db import migrations
+
+from auctions.search import install_search_index, uninstall_search_index
+
+
+def install(apps, schema_editor):
+    install_search_index(schema_editor.connection)
+    # Indexa las subastas que ya existían
+    if schema_editor.connection.vendor == 'sqlite':
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute("INSERT INTO auctions_auction_fts(auctions_auction_fts) VALUES ('rebuild')")
+
+
+def uninstall(apps, schema_editor):
+    uninstall_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auctions", "0010_alter_rating_auction_alter_rating_user"),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.7 on 2026-10-17 18:49
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    Auction = apps.get_model("auctions", "Auction")
+    Rating = apps.get_model("auctions", "Rating")
+    ratings = Rating.objects.filter(auction=OuterRef("pk")).order_by().values("auction")
+    Auction.objects.update(
+        rating_sum=Coalesce(Subquery(ratings.annotate(total=Sum("value")).values("total")), 0),
+        rating_count=Coalesce(Subquery(ratings.annotate(count=Count("id")).values("count")), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auctions", "0011_auction_search_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="auction",
+            name="rating_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="auction",
+            name="rating_sum",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.7 on 2026-10-17 18:51
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_bid_summary(apps, schema_editor):
+    Auction = apps.get_model("auctions", "Auction")
+    Bid = apps.get_model("auctions", "Bid")
+    bids = Bid.objects.filter(auction=OuterRef("pk")).order_by().values("auction")
+    Auction.objects.update(
+        current_price=Subquery(bids.annotate(best=Max("price")).values("best")),
+        bid_count=Coalesce(Subquery(bids.annotate(count=Count("id")).values("count")), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auctions", "0012_auction_rating_aggregates"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="auction",
+            name="bid_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="auction",
+            name="current_price",
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.RunPython(backfill_bid_summary, migrations.RunPython.noop),
+    ]
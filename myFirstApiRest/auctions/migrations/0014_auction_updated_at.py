@@ -0,0 +1,20 @@
+# Generated by Django 5.1.7 on 2026-10-17 19:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auctions", "0013_auction_bid_summary"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="auction",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.1.7 on 2026-10-17 19:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auctions", "0014_auction_updated_at"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="auction",
+            index=models.Index(fields=["category", "price"], name="auction_category_price_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="auction",
+            index=models.Index(fields=["price"], name="auction_price_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="auction",
+            index=models.Index(condition=models.Q(("rating_count__gt", 0)), fields=["rating"], name="auction_rated_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="auction",
+            index=models.Index(fields=["closing_date"], name="auction_closing_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="bid",
+            index=models.Index(fields=["auction", "-price", "id"], name="bid_auction_price_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="bid",
+            index=models.Index(fields=["bidder", "-price"], name="bid_bidder_price_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(fields=["auction", "-created_at"], name="comment_auction_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(fields=["user", "-updated_at"], name="comment_user_updated_idx"),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.1.7 on 2026-10-17 19:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auctions", "0015_query_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AuctionSettlement",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("final_price", models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ("bid_count", models.PositiveIntegerField(default=0)),
+                ("settled_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "ordering": ("id",),
+            },
+        ),
+        migrations.AddField(
+            model_name="auction",
+            name="is_closed",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name="auction",
+            index=models.Index(condition=models.Q(("is_closed", False)), fields=["closing_date", "id"], name="auction_pending_close_idx"),
+        ),
+        migrations.AddField(
+            model_name="auctionsettlement",
+            name="auction",
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name="settlement", to="auctions.auction"),
+        ),
+        migrations.AddField(
+            model_name="auctionsettlement",
+            name="winner",
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name="won_auctions", to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name="auctionsettlement",
+            name="winning_bid",
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name="+", to="auctions.bid"),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.7 on 2026-10-17 21:30
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auctions", "0016_auction_settlement"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="rating",
+            name="creation_date",
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.7 on 2026-10-17 21:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0017_rating_creation_date'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='bid',
+            name='bid_bidder_price_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='comment',
+            name='comment_user_updated_idx',
+        ),
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['bidder', '-id'], name='bid_bidder_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['user', '-id'], name='comment_user_id_idx'),
+        ),
+    ]
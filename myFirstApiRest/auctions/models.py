@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Q
 from django.core.validators import MinValueValidator, MaxValueValidator
 from users.models import CustomUser
 
@@ -18,17 +19,36 @@ class Auction(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     rating = models.DecimalField(max_digits=3, decimal_places=2, validators=[
             MinValueValidator(0), MaxValueValidator(5)],default=0)
+    # Agregados de Rating que se mantienen de forma incremental (ver ratings.py)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
     stock = models.IntegerField(validators=[MinValueValidator(1)])
     brand = models.CharField(max_length=100)
     category = models.ForeignKey(Category, related_name='auctions', on_delete=models.CASCADE)
     thumbnail = models.URLField(blank=True, null=True)
     creation_date = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     closing_date = models.DateTimeField()
     auctioneer = models.ForeignKey(CustomUser, related_name='auctions', on_delete=models.CASCADE)
+    # Puja más alta y número de pujas, mantenidos por bidding.place_bid
+    current_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    bid_count = models.PositiveIntegerField(default=0)
+    # Lo marca settlement.settle_expired_auctions al registrar el ganador
+    is_closed = models.BooleanField(default=False)
 
 
     class Meta:
         ordering=('id',)
+        indexes = [
+            # Filtros de AuctionListCreate: categoría + rango de precio, solo precio y rating
+            models.Index(fields=['category', 'price'], name='auction_category_price_idx'),
+            models.Index(fields=['price'], name='auction_price_idx'),
+            # Solo las subastas con valoraciones pueden pasar un filtro rating >= x > 0
+            models.Index(fields=['rating'], name='auction_rated_idx', condition=Q(rating_count__gt=0)),
+            models.Index(fields=['closing_date'], name='auction_closing_idx'),
+            # Subastas pendientes de liquidar (el índice no crece con las ya cerradas)
+            models.Index(fields=['closing_date', 'id'], name='auction_pending_close_idx', condition=Q(is_closed=False)),
+        ]
     def __str__(self):
         return self.title
     
@@ -40,14 +60,37 @@ class Bid(models.Model):
     bidder = models.ForeignKey(CustomUser, related_name='bids', on_delete=models.CASCADE)
     class Meta:
         ordering = ('id',)
+        indexes = [
+            # Puja ganadora de una subasta (mayor precio, la primera en empatar)
+            models.Index(fields=['auction', '-price', 'id'], name='bid_auction_price_idx'),
+            # UserBidListView: pujas del usuario, de la última a la primera
+            models.Index(fields=['bidder', '-id'], name='bid_bidder_id_idx'),
+        ]
 
     def __str__(self):
         return f"Puja de {self.bidder} por {self.price}€ en {self.auction.title}"
 
+class AuctionSettlement(models.Model):
+    """Resultado de una subasta cerrada: puja ganadora, precio final y número de pujas."""
+    auction = models.OneToOneField(Auction, related_name='settlement', on_delete=models.CASCADE)
+    winning_bid = models.ForeignKey(Bid, related_name='+', null=True, blank=True, on_delete=models.SET_NULL)
+    winner = models.ForeignKey(CustomUser, related_name='won_auctions', null=True, blank=True, on_delete=models.SET_NULL)
+    final_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    bid_count = models.PositiveIntegerField(default=0)
+    settled_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ('id',)
+
+    def __str__(self):
+        return f"Liquidación de {self.auction_id}: {self.winner_id} por {self.final_price}€"
+
 class Rating(models.Model):
     auction = models.ForeignKey(Auction, related_name="ratings",on_delete=models.CASCADE)
     user = models.ForeignKey(CustomUser,related_name="ratings",on_delete=models.CASCADE)
     value = models.IntegerField(validators=[MinValueValidator(1), MaxValueValidator(5)])
+    # Filtros since/until de la exportación (ver export.py)
+    creation_date = models.DateTimeField(auto_now_add=True)
     class Meta:
         unique_together = ("user","auction")
         ordering = ('id',)
@@ -66,6 +109,11 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['auction', '-created_at'], name='comment_auction_created_idx'),
+            # UserCommentsView: comentarios del usuario, del último al primero
+            models.Index(fields=['user', '-id'], name='comment_user_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.user.username} en {self.auction.title}"
@@ -0,0 +1,95 @@
+from rest_framework.pagination import BasePagination, CursorPagination, PageNumberPagination
+
+
+class OptionalCursorPagination(BasePagination):
+    """
+    Paginación por número de página (la de siempre) o, si el cliente lo pide con
+    ``?pagination=cursor``, paginación por cursor sobre ``cursor_ordering``.
+
+    El modo cursor no lanza ``COUNT(*)`` ni usa ``OFFSET``: cada página filtra a
+    partir de la última posición vista, así que cuesta lo mismo en la página 1
+    que en la 10.000. Los enlaces ``next``/``previous`` ya incluyen el cursor.
+
+    Con ``cursor_by_default`` el cursor es el modo por defecto y la paginación
+    por número se pide con ``?pagination=page`` (o ``?page=``).
+    """
+    cursor_ordering = 'id'
+    cursor_by_default = False
+    mode_query_param = 'pagination'
+
+    def __init__(self):
+        self.page_number_paginator = PageNumberPagination()
+        self.cursor_paginator = CursorPagination()
+        self.cursor_paginator.ordering = self.cursor_ordering
+        self.paginator = self.page_number_paginator
+
+    def use_cursor(self, request):
+        params = request.query_params
+        if params.get(self.mode_query_param) == 'cursor' or self.cursor_paginator.cursor_query_param in params:
+            return True
+        return (self.cursor_by_default and params.get(self.mode_query_param) != 'page'
+                and self.page_number_paginator.page_query_param not in params)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request):
+            self.paginator = self.cursor_paginator
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.page_number_paginator.get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view):
+        parameters = self.page_number_paginator.get_schema_operation_parameters(view)
+        parameters += [
+            {
+                'name': self.mode_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Use "cursor" for keyset pagination (no total count) or "page" for page numbers.',
+                'schema': {'type': 'string', 'enum': ['cursor', 'page']},
+            },
+            *self.cursor_paginator.get_schema_operation_parameters(view),
+        ]
+        return parameters
+
+    @property
+    def display_page_controls(self):
+        return self.paginator.display_page_controls
+
+    def to_html(self):
+        return self.paginator.to_html()
+
+
+class AuctionPagination(OptionalCursorPagination):
+    cursor_ordering = 'id'
+
+
+class BidPagination(OptionalCursorPagination):
+    cursor_ordering = 'id'
+
+
+class CommentPagination(OptionalCursorPagination):
+    cursor_ordering = '-created_at'
+
+
+# Historiales de un usuario: pueden tener decenas de miles de filas. El cursor va sobre una columna
+# única que no cambia (-id): con precio o fecha de edición una fila editada entre dos páginas
+# se saltaría o saldría dos veces
+class UserAuctionPagination(OptionalCursorPagination):
+    cursor_ordering = 'id'
+    cursor_by_default = True
+
+
+class UserBidPagination(OptionalCursorPagination):
+    # Mismo orden que el índice bid_bidder_id_idx
+    cursor_ordering = '-id'
+    cursor_by_default = True
+
+
+class UserCommentPagination(OptionalCursorPagination):
+    # Mismo orden que el índice comment_user_id_idx
+    cursor_ordering = '-id'
+    cursor_by_default = True
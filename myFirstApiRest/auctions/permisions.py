@@ -32,3 +32,13 @@ class IsCommentOwnerOrAdmin(BasePermission):
         if request.method in SAFE_METHODS:
             return True
         return obj.user == request.user or request.user.is_staff
+
+
+class IsRatingOwnerOrAdmin(BasePermission):
+    """
+    Permite editar/eliminar valoraciones solo si el usuario es quien la creó o admin.
+    """
+    def has_object_permission(self, request, view, obj):
+        if request.method in SAFE_METHODS:
+            return True
+        return obj.user == request.user or request.user.is_staff
@@ -0,0 +1,104 @@
+"""
+Publicación/suscripción en proceso para emitir las pujas en directo.
+
+Los suscriptores viven en el bucle de eventos de ASGI y los publicadores suelen
+ser vistas síncronas que corren en otro hilo, así que ``publish`` agrupa a los
+suscriptores por bucle y hace un único ``call_soon_threadsafe`` por bucle: mil
+clientes viendo la misma subasta cuestan una difusión en memoria, no mil
+consultas a la base de datos.
+
+El backend se elige con ``AUCTIONS_PUBSUB_BACKEND`` (ruta a una clase con
+``subscribe(channel)`` y ``publish(channel, message)``), lo que permite cambiarlo
+por uno con broker externo cuando haya varios procesos.
+"""
+import asyncio
+import threading
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+DEFAULT_BACKEND = 'auctions.pubsub.InMemoryBroker'
+
+
+class Subscription:
+    """Cola de mensajes de un suscriptor. Si se llena se descartan los más antiguos."""
+
+    def __init__(self, broker, channel, loop, max_size):
+        self.broker = broker
+        self.channel = channel
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=max_size)
+
+    def push(self, message):
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.get()
+
+
+class InMemoryBroker:
+    def __init__(self, max_queue_size=100):
+        self.max_queue_size = max_queue_size
+        self._lock = threading.Lock()
+        # canal -> bucle de eventos -> suscripciones
+        self._channels = defaultdict(lambda: defaultdict(set))
+
+    def subscribe(self, channel):
+        """Debe llamarse desde el bucle de eventos que va a consumir los mensajes."""
+        subscription = Subscription(self, channel, asyncio.get_running_loop(), self.max_queue_size)
+        with self._lock:
+            self._channels[channel][subscription.loop].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            loops = self._channels.get(subscription.channel)
+            if loops is None:
+                return
+            subscriptions = loops.get(subscription.loop, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                loops.pop(subscription.loop, None)
+            if not loops:
+                del self._channels[subscription.channel]
+
+    def publish(self, channel, message):
+        """Envía ``message`` a todos los suscriptores del canal. Se puede llamar desde cualquier hilo."""
+        with self._lock:
+            targets = [(loop, tuple(subscriptions)) for loop, subscriptions in self._channels.get(channel, {}).items()]
+        for loop, subscriptions in targets:
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(_deliver, subscriptions, message)
+        return sum(len(subscriptions) for _, subscriptions in targets)
+
+    def subscriber_count(self, channel):
+        with self._lock:
+            return sum(len(subscriptions) for subscriptions in self._channels.get(channel, {}).values())
+
+
+def _deliver(subscriptions, message):
+    for subscription in subscriptions:
+        subscription.push(message)
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    backend = getattr(settings, 'AUCTIONS_PUBSUB_BACKEND', DEFAULT_BACKEND)
+    return import_string(backend)()
+
+
+def bid_channel(auction_id):
+    return f'auction:{auction_id}:bids'
@@ -0,0 +1,124 @@
+"""
+Media de valoraciones de cada subasta mantenida de forma incremental.
+
+Cada subasta guarda ``rating_sum`` y ``rating_count`` y se actualizan con un
+único ``UPDATE`` usando expresiones F(), de forma que crear, modificar o borrar
+una valoración cuesta lo mismo tenga la subasta 3 o 30.000 valoraciones y dos
+peticiones concurrentes no se pisan (la base de datos serializa el UPDATE).
+"""
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import (
+    Case, Count, DecimalField, F, FloatField, IntegerField, OuterRef, Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Cast, Coalesce, Round
+from django.db.models.lookups import GreaterThan
+from django.utils import timezone
+
+from .cache import bump_version
+from .models import Auction, Rating
+
+
+def rating_mean(total, count):
+    """Expresión SQL con la media redondeada a 2 decimales (0 si no hay valoraciones)."""
+    mean = Cast(Cast(total, FloatField()) / count, DecimalField(max_digits=6, decimal_places=4))
+    return Case(
+        When(GreaterThan(count, 0), then=Round(mean, 2)),
+        default=Value(Decimal('0')),
+        output_field=DecimalField(max_digits=3, decimal_places=2),
+    )
+
+
+def apply_rating_delta(auction_id, value_delta, count_delta):
+    """Suma ``value_delta`` y ``count_delta`` al agregado de la subasta en un solo UPDATE."""
+    total = F('rating_sum') + value_delta
+    count = F('rating_count') + count_delta
+    Auction.objects.filter(pk=auction_id).update(
+        rating_sum=total, rating_count=count, rating=rating_mean(total, count), updated_at=timezone.now())
+
+
+def apply_rating_deltas(deltas):
+    """
+    :func:`apply_rating_delta` para varias subastas en un solo UPDATE;
+    ``deltas`` es ``{auction_id: (value_delta, count_delta)}``.
+    """
+    deltas = {auction_id: delta for auction_id, delta in deltas.items() if any(delta)}
+    if not deltas:
+        return
+
+    def by_auction(position):
+        return Case(*(When(pk=auction_id, then=Value(delta[position])) for auction_id, delta in deltas.items()),
+                    default=Value(0), output_field=IntegerField())
+
+    total = F('rating_sum') + by_auction(0)
+    count = F('rating_count') + by_auction(1)
+    Auction.objects.filter(pk__in=deltas).update(
+        rating_sum=total, rating_count=count, rating=rating_mean(total, count), updated_at=timezone.now())
+
+
+def rate_auction(user, auction_id, value):
+    """Crea o actualiza la valoración de ``user`` y ajusta el agregado."""
+    with transaction.atomic():
+        rating = Rating.objects.select_for_update().filter(user=user, auction_id=auction_id).first()
+        if rating is None:
+            try:
+                with transaction.atomic():
+                    rating = Rating.objects.create(user=user, auction_id=auction_id, value=value)
+            except IntegrityError:
+                # Otra petición del mismo usuario la ha creado a la vez
+                rating = Rating.objects.select_for_update().get(user=user, auction_id=auction_id)
+            else:
+                apply_rating_delta(auction_id, value, 1)
+                return rating
+        change_rating(rating, value)
+    return rating
+
+
+def change_rating(rating, value):
+    """Cambia el valor de una valoración existente ajustando el agregado por la diferencia."""
+    with transaction.atomic():
+        old_value = Rating.objects.select_for_update().values_list('value', flat=True).get(pk=rating.pk)
+        rating.value = value
+        rating.save(update_fields=['value'])
+        if value != old_value:
+            apply_rating_delta(rating.auction_id, value - old_value, 0)
+    return rating
+
+
+def remove_rating(rating):
+    with transaction.atomic():
+        value = Rating.objects.select_for_update().filter(pk=rating.pk).values_list('value', flat=True).first()
+        deleted, _ = Rating.objects.filter(pk=rating.pk).delete()
+        if deleted:
+            apply_rating_delta(rating.auction_id, -value, -1)
+
+
+def recompute_rating_aggregates(auction_ids=None):
+    """
+    Recalcula suma, número y media desde la tabla ``Rating`` con un único UPDATE.
+    Si no se indican subastas se recalculan todas.
+    """
+    ratings = Rating.objects.filter(auction=OuterRef('pk')).order_by().values('auction')
+    total = Coalesce(Subquery(ratings.annotate(total=Sum('value')).values('total')), 0)
+    count = Coalesce(Subquery(ratings.annotate(count=Count('id')).values('count')), 0)
+    auctions = Auction.objects.all()
+    if auction_ids is not None:
+        auctions = auctions.filter(pk__in=auction_ids)
+    updated = auctions.update(
+        rating_sum=total, rating_count=count, rating=rating_mean(total, count), updated_at=timezone.now())
+    bump_version(Auction._meta.label)
+    return updated
+
+
+def rating_mismatches(chunk_size=2000):
+    """Genera ``(auction_id, (sum, count) guardado, (sum, count) real)`` para las subastas descuadradas."""
+    actual = {
+        row['auction']: (row['total'], row['count'])
+        for row in Rating.objects.order_by().values('auction').annotate(total=Sum('value'), count=Count('id'))
+    }
+    stored_rows = Auction.objects.order_by().values_list('id', 'rating_sum', 'rating_count')
+    for auction_id, rating_sum, rating_count in stored_rows.iterator(chunk_size=chunk_size):
+        expected = actual.get(auction_id, (0, 0))
+        if (rating_sum, rating_count) != expected:
+            yield auction_id, (rating_sum, rating_count), expected
@@ -0,0 +1,121 @@
+"""
+Búsqueda de texto completo sobre el título y la descripción de las subastas.
+
+En PostgreSQL se usa una columna ``tsvector`` generada con un índice GIN y en
+SQLite una tabla virtual FTS5 sincronizada mediante triggers. En ambos casos el
+índice se mantiene en la propia base de datos, así que también cubre
+``bulk_create`` y ``update()``.
+"""
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+TABLE = 'auctions_auction'
+FTS_TABLE = 'auctions_auction_fts'
+GIN_INDEX = 'auctions_auction_search_gin'
+
+# El título pesa más que la descripción al ordenar por relevancia
+TITLE_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+SQLITE_INSTALL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, description, content='{TABLE}', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2')""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, description ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+]
+
+SQLITE_UNINSTALL = [
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ai',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_au',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+POSTGRES_INSTALL = [
+    f"""ALTER TABLE {TABLE} ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'B')) STORED""",
+    f'CREATE INDEX IF NOT EXISTS {GIN_INDEX} ON {TABLE} USING gin (search_vector)',
+]
+
+POSTGRES_UNINSTALL = [
+    f'DROP INDEX IF EXISTS {GIN_INDEX}',
+    f'ALTER TABLE {TABLE} DROP COLUMN IF EXISTS search_vector',
+]
+
+
+def _statements(vendor, install=True):
+    if vendor == 'sqlite':
+        return SQLITE_INSTALL if install else SQLITE_UNINSTALL
+    if vendor == 'postgresql':
+        return POSTGRES_INSTALL if install else POSTGRES_UNINSTALL
+    return []
+
+
+def install_search_index(schema_connection=connection):
+    """Crea el índice si no existe. Es idempotente."""
+    with schema_connection.cursor() as cursor:
+        for sql in _statements(schema_connection.vendor):
+            cursor.execute(sql)
+
+
+def uninstall_search_index(schema_connection=connection):
+    with schema_connection.cursor() as cursor:
+        for sql in _statements(schema_connection.vendor, install=False):
+            cursor.execute(sql)
+
+
+def rebuild_search_index(schema_connection=connection):
+    """Reconstruye el índice completo a partir de la tabla de subastas."""
+    install_search_index(schema_connection)
+    with schema_connection.cursor() as cursor:
+        if schema_connection.vendor == 'sqlite':
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        elif schema_connection.vendor == 'postgresql':
+            cursor.execute(f'REINDEX INDEX {GIN_INDEX}')
+
+
+def search_terms(search):
+    return re.findall(r'\w+', search)
+
+
+def search_auctions(queryset, search):
+    """
+    Filtra ``queryset`` por las subastas que contienen todos los términos de
+    ``search`` (como prefijo) y las ordena por relevancia.
+    """
+    terms = search_terms(search)
+    if not terms:
+        return queryset.none()
+    vendor = connection.vendor
+
+    if vendor == 'sqlite':
+        match = ' '.join(f'"{term}"*' for term in terms)
+        rank = RawSQL(
+            f'SELECT -bm25({FTS_TABLE}, {TITLE_WEIGHT}, {DESCRIPTION_WEIGHT}) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = {TABLE}.id', (match,), output_field=FloatField())
+        matches = RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', (match,))
+        queryset = queryset.filter(id__in=matches)
+    elif vendor == 'postgresql':
+        query = ' & '.join(f'{term}:*' for term in terms)
+        rank = RawSQL(f"ts_rank({TABLE}.search_vector, to_tsquery('simple', %s))", (query,),
+                      output_field=FloatField())
+        matches = RawSQL(f"{TABLE}.search_vector @@ to_tsquery('simple', %s)", (query,),
+                         output_field=BooleanField())
+        queryset = queryset.filter(matches)
+    else:
+        return queryset.filter(Q(title__icontains=search) | Q(description__icontains=search))
+
+    return queryset.annotate(search_rank=rank).order_by('-search_rank', 'id')
@@ -1,22 +1,30 @@
 from rest_framework import serializers
 from .models import Category, Auction, Bid, Rating, Comment
 from drf_spectacular.utils import extend_schema_field
+from myFirstApiRest.metrics import TimedSerializerMixin
 from django.utils import timezone
 from datetime import timedelta
 
 
+def get_is_open(obj):
+    # Las vistas de listado anotan is_open en la consulta (ver annotate_is_open)
+    is_open = getattr(obj, 'is_open', None)
+    if is_open is None:
+        return obj.closing_date > timezone.now()
+    return is_open
+
 
-class CategoryListCreateSerializer(serializers.ModelSerializer):
+class CategoryListCreateSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = ['id','name']
 
-class CategoryDetailSerializer(serializers.ModelSerializer):
+class CategoryDetailSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = '__all__'
 
-class AuctionListCreateSerializer(serializers.ModelSerializer):
+class AuctionListCreateSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     creation_date = serializers.DateTimeField(format="%Y-%m-%dT%H:%M:%SZ", read_only=True)
     closing_date = serializers.DateTimeField(input_formats=["%Y-%m-%dT%H:%M"])
     isOpen = serializers.SerializerMethodField(read_only=True)
@@ -30,12 +38,13 @@ class AuctionListCreateSerializer(serializers.ModelSerializer):
         fields = [
         'id', 'title', 'description', 'creation_date', 'closing_date',
         'thumbnail', 'price', 'stock', 'brand', 'category',
-        'isOpen', 'auctioneer_username', 'category_name','rating'
+        'isOpen', 'auctioneer_username', 'category_name','rating',
+        'current_price', 'bid_count'
         ]
-        read_only_fields = ['rating']
+        read_only_fields = ['rating', 'current_price', 'bid_count']
     @extend_schema_field(serializers.BooleanField()) 
     def get_isOpen(self, obj):
-        return obj.closing_date > timezone.now()
+        return get_is_open(obj)
     def validate_closing_date(self, value):
         if value <= timezone.now():
             raise serializers.ValidationError("Closing date must be greater than now.")
@@ -49,7 +58,7 @@ class AuctionListCreateSerializer(serializers.ModelSerializer):
 
 
 
-class AuctionDetailSerializer(serializers.ModelSerializer):
+class AuctionDetailSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     creation_date = serializers.DateTimeField(format="%Y-%m-%dT%H:%M:%SZ", read_only=True)
     closing_date = serializers.DateTimeField(format="%Y-%m-%dT%H:%M:%SZ")
     isOpen = serializers.SerializerMethodField(read_only=True)
@@ -58,9 +67,10 @@ class AuctionDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = Auction
         fields = '__all__'
+        read_only_fields = ['rating', 'rating_sum', 'rating_count', 'current_price', 'bid_count', 'is_closed']
     @extend_schema_field(serializers.BooleanField()) 
     def get_isOpen(self, obj):
-        return obj.closing_date > timezone.now()
+        return get_is_open(obj)
     def validate_closing_date(self, value):
         if value <= timezone.now():
             raise serializers.ValidationError("Closing date must be greater than now.")
@@ -71,7 +81,7 @@ class AuctionDetailSerializer(serializers.ModelSerializer):
         
         return value
     
-class BidListCreateSerializer(serializers.ModelSerializer):
+class BidListCreateSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     creation_date = serializers.DateTimeField(format="%Y-%m-%dT%H:%M:%SZ", read_only=True)
     bidder_username = serializers.CharField(source='bidder.username', read_only=True)
 
@@ -80,7 +90,7 @@ class BidListCreateSerializer(serializers.ModelSerializer):
         fields = ['id', 'auction', 'price', 'creation_date', 'bidder','bidder_username']
         read_only_fields = ['auction','bidder']
 
-class BidDetailSerializer(serializers.ModelSerializer):
+class BidDetailSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     creation_date = serializers.DateTimeField(format="%Y-%m-%dT%H:%M:%SZ", read_only=True)
     bidder_username = serializers.CharField(source='bidder.username', read_only=True)
 
@@ -89,7 +99,7 @@ class BidDetailSerializer(serializers.ModelSerializer):
         fields = ['id', 'auction', 'price', 'creation_date', 'bidder','bidder_username']
         read_only_fields = ['auction','bidder']
 
-class RatingListCreateSerializer(serializers.ModelSerializer):
+class RatingListCreateSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     user_username = serializers.CharField(source='user.username', read_only=True)
 
     class Meta:
@@ -98,7 +108,7 @@ class RatingListCreateSerializer(serializers.ModelSerializer):
         read_only_fields = ['user','auction']
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     user_username = serializers.CharField(source='user.username', read_only=True)
     auction_id = serializers.IntegerField(read_only=True)
     auction_title = serializers.CharField(source='auction.title', read_only=True)
@@ -114,3 +124,45 @@ class CommentSerializer(serializers.ModelSerializer):
             'auction_title', 'auction_price', 'auction_category', 'auction_closing_date'
         ]
         read_only_fields = ['user', 'auction', 'created_at', 'updated_at']
+
+
+# Elementos de los endpoints de carga masiva (ver bulk.py). ``user`` solo lo pueden indicar los administradores.
+class BulkBidSerializer(serializers.Serializer):
+    auction = serializers.IntegerField()
+    price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    user = serializers.IntegerField(required=False)
+
+
+class BulkCommentSerializer(serializers.Serializer):
+    auction = serializers.IntegerField()
+    title = serializers.CharField(max_length=100)
+    content = serializers.CharField()
+    user = serializers.IntegerField(required=False)
+
+
+class BulkRatingSerializer(serializers.Serializer):
+    auction = serializers.IntegerField()
+    value = serializers.IntegerField(min_value=1, max_value=5)
+    user = serializers.IntegerField(required=False)
+
+
+class CategoryLookupField(serializers.Field):
+    """Categoría por id o por nombre, resuelta con el mapa ``categories`` del contexto sin consultar la base de datos."""
+    default_error_messages = {'does_not_exist': 'Category "{value}" does not exist.'}
+
+    def to_internal_value(self, data):
+        category = self.context['categories'].get(str(data).strip().lower())
+        if category is None:
+            self.fail('does_not_exist', value=data)
+        return category
+
+    def to_representation(self, value):
+        return value.pk
+
+
+class AuctionImportSerializer(AuctionListCreateSerializer):
+    """Filas de la importación masiva (ver importer.py): mismas reglas que ``AuctionListCreateSerializer``."""
+    category = CategoryLookupField()
+
+    class Meta(AuctionListCreateSerializer.Meta):
+        fields = ['title', 'description', 'closing_date', 'thumbnail', 'price', 'stock', 'brand', 'category']
@@ -0,0 +1,68 @@
+"""
+Liquidación de las subastas vencidas.
+
+Cada lote se procesa en una transacción: se reservan hasta ``batch_size``
+subastas vencidas y sin cerrar con ``SELECT ... FOR UPDATE SKIP LOCKED`` (varios
+workers se reparten las filas sin esperarse), se calcula la puja ganadora de
+todas ellas en una sola consulta con subconsultas correlacionadas sobre el
+índice ``bid_auction_price_idx`` y se guardan las liquidaciones con un único
+``INSERT``. Repetir un lote no tiene efecto: ``AuctionSettlement.auction`` es
+único y solo se cierran las subastas que siguen abiertas.
+"""
+from django.db import connection, transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .cache import bump_version
+from .models import Auction, AuctionSettlement, Bid
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def expired_auctions(now):
+    return Auction.objects.filter(is_closed=False, closing_date__lte=now)
+
+
+def settle_expired_auctions(batch_size=DEFAULT_BATCH_SIZE, now=None):
+    """Liquida un lote de subastas vencidas y devuelve cuántas se han cerrado."""
+    now = now or timezone.now()
+    with transaction.atomic():
+        pending = expired_auctions(now).order_by('closing_date', 'id')
+        if connection.features.has_select_for_update_skip_locked:
+            pending = pending.select_for_update(skip_locked=True)
+        auction_ids = list(pending.values_list('id', flat=True)[:batch_size])
+        if not auction_ids:
+            return 0
+
+        # Mayor importe y, si empatan, la puja más antigua
+        best = Bid.objects.filter(auction=OuterRef('pk')).order_by('-price', 'id')
+        bids = Bid.objects.filter(auction=OuterRef('pk')).order_by().values('auction')
+        results = Auction.objects.filter(pk__in=auction_ids).order_by().annotate(
+            winning_bid=Subquery(best.values('id')[:1]),
+            winner=Subquery(best.values('bidder')[:1]),
+            final_price=Subquery(best.values('price')[:1]),
+            total=Coalesce(Subquery(bids.annotate(count=Count('id')).values('count')), 0),
+        ).values_list('id', 'winning_bid', 'winner', 'final_price', 'total')
+        AuctionSettlement.objects.bulk_create([
+            AuctionSettlement(
+                auction_id=auction_id, winning_bid_id=winning_bid, winner_id=winner,
+                final_price=final_price, bid_count=total)
+            for auction_id, winning_bid, winner, final_price, total in results
+        ], ignore_conflicts=True)
+        closed = Auction.objects.filter(pk__in=auction_ids, is_closed=False).update(is_closed=True, updated_at=now)
+    if closed:
+        # update() no emite señales
+        bump_version(Auction._meta.label)
+    return closed
+
+
+def settle_all(batch_size=DEFAULT_BATCH_SIZE, now=None):
+    """Procesa lotes hasta que no quedan subastas vencidas. Devuelve el total cerrado."""
+    now = now or timezone.now()
+    total = 0
+    while True:
+        closed = settle_expired_auctions(batch_size, now)
+        if not closed:
+            return total
+        total += closed
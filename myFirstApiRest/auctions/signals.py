@@ -0,0 +1,16 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+
+from .cache import bump_version
+from .models import Category, Auction, Bid, Rating, Comment
+
+
+def bump_model_version(sender, **kwargs):
+    bump_version(sender._meta.label)
+
+
+def connect_signals():
+    # Cualquier escritura invalida las respuestas cacheadas que dependen del modelo
+    for model in (Category, Auction, Bid, Rating, Comment, get_user_model()):
+        post_save.connect(bump_model_version, sender=model, dispatch_uid=f'cache-version-save-{model._meta.label}')
+        post_delete.connect(bump_model_version, sender=model, dispatch_uid=f'cache-version-delete-{model._meta.label}')
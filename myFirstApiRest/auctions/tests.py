@@ -1,3 +1,1622 @@
-from django.test import TestCase
+import asyncio
+import csv
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+from django.utils.translation import gettext_lazy
+from django.db import connection
+from django.test import AsyncClient, AsyncRequestFactory, RequestFactory, SimpleTestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+from asgiref.sync import async_to_sync, iscoroutinefunction
+
+from myFirstApiRest.database import database_config
+from myFirstApiRest.fastjson import FastJSONParser, FastJSONRenderer
+from myFirstApiRest.metrics import Histogram, registry
+from myFirstApiRest.queryinspector import QueryInspectionError, QueryInspector, fingerprint
+from users.models import CustomUser
+from users.tokens import RefreshToken
+from .models import Category, Auction, AuctionSettlement, Bid, Rating, Comment
+from .ratings import apply_rating_delta, recompute_rating_aggregates
+from .bidding import refresh_bid_summary
+from .management.commands.bench_json import build_auctions
+from .serializers import (
+    AuctionListCreateSerializer, BidDetailSerializer, BidListCreateSerializer, CommentSerializer,
+)
+from .fast_serializers import (
+    FastSerializer, AuctionListFastSerializer, BidDetailFastSerializer, BidListFastSerializer, CommentFastSerializer,
+)
+from .cache import get_versions
+from .benchmark import BenchmarkContext, compare, percentile, run_benchmark
+from .concurrency import MODES, run_concurrency
+from .connection_bench import connection_mode, run_connections
+from .datagen import generate
+from .export import astream_export, stream_export
+from .settlement import settle_all, settle_expired_auctions
+from .pubsub import InMemoryBroker, bid_channel, get_broker
+from .async_views import AsyncReadMixin, read_view
+from .views import (
+    AuctionListCreate, AuctionRetrieveUpdateDestroy, BidListCreate, CategoryListCreate, CommentListCreateView,
+    RatingListCreate, annotate_is_open,
+)
+
+
+def create_user(username, **extra):
+    return CustomUser.objects.create_user(
+        username=username, password='Secreta.123', email=f'{username}@example.com',
+        birth_date=date(1990, 1, 1), **extra)
+
+
+def throttle_rates(**rates):
+    """REST_FRAMEWORK con las tasas de los cubos de fichas cambiadas (para override_settings)."""
+    return {**settings.REST_FRAMEWORK,
+            'DEFAULT_THROTTLE_RATES': {**settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], **rates}}
+
+
+class AuctionDataMixin:
+    """Crea varias subastas, pujas, valoraciones y comentarios con usuarios distintos."""
+    rows = 6
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = create_user('owner')
+        cls.users = [create_user(f'user{i}') for i in range(cls.rows)]
+        cls.categories = [Category.objects.create(name=f'Categoria {i}') for i in range(cls.rows)]
+        closing = timezone.now() + timedelta(days=30)
+        cls.auctions = [
+            Auction.objects.create(
+                title=f'Subasta {i}', description='Descripcion', price=Decimal('10.00') + i,
+                stock=1, brand='Marca', category=cls.categories[i], closing_date=closing,
+                auctioneer=cls.users[i])
+            for i in range(cls.rows)
+        ]
+        cls.auction = cls.auctions[0]
+        for i, user in enumerate(cls.users):
+            Auction.objects.create(
+                title=f'Propia {i}', description='Descripcion', price=Decimal('5.00'), stock=1,
+                brand='Marca', category=cls.categories[i], closing_date=closing, auctioneer=cls.owner)
+            Bid.objects.create(auction=cls.auction, price=Decimal('20.00') + i, bidder=user)
+            Bid.objects.create(auction=cls.auctions[i], price=Decimal('30.00'), bidder=cls.owner)
+            Rating.objects.create(auction=cls.auction, user=user, value=1 + i % 5)
+            Comment.objects.create(title=f'Comentario {i}', content='Texto', user=user, auction=cls.auction)
+            Comment.objects.create(title=f'Mio {i}', content='Texto', user=cls.owner, auction=cls.auctions[i])
+        recompute_rating_aggregates()
+        refresh_bid_summary(Auction.objects.values('id'))
+
+
+class QueryCountTests(AuctionDataMixin, APITestCase):
+    """Cada endpoint debe resolver sus relaciones en un número fijo de consultas."""
+
+    def assertQueries(self, num, url):
+        with self.assertNumQueries(num):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_category_list(self):
+        self.assertQueries(2, reverse('auctions:category-list-create'))
+
+    # Las vistas de subastas cacheadas hacen una consulta más al fallar la caché
+    # (el próximo cierre, que marca la caducidad de la respuesta) y las que
+    # responden a peticiones condicionales otra para calcular ETag/Last-Modified
+    def test_auction_list(self):
+        self.assertQueries(3, reverse('auctions:auction-list-create'))
+
+    def test_auction_list_filtered_by_category(self):
+        url = reverse('auctions:auction-list-create')
+        self.assertQueries(4, f'{url}?category={self.categories[0].id}&price_min=1&price_max=100')
+
+    def test_auction_detail(self):
+        self.assertQueries(3, reverse('auctions:auction-detail', args=[self.auction.id]))
+
+    def test_bid_list(self):
+        self.assertQueries(3, reverse('auctions:bid-list-create', args=[self.auction.id]))
+
+    def test_bid_detail(self):
+        bid = self.auction.bids.first()
+        self.assertQueries(1, reverse('auctions:bid-detail', args=[self.auction.id, bid.id]))
+
+    def test_comment_list(self):
+        self.assertQueries(3, reverse('auctions:comment-list-create', args=[self.auction.id]))
+
+    def test_comment_detail(self):
+        comment = self.auction.comments.first()
+        self.assertQueries(1, reverse('auctions:comment-detail', args=[self.auction.id, comment.id]))
+
+    def test_rating_list(self):
+        self.assertQueries(2, reverse('auctions:auction-rating', args=[self.auction.id]))
+
+    def test_user_auctions(self):
+        self.client.force_authenticate(self.owner)
+        response = self.assertQueries(1, reverse('auctions:user-auctions'))
+        self.assertEqual(len(response.data['results']), 5)
+
+    def test_user_comments(self):
+        self.client.force_authenticate(self.owner)
+        response = self.assertQueries(1, reverse('auctions:user-comments'))
+        self.assertEqual(len(response.data['results']), 5)
+
+    def test_user_rating(self):
+        self.client.force_authenticate(self.users[0])
+        self.assertQueries(1, reverse('auctions:user-rating', args=[self.auction.id]))
+
+
+class AuctionClosingFilterTests(AuctionDataMixin, APITestCase):
+    """Filtros open / closing_before / closing_after e isOpen calculado en la consulta."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.closed = cls.auctions[1]
+        Auction.objects.filter(pk=cls.closed.pk).update(closing_date=timezone.now() - timedelta(days=1))
+
+    def list_ids(self, **params):
+        rows, url = {}, reverse('auctions:auction-list-create')
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            rows.update((row['id'], row['isOpen']) for row in response.data['results'])
+            url, params = response.data['next'], {}
+        return rows
+
+    def test_open_filter(self):
+        opened = self.list_ids(open='true')
+        self.assertNotIn(self.closed.id, opened)
+        self.assertTrue(all(opened.values()))
+        self.assertEqual(self.list_ids(open='false'), {self.closed.id: False})
+
+    def test_closing_range(self):
+        now = timezone.now()
+        before = self.list_ids(closing_before=now.isoformat())
+        self.assertEqual(set(before), {self.closed.id})
+        after = self.list_ids(closing_after=(now + timedelta(days=1)).date().isoformat())
+        self.assertEqual(len(after), Auction.objects.count() - 1)
+
+    def test_is_open_is_annotated(self):
+        self.assertEqual(self.list_ids()[self.closed.id], False)
+        cache.clear()
+        with mock.patch('auctions.serializers.timezone') as serializer_timezone:
+            self.list_ids()
+        serializer_timezone.now.assert_not_called()
+
+    def test_invalid_params(self):
+        url = reverse('auctions:auction-list-create')
+        self.assertEqual(self.client.get(url, {'open': 'yes'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'closing_before': 'mañana'}).status_code, 400)
+        response = self.client.get(url, {'closing_before': '2020-01-01', 'closing_after': '2021-01-01'})
+        self.assertEqual(response.status_code, 400)
+
+
+class AuctionSearchTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('seller')
+        cls.category = Category.objects.create(name='Relojes')
+        cls.closing = timezone.now() + timedelta(days=30)
+
+    def create_auction(self, title, description):
+        return Auction.objects.create(
+            title=title, description=description, price=Decimal('10.00'), stock=1, brand='Marca',
+            category=self.category, closing_date=self.closing, auctioneer=self.user)
+
+    def search(self, text):
+        response = self.client.get(reverse('auctions:auction-list-create'), {'search': text})
+        self.assertEqual(response.status_code, 200)
+        return [item['id'] for item in response.data['results']]
+
+    def test_title_matches_rank_first(self):
+        in_description = self.create_auction('Reloj antiguo', 'Un cronógrafo suizo de bolsillo')
+        in_title = self.create_auction('Cronógrafo suizo', 'Muy buen estado')
+        self.create_auction('Lámpara', 'Sin relación')
+        self.assertEqual(self.search('cronografo'), [in_title.id, in_description.id])
+
+    def test_prefix_and_all_terms(self):
+        auction = self.create_auction('Bicicleta de carretera', 'Cuadro de carbono')
+        self.create_auction('Bicicleta de paseo', 'Cuadro de acero')
+        self.assertEqual(self.search('bici carb'), [auction.id])
+
+    def test_index_follows_updates_and_deletes(self):
+        auction = self.create_auction('Guitarra', 'Eléctrica')
+        self.assertEqual(self.search('guitarra'), [auction.id])
+        auction.title = 'Violín'
+        with self.captureOnCommitCallbacks(execute=True):
+            auction.save()
+        self.assertEqual(self.search('guitarra'), [])
+        self.assertEqual(self.search('violin'), [auction.id])
+        Auction.objects.filter(pk=auction.pk).update(description='Acústico')
+        self.assertEqual(self.search('acustico'), [auction.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            auction.delete()
+        self.assertEqual(self.search('violin'), [])
+
+    def test_short_search_rejected(self):
+        response = self.client.get(reverse('auctions:auction-list-create'), {'search': 'ab'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_rebuild_command(self):
+        auction = self.create_auction('Tocadiscos', 'Vintage')
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.search('tocadiscos'), [auction.id])
+
+
+class CursorPaginationTests(AuctionDataMixin, APITestCase):
+
+    def walk(self, url, queries=1):
+        """Recorre todas las páginas siguiendo ``next`` y devuelve los ids."""
+        ids = []
+        url = f'{url}?pagination=cursor'
+        while url:
+            with self.assertNumQueries(queries):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            ids += [item['id'] for item in response.data['results']]
+            url = response.data['next']
+        return ids
+
+    def test_auctions_by_id(self):
+        # +1 por la caducidad de la caché de respuestas
+        ids = self.walk(reverse('auctions:auction-list-create'), queries=2)
+        self.assertEqual(ids, list(Auction.objects.order_by('id').values_list('id', flat=True)))
+
+    def test_bids_by_id(self):
+        # +1 por los validadores de la petición condicional
+        ids = self.walk(reverse('auctions:bid-list-create', args=[self.auction.id]), queries=2)
+        self.assertEqual(ids, list(self.auction.bids.order_by('id').values_list('id', flat=True)))
+
+    def test_comments_newest_first(self):
+        ids = self.walk(reverse('auctions:comment-list-create', args=[self.auction.id]), queries=2)
+        expected = self.auction.comments.order_by('-created_at').values_list('id', flat=True)
+        self.assertEqual(ids, list(expected))
+
+    def test_page_number_is_default(self):
+        response = self.client.get(reverse('auctions:auction-list-create'), {'page': 2})
+        self.assertEqual(response.data['count'], Auction.objects.count())
+
+
+class RatingAggregateTests(AuctionDataMixin, APITestCase):
+
+    def assertAggregate(self, auction, total, count, mean):
+        auction.refresh_from_db()
+        self.assertEqual((auction.rating_sum, auction.rating_count), (total, count))
+        self.assertEqual(auction.rating, Decimal(mean))
+
+    def test_fixture_is_consistent(self):
+        # Valores 1, 2, 3, 4, 5, 1
+        self.assertAggregate(self.auction, 16, 6, '2.67')
+        self.assertEqual(list(Auction.objects.filter(rating_count__gt=0)), [self.auction])
+
+    def test_create_update_and_delete(self):
+        auction = self.auctions[1]
+        url = reverse('auctions:auction-rating', args=[auction.id])
+        self.client.force_authenticate(self.users[0])
+        response = self.client.post(url, {'value': 4})
+        self.assertEqual(response.status_code, 201)
+        self.assertAggregate(auction, 4, 1, '4.00')
+
+        # Volver a valorar sustituye la valoración anterior
+        self.client.post(url, {'value': 5})
+        self.assertAggregate(auction, 5, 1, '5.00')
+
+        self.client.force_authenticate(self.users[1])
+        self.client.post(url, {'value': 2})
+        self.assertAggregate(auction, 7, 2, '3.50')
+
+        rating = Rating.objects.get(auction=auction, user=self.users[1])
+        detail = reverse('auctions:rating-detail', args=[auction.id, rating.id])
+        self.client.force_authenticate(self.owner)
+        self.owner.is_staff = True
+        self.client.patch(detail, {'value': 3})
+        self.assertAggregate(auction, 8, 2, '4.00')
+
+        self.client.delete(detail)
+        self.assertAggregate(auction, 5, 1, '5.00')
+        self.client.delete(reverse('auctions:rating-detail', args=[auction.id, auction.ratings.get().id]))
+        self.assertAggregate(auction, 0, 0, '0')
+
+    def test_reconcile_command(self):
+        Auction.objects.filter(pk=self.auction.pk).update(rating_sum=1, rating_count=1, rating=1)
+        out = StringIO()
+        call_command('reconcile_ratings', stdout=out)
+        self.assertIn(f'Auction {self.auction.id}', out.getvalue())
+        self.assertAggregate(self.auction, 1, 1, '1.00')
+        call_command('reconcile_ratings', '--fix', stdout=out)
+        self.assertAggregate(self.auction, 16, 6, '2.67')
+
+
+class BidPlacementTests(AuctionDataMixin, APITestCase):
+
+    def bid(self, user, price, auction=None):
+        auction = auction or self.auctions[1]
+        self.client.force_authenticate(user)
+        return self.client.post(reverse('auctions:bid-list-create', args=[auction.id]), {'price': price})
+
+    def test_bids_must_beat_current_price(self):
+        auction = self.auctions[1]  # Precio de salida 11.00 y una puja de 30.00
+        self.assertEqual(self.bid(self.users[0], '30.00').status_code, 400)
+        auction.bids.all().delete()
+        refresh_bid_summary([auction.id])
+
+        self.assertEqual(self.bid(self.users[0], '10.99').status_code, 400)
+        self.assertEqual(self.bid(self.users[0], '11.00').status_code, 201)
+        self.assertEqual(self.bid(self.users[2], '11.00').status_code, 400)
+        response = self.bid(self.users[2], '12.50')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['bidder_username'], 'user2')
+        auction.refresh_from_db()
+        self.assertEqual((auction.current_price, auction.bid_count), (Decimal('12.50'), 2))
+
+    def test_closed_auction_rejects_bids(self):
+        auction = self.auctions[2]
+        Auction.objects.filter(pk=auction.pk).update(closing_date=timezone.now() - timedelta(minutes=1))
+        response = self.bid(self.users[0], '1000', auction)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('auction', response.data)
+
+    def test_unknown_auction(self):
+        self.client.force_authenticate(self.users[0])
+        response = self.client.post(reverse('auctions:bid-list-create', args=[0]), {'price': '10'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_deleting_bid_refreshes_summary(self):
+        auction = self.auctions[3]
+        auction.bids.all().delete()
+        refresh_bid_summary([auction.id])
+        self.bid(self.users[0], '20', auction)
+        self.bid(self.users[1], '25', auction)
+        self.owner.is_staff = True
+        self.client.force_authenticate(self.owner)
+        last = auction.bids.last()
+        self.client.delete(reverse('auctions:bid-detail', args=[auction.id, last.id]))
+        auction.refresh_from_db()
+        self.assertEqual((auction.current_price, auction.bid_count), (Decimal('20.00'), 1))
+
+
+    def test_editing_bid_is_validated(self):
+        auction = self.auctions[1]  # Una puja de 30.00
+        self.assertEqual(self.bid(self.users[0], '40.00').status_code, 201)
+        bid = auction.bids.get(bidder=self.users[0])
+        url = reverse('auctions:bid-detail', args=[auction.id, bid.id])
+        # Bajar la puja haría bajar el precio actual por debajo de las otras
+        response = self.client.patch(url, {'price': '31.00'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('price', response.data)
+        self.assertEqual(self.client.patch(url, {'price': '45.00'}).status_code, 200)
+        auction.refresh_from_db()
+        self.assertEqual((auction.current_price, auction.bid_count), (Decimal('45.00'), 2))
+
+        Auction.objects.filter(pk=auction.pk).update(closing_date=timezone.now() - timedelta(minutes=1))
+        response = self.client.patch(url, {'price': '50.00'})
+        self.assertEqual((response.status_code, response.data), (400, {'auction': 'Auction is closed.'}))
+        self.assertEqual(self.client.delete(url).status_code, 400)
+        auction.refresh_from_db()
+        self.assertEqual((auction.current_price, auction.bid_count), (Decimal('45.00'), 2))
+
+
+class BidThrottleTests(AuctionDataMixin, APITestCase):
+    """Cubos de fichas por usuario, IP y subasta en las pujas."""
+
+    def bid(self, user, price, auction=None):
+        auction = auction or self.auctions[1]
+        self.client.force_authenticate(user)
+        return self.client.post(reverse('auctions:bid-list-create', args=[auction.id]), {'price': price})
+
+    def test_per_user_bucket(self):
+        with self.settings(REST_FRAMEWORK=throttle_rates(bid_user='2/min')):
+            self.assertEqual(self.bid(self.users[0], '100').status_code, 201)
+            self.assertEqual(self.bid(self.users[0], '101').status_code, 201)
+            response = self.bid(self.users[0], '102')
+            self.assertEqual(response.status_code, 429)
+            # Una ficha cada 30 segundos
+            self.assertIn(int(response['Retry-After']), range(25, 31))
+            # Otro usuario tiene su propio cubo y los GET no se limitan
+            self.assertEqual(self.bid(self.users[1], '103').status_code, 201)
+            self.assertEqual(self.client.get(reverse('auctions:bid-list-create', args=[self.auctions[1].id])).status_code, 200)
+
+    def test_bucket_refills(self):
+        now = time.time()
+        with self.settings(REST_FRAMEWORK=throttle_rates(bid_user='2/min')):
+            with mock.patch('myFirstApiRest.throttling.time.time', return_value=now):
+                self.bid(self.users[0], '100')
+                self.bid(self.users[0], '101')
+                self.assertEqual(self.bid(self.users[0], '102').status_code, 429)
+            with mock.patch('myFirstApiRest.throttling.time.time', return_value=now + 31):
+                self.assertEqual(self.bid(self.users[0], '102').status_code, 201)
+                self.assertEqual(self.bid(self.users[0], '103').status_code, 429)
+
+    def test_per_auction_and_ip_buckets(self):
+        with self.settings(REST_FRAMEWORK=throttle_rates(bid_auction='3/min')):
+            for i in range(3):
+                self.assertEqual(self.bid(self.users[i], str(100 + i)).status_code, 201)
+            self.assertEqual(self.bid(self.users[3], '200').status_code, 429)
+            self.assertEqual(self.bid(self.users[3], '200', self.auctions[2]).status_code, 201)
+        cache.clear()
+        with self.settings(REST_FRAMEWORK=throttle_rates(bid_ip='2/min')):
+            self.bid(self.users[0], '300')
+            self.bid(self.users[1], '301')
+            # Mismo REMOTE_ADDR aunque cambie el usuario
+            self.assertEqual(self.bid(self.users[2], '302').status_code, 429)
+
+    def test_rejected_bids_do_not_drain_other_buckets(self):
+        with self.settings(REST_FRAMEWORK=throttle_rates(bid_user='1/min', bid_auction='5/min')):
+            codes = [self.bid(self.users[0], str(100 + i)).status_code for i in range(6)]
+            self.assertEqual(codes, [201, 429, 429, 429, 429, 429])
+            # Solo la primera puja ha gastado de la subasta: los demás pujadores no se quedan fuera
+            self.assertEqual(self.bid(self.users[1], '200').status_code, 201)
+
+    def test_forwarded_for_is_ignored(self):
+        # Sin proxies (NUM_PROXIES = 0) la IP es REMOTE_ADDR aunque el cliente mande X-Forwarded-For
+        url = reverse('auctions:bid-list-create', args=[self.auctions[1].id])
+        with self.settings(REST_FRAMEWORK=throttle_rates(bid_ip='1/min')):
+            codes = []
+            for i in range(3):
+                self.client.force_authenticate(self.users[i])
+                codes.append(self.client.post(url, {'price': str(100 + i)}, HTTP_X_FORWARDED_FOR=f'203.0.113.{i}').status_code)
+            self.assertEqual(codes, [201, 429, 429])
+
+    def test_bulk_bids(self):
+        def bulk(user, auction, *prices):
+            self.client.force_authenticate(user)
+            return self.client.post(reverse('auctions:bulk-bids'),
+                                    [{'auction': auction.id, 'price': price} for price in prices], format='json')
+
+        with self.settings(REST_FRAMEWORK=throttle_rates(bulk_bid_user='5/min', bid_user='1/min', bid_auction='4/min')):
+            # Una ficha por elemento de los cubos de las altas masivas
+            self.assertEqual(bulk(self.users[0], self.auctions[1], '100', '101').status_code, 201)
+            self.assertEqual(bulk(self.users[0], self.auctions[2], '100', '101', '102', '103').status_code, 429)
+            # Los cubos de las pujas sueltas son otros
+            self.assertEqual(self.bid(self.users[0], '102').status_code, 201)
+            # La subasta ya ha gastado tres de sus cuatro fichas, por una vía u otra
+            self.assertEqual(bulk(self.users[1], self.auctions[1], '103').status_code, 201)
+            self.assertEqual(bulk(self.users[2], self.auctions[1], '104').status_code, 429)
+            # Más elementos que fichas en el cubo de la subasta: lo vacía, pero se admite
+            self.assertEqual(bulk(self.users[3], self.auctions[2], '100', '101', '102', '103', '104').status_code, 201)
+            self.assertEqual(self.bid(self.users[4], '200', self.auctions[2]).status_code, 429)
+            # Más elementos de los que caben en el cubo del usuario: no se admitiría nunca, sin Retry-After
+            response = bulk(self.users[4], self.auctions[3], *(str(100 + i) for i in range(6)))
+            self.assertEqual(response.status_code, 429)
+            self.assertNotIn('Retry-After', response)
+
+    def test_bulk_larger_than_bid_bucket(self):
+        # Con las tasas por defecto un lote de más de 30 pujas (el cubo por usuario de las sueltas) se admite
+        capacity = int(settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']['bid_user'].split('/')[0])
+        self.client.force_authenticate(self.users[0])
+        response = self.client.post(reverse('auctions:bulk-bids'), [
+            {'auction': self.auctions[1].id, 'price': f'{100 + i}.00'} for i in range(capacity + 20)
+        ], format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['succeeded'], capacity + 20)
+
+    def test_disabled(self):
+        with self.settings(REST_FRAMEWORK=throttle_rates(bid_user='1/min'), THROTTLING_ENABLED=False):
+            self.assertEqual(self.bid(self.users[0], '100').status_code, 201)
+            self.assertEqual(self.bid(self.users[0], '101').status_code, 201)
+
+class BulkWriteTests(AuctionDataMixin, APITestCase):
+    """Altas masivas: cada elemento se valida por separado y el número de consultas no depende del tamaño."""
+
+    def post(self, name, items, user=None):
+        self.client.force_authenticate(user or self.users[0])
+        return self.client.post(reverse(f'auctions:bulk-{name}'), items, format='json')
+
+    def test_bids_partial_success(self):
+        auction = self.auctions[1]  # Puja más alta de 30.00
+        closed = self.auctions[2]
+        Auction.objects.filter(pk=closed.pk).update(closing_date=timezone.now() - timedelta(minutes=1))
+        response = self.post('bids', [
+            {'auction': auction.id, 'price': '31.00'},
+            {'auction': auction.id, 'price': '30.50'},
+            {'auction': auction.id, 'price': '32.00'},
+            {'auction': closed.id, 'price': '99.00'},
+            {'auction': 0, 'price': '10.00'},
+            {'auction': auction.id, 'price': '-1'},
+        ])
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual((response.data['succeeded'], response.data['failed']), (2, 4))
+        statuses = [result['status'] for result in response.data['results']]
+        self.assertEqual(statuses, [201, 400, 201, 400, 404, 400])
+        self.assertEqual(response.data['results'][3]['errors'], {'auction': ['Auction is closed.']})
+        auction.refresh_from_db()
+        self.assertEqual((auction.current_price, auction.bid_count), (Decimal('32.00'), 3))
+
+    def test_comments(self):
+        response = self.post('comments', [
+            {'auction': self.auctions[1].id, 'title': 'Uno', 'content': 'Texto'},
+            {'auction': self.auctions[2].id, 'title': '', 'content': 'Texto'},
+        ])
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(response.data['results'][0]['data']['user_username'], 'user0')
+        self.assertIn('title', response.data['results'][1]['errors'])
+        self.assertEqual(self.auctions[1].comments.count(), 2)
+
+    def test_ratings_upsert(self):
+        # user0 ya valoró self.auction con 1
+        response = self.post('ratings', [
+            {'auction': self.auction.id, 'value': 5},
+            {'auction': self.auctions[1].id, 'value': 2},
+            {'auction': self.auctions[1].id, 'value': 4},
+        ])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([result['status'] for result in response.data['results']], [200, 201, 201])
+        self.assertEqual(Rating.objects.get(auction=self.auctions[1], user=self.users[0]).value, 4)
+        for auction in (self.auction, self.auctions[1]):
+            ratings = Rating.objects.filter(auction=auction)
+            auction.refresh_from_db()
+            self.assertEqual((auction.rating_count, auction.rating_sum),
+                             (ratings.count(), sum(rating.value for rating in ratings)))
+
+    def test_ratings_concurrent_insert(self):
+        # Otra petición (rate_auction) crea la valoración, pero el lote no la ve en su primera lectura
+        raced = Rating.objects.create(auction=self.auctions[1], user=self.users[0], value=1)
+        apply_rating_delta(self.auctions[1].id, 1, 1)
+        reads = [Rating.objects.none(), Rating.objects.select_for_update()]
+
+        with mock.patch.object(Rating.objects, 'select_for_update', side_effect=reads):
+            response = self.post('ratings', [
+                {'auction': self.auctions[1].id, 'value': 4},
+                {'auction': self.auctions[2].id, 'value': 3},
+            ])
+        self.assertEqual(response.status_code, 201)
+        # La que ha creado la otra petición se actualiza, no se crea
+        self.assertEqual([result['status'] for result in response.data['results']], [200, 201])
+        self.assertEqual(response.data['results'][0]['data']['id'], raced.id)
+        self.assertEqual(Rating.objects.get(auction=self.auctions[1], user=self.users[0]).value, 4)
+        self.assertEqual(Rating.objects.get(auction=self.auctions[2], user=self.users[0]).value, 3)
+        for auction in self.auctions[1:3]:
+            ratings = Rating.objects.filter(auction=auction)
+            auction.refresh_from_db()
+            self.assertEqual((auction.rating_count, auction.rating_sum),
+                             (ratings.count(), sum(rating.value for rating in ratings)))
+
+    def test_user_field_is_staff_only(self):
+        item = {'auction': self.auctions[1].id, 'price': '40.00', 'user': self.users[3].id}
+        response = self.post('bids', [item])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['results'][0]['status'], 403)
+
+        staff = create_user('staff', is_staff=True)
+        response = self.post('bids', [item, {**item, 'price': '41.00', 'user': 0}], user=staff)
+        self.assertEqual([result['status'] for result in response.data['results']], [201, 404])
+        self.assertEqual(response.data['results'][0]['data']['bidder_username'], 'user3')
+
+    def test_invalid_payload(self):
+        for payload in ({'auction': self.auction.id, 'price': '40.00'}, []):
+            self.assertEqual(self.post('bids', payload).status_code, 400)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.post(reverse('auctions:bulk-bids'), [], format='json').status_code, 401)
+
+    def test_constant_queries(self):
+        def count(size, offset):
+            items = [{'auction': self.auctions[i % self.rows].id, 'price': f'{100 + offset + i}.00'} for i in range(size)]
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.post('bids', items).status_code, 201)
+            return len(queries)
+
+        # 50 pujas del mismo usuario no caben en su cubo de fichas
+        with self.settings(THROTTLING_ENABLED=False):
+            self.assertEqual(count(5, 0), count(50, 100))
+
+
+class AuctionImportTests(AuctionDataMixin, APITestCase):
+    """Importación por bloques desde CSV/NDJSON con las reglas de AuctionListCreateSerializer."""
+
+    def catalogue(self):
+        closing = (timezone.now() + timedelta(days=20)).strftime('%Y-%m-%dT%H:%M')
+        soon = (timezone.now() + timedelta(days=3)).strftime('%Y-%m-%dT%H:%M')
+        base = {'description': 'Importada', 'closing_date': closing, 'thumbnail': '', 'price': '15.00',
+                'stock': '2', 'brand': 'Marca', 'category': str(self.categories[0].id)}
+        return [
+            {**base, 'title': 'Importada 1'},
+            {**base, 'title': 'Importada 2', 'category': 'categoria 1'},
+            {**base, 'title': 'Pronto', 'closing_date': soon},
+            {**base, 'title': 'Sin categoria', 'category': 'No existe'},
+            {**base, 'title': 'Importada 3', 'stock': '0'},
+            {**base, 'title': 'Importada 4'},
+        ]
+
+    def test_command_csv(self):
+        path = os.path.join(self.enterContext(tempfile.TemporaryDirectory()), 'catalogo.csv')
+        with open(path, 'w', newline='', encoding='utf-8') as stream:
+            writer = csv.DictWriter(stream, fieldnames=list(self.catalogue()[0]))
+            writer.writeheader()
+            writer.writerows(self.catalogue())
+        out = StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command('import_auctions', path, auctioneer='owner', chunk_size=2, stdout=out)
+        self.assertIn('Imported 3 auctions, rejected 3 rows', out.getvalue())
+        # Categorías y usuario una vez, y un INSERT por bloque
+        self.assertLessEqual(len([q for q in queries if q['sql'].startswith('INSERT')]), 2)
+        self.assertLessEqual(len(queries), 5)
+        imported = Auction.objects.filter(title__startswith='Importada')
+        self.assertEqual(sorted(imported.values_list('title', flat=True)), ['Importada 1', 'Importada 2', 'Importada 4'])
+        self.assertEqual(set(imported.values_list('auctioneer', flat=True)), {self.owner.id})
+        self.assertEqual(imported.get(title='Importada 2').category, self.categories[1])
+
+        with open(f'{path}.rejected.ndjson', encoding='utf-8') as stream:
+            rejected = [json.loads(line) for line in stream]
+        self.assertEqual([entry['line'] for entry in rejected], [4, 5, 6])
+        self.assertEqual(list(rejected[0]['errors']), ['closing_date'])
+        self.assertEqual(list(rejected[1]['errors']), ['category'])
+        self.assertEqual(list(rejected[2]['errors']), ['stock'])
+
+    def test_endpoint_ndjson(self):
+        lines = [json.dumps(row) for row in self.catalogue()[:3]] + ['{no es json']
+        upload = SimpleUploadedFile('catalogo.ndjson', '\n'.join(lines).encode(), content_type='application/x-ndjson')
+        url = reverse('auctions:auction-import')
+        self.client.force_authenticate(self.users[0])
+        self.assertEqual(self.client.post(url, {'file': upload}).status_code, 403)
+
+        self.client.force_authenticate(create_user('staff', is_staff=True))
+        upload.seek(0)
+        response = self.client.post(url, {'file': upload, 'auctioneer': 'user2'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['created'], response.data['rejected']), (2, 2))
+        self.assertEqual([entry['line'] for entry in response.data['rejected_rows']], [3, 4])
+        self.assertEqual(Auction.objects.filter(title__startswith='Importada', auctioneer=self.users[2]).count(), 2)
+
+
+class ExportTests(AuctionDataMixin, APITestCase):
+    """Volcados CSV/NDJSON por bloques con filtros sobre creation_date."""
+
+    def export(self, name, **params):
+        response = self.client.get(reverse('auctions:export', args=[name]), params)
+        self.assertEqual(response.status_code, 200, getattr(response, 'data', None))
+        return b''.join(response.streaming_content).decode()
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(create_user('staff', is_staff=True))
+
+    def test_csv(self):
+        rows = list(csv.DictReader(StringIO(self.export('bids'))))
+        self.assertEqual(len(rows), Bid.objects.count())
+        bid = Bid.objects.first()
+        self.assertEqual(rows[0], {'id': str(bid.id), 'auction': str(bid.auction_id), 'bidder': str(bid.bidder_id),
+                                   'price': str(bid.price), 'creation_date': bid.creation_date.isoformat()})
+
+    def test_ndjson_in_chunks(self):
+        Auction.objects.filter(pk=self.auction.pk).update(description='Línea 1\nLínea "2"', current_price=None)
+        chunks = list(stream_export('auctions', 'ndjson', chunk_size=5))
+        self.assertEqual(len(chunks), -(-Auction.objects.count() // 5))
+        rows = [json.loads(line) for line in ''.join(chunks).splitlines()]
+        self.assertEqual([row['id'] for row in rows], list(Auction.objects.values_list('id', flat=True)))
+        self.assertEqual((rows[0]['description'], rows[0]['current_price']), ('Línea 1\nLínea "2"', None))
+        self.assertEqual(rows[1]['price'], str(self.auctions[1].price))
+        self.assertEqual(self.export('ratings', output='ndjson').count('\n'), Rating.objects.count())
+
+    def test_asgi_streams_async(self):
+        # Con ASGI un iterador síncrono se cargaría entero antes de enviar la respuesta
+        async def collect(chunks):
+            return [chunk async for chunk in chunks]
+
+        self.assertEqual(async_to_sync(collect)(astream_export('auctions', 'csv', chunk_size=5)),
+                         list(stream_export('auctions', 'csv', chunk_size=5)))
+        token = RefreshToken.for_user(CustomUser.objects.get(username='staff')).access_token
+        response = async_to_sync(AsyncClient().get)(
+            reverse('auctions:export', args=['bids']), {'output': 'ndjson'}, headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        body = b''.join(async_to_sync(collect)(response.streaming_content)).decode()
+        self.assertEqual(body, self.export('bids', output='ndjson'))
+
+    def test_since_until(self):
+        ratings = list(Rating.objects.all())
+        moment = timezone.now() - timedelta(days=1)
+        Rating.objects.filter(pk__in=[rating.pk for rating in ratings[:2]]).update(creation_date=moment - timedelta(days=1))
+        older = list(csv.DictReader(StringIO(self.export('ratings', until=moment.isoformat()))))
+        self.assertEqual([row['id'] for row in older], [str(rating.pk) for rating in ratings[:2]])
+        newer = list(csv.DictReader(StringIO(self.export('ratings', since=moment.date().isoformat()))))
+        self.assertEqual(len(newer), len(ratings) - 2)
+
+    def test_errors(self):
+        url = reverse('auctions:export', args=['bids'])
+        self.assertEqual(self.client.get(url, {'output': 'xml'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'since': 'ayer'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('auctions:export', args=['users'])).status_code, 404)
+        self.client.force_authenticate(self.owner)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('export_data', 'bids', output='ndjson', since='2000-01-01', stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), Bid.objects.count())
+        with self.assertRaisesMessage(CommandError, '"ayer" is not an ISO 8601 date or datetime.'):
+            call_command('export_data', 'bids', since='ayer', stdout=StringIO())
+
+
+class UserListViewTests(AuctionDataMixin, APITestCase):
+    """Historiales del usuario: cursor por defecto, filtros y salida NDJSON."""
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.owner)
+
+    def collect(self, url, **params):
+        rows, response = [], self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            rows += response.data['results']
+            if not response.data['next']:
+                return rows
+            response = self.client.get(response.data['next'])
+
+    def test_cursor_pages(self):
+        rows = self.collect(reverse('auctions:user-auctions'))
+        self.assertEqual([row['id'] for row in rows],
+                         list(Auction.objects.filter(auctioneer=self.owner).values_list('id', flat=True)))
+        comments = self.collect(reverse('auctions:user-comments'))
+        self.assertEqual([row['id'] for row in comments],
+                         list(Comment.objects.filter(user=self.owner).order_by('-id').values_list('id', flat=True)))
+        response = self.client.get(reverse('auctions:user-auctions'), {'pagination': 'page'})
+        self.assertEqual(response.data['count'], self.rows)
+
+    def test_edit_between_pages(self):
+        # Editar una fila de la segunda página no la mueve respecto al cursor
+        for url, rows in ((reverse('users:user-bids'), Bid.objects.filter(bidder=self.owner)),
+                          (reverse('auctions:user-comments'), Comment.objects.filter(user=self.owner))):
+            first = self.client.get(url)
+            self.assertEqual(first.status_code, 200)
+            oldest = rows.order_by('id').first()
+            if isinstance(oldest, Bid):
+                response = self.client.patch(reverse('auctions:bid-detail', args=[oldest.auction_id, oldest.id]),
+                                             {'price': '500.00'})
+            else:
+                response = self.client.patch(reverse('auctions:comment-detail', args=[oldest.auction_id, oldest.id]),
+                                             {'content': 'Editado'})
+            self.assertEqual(response.status_code, 200)
+            second = self.client.get(first.data['next'])
+            ids = [row['id'] for row in first.data['results'] + second.data['results']]
+            self.assertEqual(ids, list(rows.order_by('-id').values_list('id', flat=True)), url)
+
+    def test_filters(self):
+        url = reverse('auctions:user-auctions')
+        closed = Auction.objects.filter(auctioneer=self.owner).first()
+        Auction.objects.filter(pk=closed.pk).update(closing_date=timezone.now() - timedelta(days=1))
+        self.assertEqual([row['id'] for row in self.collect(url, open='false')], [closed.id])
+        self.assertEqual(len(self.collect(url, open='true')), self.rows - 1)
+        self.assertEqual(self.collect(url, until=(timezone.now() - timedelta(days=1)).isoformat()), [])
+        self.assertEqual(self.client.get(url, {'since': '2030-01-02', 'until': '2030-01-01'}).status_code, 400)
+
+        Comment.objects.filter(user=self.owner, auction=self.auctions[0]).update(created_at=timezone.now() - timedelta(days=10))
+        comments = self.collect(reverse('auctions:user-comments'), since=(timezone.now() - timedelta(days=1)).isoformat())
+        self.assertEqual(len(comments), self.rows - 1)
+
+    def test_ndjson(self):
+        url = reverse('auctions:user-auctions')
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {'output': 'ndjson'})
+            body = b''.join(response.streaming_content)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(len(rows), self.rows)
+        self.assertEqual(rows[0], json.loads(json.dumps(self.collect(url)[0])))
+        self.assertEqual(self.client.get(url, {'output': 'xml'}).status_code, 400)
+
+    def test_ndjson_only_on_user_views(self):
+        # Los listados públicos no se pueden volcar enteros sin paginar
+        self.client.logout()
+        auction = self.auctions[0].id
+        for url in (reverse('auctions:auction-list-create'), reverse('auctions:bid-list-create', args=[auction]),
+                    reverse('auctions:comment-list-create', args=[auction])):
+            response = self.client.get(url, {'output': 'ndjson'})
+            self.assertEqual(response.status_code, 400, url)
+            self.assertEqual(response.data, {'output': 'Output must be json.'})
+        self.client.force_authenticate(self.owner)
+        for name in ('auctions:user-comments', 'users:user-bids'):
+            response = self.client.get(reverse(name), {'output': 'ndjson'})
+            self.assertEqual(response['Content-Type'], 'application/x-ndjson', name)
+
+
+class BenchmarkTests(APITestCase):
+    """Datos sintéticos y banco de pruebas de los endpoints."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.counts = generate(users=20, categories=3, auctions=40, bids=400, ratings=100, comments=50, seed=7)
+
+    def setUp(self):
+        super().setUp()
+        # Los usuarios cacheados por tests anteriores tienen los mismos ids que los generados aquí
+        cache.clear()
+
+    def test_generated_data(self):
+        auctions = Auction.objects.filter(category__name__startswith='gen-')
+        self.assertEqual(auctions.count(), 40)
+        self.assertEqual(Bid.objects.count(), 400)
+        self.assertEqual(Rating.objects.count(), self.counts['ratings'])
+        # Con la distribución de Zipf la subasta más activa concentra muchas más pujas que la media
+        counts = sorted(auctions.values_list('bid_count', flat=True), reverse=True)
+        self.assertGreater(counts[0], 5 * 400 / 40)
+        for auction in auctions.filter(bid_count__gt=0)[:5]:
+            prices = list(auction.bids.order_by('id').values_list('price', flat=True))
+            self.assertEqual(prices, sorted(prices))
+            self.assertEqual(auction.current_price, prices[-1])
+        rated = auctions.filter(rating_count__gt=0).first()
+        self.assertEqual(rated.rating_count, rated.ratings.count())
+
+    def test_every_route_runs(self):
+        results, uncovered = run_benchmark(BenchmarkContext(), requests=1, warmup=0)
+        self.assertEqual(uncovered, [])
+        self.assertEqual({name: result['errors'] for name, result in results.items() if result['errors']}, {})
+        self.assertTrue(all(result['p50_ms'] > 0 for result in results.values()))
+
+    def test_connection_modes(self):
+        settings_dict = connection.settings_dict
+        saved = settings_dict['CONN_MAX_AGE'], settings_dict['OPTIONS']
+        results = run_connections(BenchmarkContext(), requests=1, warmup=0, connects=2)
+        # SQLite no tiene pool
+        self.assertEqual(list(results), ['per-request', 'persistent'])
+        for mode, result in results.items():
+            self.assertIn('p50_ms', result.pop('connect'))
+            self.assertEqual({name: r['errors'] for name, r in result.items() if r['errors']}, {})
+        self.assertEqual((settings_dict['CONN_MAX_AGE'], settings_dict['OPTIONS']), saved)
+        with connection_mode('per-request'):
+            self.assertEqual(settings_dict['CONN_MAX_AGE'], 0)
+
+    def test_compare(self):
+        baseline = {'bid list': {'p95_ms': 10.0, 'queries': 3}, 'bid detail': {'p95_ms': 2.0, 'queries': 1}}
+        results = {'bid list': {'p95_ms': 11.0, 'queries': 3}, 'bid detail': {'p95_ms': 3.5, 'queries': 2},
+                   'login': {'p95_ms': 300.0, 'queries': 2}}
+        self.assertEqual(compare(results, baseline), [
+            'bid detail: p95 2.0 -> 3.5 ms', 'bid detail: queries 1 -> 2'])
+        # +50 % pero solo 0,8 ms más: ruido
+        self.assertEqual(compare({'bid detail': {'p95_ms': 2.8, 'queries': 1}}, baseline), [])
+        self.assertEqual(percentile([1, 2, 3, 4], 50), 2)
+        self.assertEqual(percentile(list(range(1, 101)), 99), 99)
+
+
+class ConcurrencyBenchmarkTests(TransactionTestCase):
+    """WSGI, ASGI con vistas síncronas y ASGI con vistas asíncronas dan las mismas respuestas."""
+    # Con ASGI cada petición usa la conexión de otro hilo: los datos tienen que estar confirmados
+
+    def setUp(self):
+        generate(users=10, categories=2, auctions=10, bids=60, ratings=10, comments=10, seed=7)
+
+    def test_modes_agree(self):
+        results, mismatches = run_concurrency(BenchmarkContext(), requests=2, concurrencies=(1, 2), warmup=0)
+        self.assertEqual(mismatches, [])
+        for mode in MODES:
+            self.assertEqual({key: result['errors'] for key, result in results[mode].items() if result['errors']}, {})
+            self.assertEqual(len(results[mode]), 16)
+
+
+class MetricsTests(AuctionDataMixin, APITestCase):
+    """Cabecera Server-Timing e histogramas por vista en /api/metrics."""
+
+    def setUp(self):
+        super().setUp()
+        registry.reset()
+
+    def timings(self, response):
+        parts = dict(part.split(';', 1) for part in response['Server-Timing'].split(', '))
+        return {name: float(value.split('dur=')[1].split(';')[0]) for name, value in parts.items()}, parts
+
+    def test_server_timing(self):
+        self.client.force_authenticate(self.owner)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('auctions:bid-list-create', args=[self.auction.id]))
+        timings, parts = self.timings(response)
+        self.assertEqual(set(timings), {'db', 'serialize', 'render', 'total'})
+        self.assertIn(f'desc="{len(queries)} queries"', parts['db'])
+        self.assertGreater(timings['serialize'], 0)
+        self.assertGreater(timings['render'], 0)
+        self.assertLessEqual(timings['db'] + timings['serialize'] + timings['render'], timings['total'])
+
+    def test_prometheus_endpoint(self):
+        self.client.get(reverse('auctions:auction-list-create'))
+        self.client.get(reverse('auctions:auction-list-create'))
+        self.client.force_authenticate(self.users[0])
+        self.client.post(reverse('auctions:auction-rating', args=[self.auction.id]), {'value': 3})
+        self.assertEqual(self.client.get('/api/metrics').status_code, 403)
+
+        self.client.force_authenticate(create_user('staff', is_staff=True))
+        response = self.client.get('/api/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn('# TYPE http_request_duration_seconds histogram', body)
+        self.assertIn('http_request_duration_seconds_count{view="AuctionListCreate",method="GET"} 2', body)
+        self.assertIn('http_request_duration_seconds_bucket{view="AuctionListCreate",method="GET",le="+Inf"} 2', body)
+        self.assertIn('http_request_db_queries_count{view="RatingListCreate",method="POST"} 1', body)
+        self.assertIn('http_responses_total{view="RatingListCreate",method="POST",status="201"} 1', body)
+
+    def test_unknown_methods_share_a_label(self):
+        url = reverse('auctions:auction-list-create')
+        for method in ('PROPFIND', 'FOO1', 'FOO2'):
+            self.client.generic(method, url)
+        self.client.force_authenticate(create_user('staff', is_staff=True))
+        body = self.client.get('/api/metrics').content.decode()
+        self.assertIn('http_request_duration_seconds_count{view="AuctionListCreate",method="OTHER"} 3', body)
+        self.assertNotIn('FOO1', body)
+
+    def test_histogram(self):
+        histogram = Histogram((1, 5))
+        for value in (0, 1, 3, 7):
+            histogram.observe(value)
+        self.assertEqual(list(histogram.samples()), [(1, 2), (5, 3), ('+Inf', 4), ('sum', 11), ('count', 4)])
+
+
+
+class QueryInspectorTests(AuctionDataMixin, APITestCase):
+    """Consultas repetidas (N+1) y lentas por petición."""
+
+    def ratings(self):
+        # AuctionDataMixin ya crea una valoración de cada usuario en self.auction
+        return reverse('auctions:auction-rating', args=[self.auction.id])
+
+    def test_fingerprint(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id = 12 AND name = 'it''s'  AND x IN (%s, %s, %s)"),
+            'SELECT * FROM t WHERE id = ? AND name = ? AND x IN (...)')
+        self.assertEqual(fingerprint('SELECT "t2"."id" FROM "t2" WHERE "t2"."id" = %s LIMIT 21'),
+                         'SELECT "t2"."id" FROM "t2" WHERE "t2"."id" = ? LIMIT ?')
+
+    def test_n_plus_one_raises_in_tests(self):
+        url = self.ratings()
+        self.assertEqual(self.client.get(url).status_code, 200)
+        # Sin select_related('user') cada valoración consulta su usuario
+        queryset = lambda view: Rating.objects.filter(auction_id=view.kwargs['auction_id'])
+        with mock.patch.object(RatingListCreate, 'get_queryset', queryset):
+            with self.assertLogs('myFirstApiRest.queries', 'WARNING') as logs:
+                with self.assertRaises(QueryInspectionError) as raised:
+                    self.client.get(url)
+        self.assertIn('Repeated queries in RatingListCreate', str(raised.exception))
+        # Una consulta de usuario por valoración de la página
+        self.assertIn('5x SELECT "users_customuser"', str(raised.exception))
+        self.assertIn('possible N+1', logs.output[0])
+
+    def test_production_only_logs(self):
+        url = self.ratings()
+        queryset = lambda view: Rating.objects.filter(auction_id=view.kwargs['auction_id'])
+        with self.settings(QUERY_INSPECTOR_RAISE=False), mock.patch.object(RatingListCreate, 'get_queryset', queryset):
+            with self.assertLogs('myFirstApiRest.queries', 'WARNING'):
+                response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_slow_query_logged_with_view(self):
+        with self.settings(SLOW_QUERY_MS=0):
+            with self.assertLogs('myFirstApiRest.queries', 'WARNING') as logs:
+                self.client.get(reverse('auctions:auction-list-create'))
+        self.assertTrue(all('Slow query in AuctionListCreate' in line for line in logs.output))
+
+    def test_inspector_outside_requests(self):
+        inspector = QueryInspector(repeat_limit=2)
+        with inspector.watch():
+            names = [auction.category.name for auction in Auction.objects.all()[:3]]
+        self.assertEqual(len(names), 3)
+        with self.assertLogs('myFirstApiRest.queries', 'WARNING'), self.assertRaises(QueryInspectionError):
+            inspector.report('loop', raise_errors=True)
+
+class SettlementTests(AuctionDataMixin, APITestCase):
+    """Liquidación por lotes de las subastas vencidas."""
+
+    def expire(self, *auctions):
+        Auction.objects.filter(pk__in=[auction.pk for auction in auctions]).update(
+            closing_date=timezone.now() - timedelta(minutes=1))
+
+    def test_records_winner(self):
+        # self.auction tiene pujas 20..25 y una de 30.00 del propietario; empata otra de 30.00 posterior
+        tie = Bid.objects.create(auction=self.auction, price=Decimal('30.00'), bidder=self.users[1])
+        no_bids = self.auctions[1]
+        no_bids.bids.all().delete()
+        self.expire(self.auction, no_bids)
+
+        self.assertEqual(settle_all(batch_size=1), 2)
+        settlement = AuctionSettlement.objects.get(auction=self.auction)
+        winning = self.auction.bids.exclude(pk=tie.pk).get(price=Decimal('30.00'))
+        self.assertEqual((settlement.winning_bid_id, settlement.winner_id), (winning.id, self.owner.id))
+        self.assertEqual((settlement.final_price, settlement.bid_count), (Decimal('30.00'), self.rows + 2))
+        empty = AuctionSettlement.objects.get(auction=no_bids)
+        self.assertEqual((empty.winner, empty.final_price, empty.bid_count), (None, None, 0))
+        self.assertEqual(set(Auction.objects.filter(is_closed=True)), {self.auction, no_bids})
+
+    def test_only_expired_auctions(self):
+        self.assertEqual(settle_expired_auctions(), 0)
+        self.assertFalse(AuctionSettlement.objects.exists())
+
+    def test_idempotent(self):
+        self.expire(*self.auctions)
+        # Una liquidación ya guardada (p. ej. un worker que falló antes de cerrar) no se duplica
+        AuctionSettlement.objects.create(auction=self.auction, bid_count=0)
+        self.assertEqual(settle_all(batch_size=4), self.rows)
+        self.assertEqual(settle_all(), 0)
+        self.assertEqual(AuctionSettlement.objects.count(), self.rows)
+
+    def test_settled_auction_rejects_bids(self):
+        self.expire(self.auction)
+        settle_all()
+        # Aunque se vuelva a mover la fecha de cierre, la subasta ya está liquidada
+        Auction.objects.filter(pk=self.auction.pk).update(closing_date=timezone.now() + timedelta(days=1))
+        self.client.force_authenticate(self.users[0])
+        response = self.client.post(reverse('auctions:bid-list-create', args=[self.auction.id]), {'price': '1000'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('auction', response.data)
+
+    def test_command_with_seed(self):
+        out = StringIO()
+        call_command('settle_auctions', seed=20, seed_bids=2, batch_size=7, stdout=out)
+        self.assertIn('Settled 20 auctions', out.getvalue())
+        self.assertEqual(Auction.objects.count(), self.rows * 2)
+        self.assertFalse(AuctionSettlement.objects.exists())
+
+
+class ConcurrentBidTests(TransactionTestCase):
+    """Pujas simultáneas desde varios hilos: ninguna se pierde ni queda fuera de orden."""
+
+    def test_stress(self):
+        out = StringIO()
+        call_command('stress_bids', '--threads', '6', '--bids', '20', stdout=out)
+        self.assertIn('No lost or out-of-order winning bids.', out.getvalue())
+        self.assertRegex(out.getvalue(), r'120 bids in .*: [1-9]\d* accepted')
+
+
+class DatabaseConfigTests(SimpleTestCase):
+    """DATABASES con conexiones persistentes o con pool (myFirstApiRest/database.py)."""
+    POSTGRES = 'postgres://user:secret@db:5432/das'
+
+    def test_persistent_connections(self):
+        config = database_config(self.POSTGRES)
+        self.assertEqual((config['CONN_MAX_AGE'], config['CONN_HEALTH_CHECKS']), (60, True))
+        self.assertNotIn('pool', config.get('OPTIONS', {}))
+        config = database_config('sqlite:////tmp/das.db', conn_max_age=0, health_checks=False)
+        self.assertEqual((config['CONN_MAX_AGE'], config['CONN_HEALTH_CHECKS']), (0, False))
+
+    def test_pool(self):
+        config = database_config(self.POSTGRES, pool=True, pool_min_size=1, pool_max_size=8, pool_timeout=5)
+        # Django no admite pool y conexiones persistentes a la vez
+        self.assertEqual(config['CONN_MAX_AGE'], 0)
+        self.assertTrue(config['CONN_HEALTH_CHECKS'])
+        self.assertEqual(config['OPTIONS']['pool'], {'min_size': 1, 'max_size': 8, 'timeout': 5})
+
+    def test_invalid_pool(self):
+        with self.assertRaisesMessage(ImproperlyConfigured, 'PostgreSQL'):
+            database_config('sqlite:////tmp/das.db', pool=True)
+        with self.assertRaises(ImproperlyConfigured):
+            database_config(self.POSTGRES, pool=True, pool_min_size=5, pool_max_size=4)
+
+
+class InMemoryBrokerTests(SimpleTestCase):
+
+    async def test_fan_out_to_every_subscriber(self):
+        broker = InMemoryBroker()
+        first, second = broker.subscribe('a'), broker.subscribe('a')
+        other = broker.subscribe('b')
+        self.assertEqual(broker.publish('a', 'hola'), 2)
+        self.assertEqual(await asyncio.wait_for(first.get(), 1), 'hola')
+        self.assertEqual(await asyncio.wait_for(second.get(), 1), 'hola')
+        self.assertTrue(other.queue.empty())
+
+    async def test_publish_from_another_thread(self):
+        broker = InMemoryBroker()
+        subscription = broker.subscribe('a')
+        thread = threading.Thread(target=broker.publish, args=('a', 'desde hilo'))
+        thread.start()
+        self.assertEqual(await asyncio.wait_for(subscription.get(), 1), 'desde hilo')
+        thread.join()
+
+    async def test_slow_subscriber_keeps_latest(self):
+        broker = InMemoryBroker(max_queue_size=2)
+        subscription = broker.subscribe('a')
+        for message in ('1', '2', '3'):
+            broker.publish('a', message)
+        await asyncio.sleep(0)
+        self.assertEqual([await subscription.get(), await subscription.get()], ['2', '3'])
+
+    async def test_close_unsubscribes(self):
+        broker = InMemoryBroker()
+        subscription = broker.subscribe('a')
+        subscription.close()
+        self.assertEqual(broker.subscriber_count('a'), 0)
+        self.assertEqual(broker.publish('a', 'nadie'), 0)
+
+
+class FastSerializerTests(AuctionDataMixin, APITestCase):
+    """Los serializers sobre values() deben devolver exactamente lo mismo que los de DRF."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Valores nulos, texto no ASCII y una subasta cerrada
+        Auction.objects.filter(pk=cls.auctions[1].pk).update(
+            current_price=None, thumbnail='https://example.com/ñ.jpg', title='Subasta «única»',
+            closing_date=timezone.now() - timedelta(days=1))
+
+    def assertParity(self, serializer_class, fast_class, queryset):
+        expected = serializer_class(queryset, many=True).data
+        with self.assertNumQueries(1):
+            data = fast_class.serialize(queryset)
+        self.assertEqual(data, expected)
+        self.assertEqual([list(row) for row in data], [list(row) for row in expected])
+
+    def test_auctions(self):
+        self.assertParity(AuctionListCreateSerializer, AuctionListFastSerializer, annotate_is_open(Auction.objects.all()))
+
+    def test_bids(self):
+        self.assertParity(BidListCreateSerializer, BidListFastSerializer, Bid.objects.all())
+        self.assertParity(BidDetailSerializer, BidDetailFastSerializer, Bid.objects.order_by('-price'))
+
+    def test_comments(self):
+        self.assertParity(CommentSerializer, CommentFastSerializer, Comment.objects.all())
+
+    def test_paginated_views(self):
+        url = reverse('auctions:auction-list-create')
+        for params in ({}, {'pagination': 'cursor'}, {'search': 'subasta'}):
+            response = self.client.get(url, params)
+            ids = [row['id'] for row in response.data['results']]
+            expected = AuctionListCreateSerializer(Auction.objects.filter(pk__in=ids), many=True).data
+            self.assertEqual(sorted(response.data['results'], key=lambda row: row['id']), list(expected))
+        response = self.client.get(reverse('auctions:comment-list-create', args=[self.auction.id]), {'pagination': 'cursor'})
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertIsNotNone(response.data['next'])
+
+    def test_unsupported_method_field(self):
+        class Incomplete(FastSerializer):
+            serializer_class = AuctionListCreateSerializer
+        with self.assertRaises(ImproperlyConfigured):
+            Incomplete.get_plan()
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command('bench_serializers', rows=20, repeat=1, stdout=out)
+        self.assertIn('rows/s', out.getvalue())
+        self.assertEqual(Auction.objects.count(), self.rows * 2)
+
+
+class FastJSONTests(SimpleTestCase):
+    """FastJSONRenderer/FastJSONParser deben dar los mismos bytes y datos que los de DRF."""
+
+    def assertSameRender(self, data, accepted_media_type=None, renderer_context=None):
+        expected = JSONRenderer().render(data, accepted_media_type, renderer_context)
+        self.assertEqual(FastJSONRenderer().render(data, accepted_media_type, renderer_context), expected)
+
+    def test_auction_page(self):
+        auctions = build_auctions(30)
+        self.assertSameRender({'count': 30, 'next': None, 'results': AuctionListCreateSerializer(auctions, many=True).data})
+
+    def test_native_types(self):
+        now = timezone.now()
+        self.assertSameRender({
+            'price': Decimal('10.50'), 'created': now, 'naive': now.replace(tzinfo=None, microsecond=0),
+            'day': now.date(), 'time': now.time(), 'lazy': gettext_lazy('Not found.'), 'tuple': (1, 2),
+            'text': 'línea\u2028párrafo\u2029fin "comillas" \\ \n', 'big': 2 ** 70, 'none': None, 'flag': True,
+        })
+        self.assertSameRender({1: 'clave entera'})
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_indent_falls_back(self):
+        data = {'results': [{'id': 1, 'title': 'Subasta'}]}
+        self.assertSameRender(data, 'application/json; indent=4')
+        self.assertSameRender(data, renderer_context={'indent': 2})
+
+    def test_parser(self):
+        body = JSONRenderer().render({'price': '10.50', 'ids': [1, 2 ** 70], 'text': 'puja \u2028'})
+        self.assertEqual(FastJSONParser().parse(BytesIO(body)), JSONParser().parse(BytesIO(body)))
+        for invalid in (b'{"price": NaN}', b'{"price": 1', b''):
+            errors = []
+            for parser in (FastJSONParser(), JSONParser()):
+                with self.assertRaises(ParseError) as context:
+                    parser.parse(BytesIO(invalid))
+                errors.append(str(context.exception))
+            self.assertEqual(errors[0], errors[1])
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command('bench_json', rows=50, repeat=1, stdout=out)
+        self.assertIn('byte-identical output', out.getvalue())
+
+
+class BidStreamTests(AuctionDataMixin, APITestCase):
+
+    def test_new_bid_is_published(self):
+        auction = self.auctions[1]
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+
+        async def subscribe():
+            return get_broker().subscribe(bid_channel(auction.id))
+
+        subscription = loop.run_until_complete(subscribe())
+        self.addCleanup(subscription.close)
+        self.client.force_authenticate(self.users[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('auctions:bid-list-create', args=[auction.id]), {'price': '99.00'})
+        message = loop.run_until_complete(asyncio.wait_for(subscription.get(), 1))
+        self.assertEqual(json.loads(message), json.loads(response.content))
+
+    async def test_stream_sends_bid_events(self):
+        auction = self.auctions[1]
+        response = await self.async_client.get(reverse('auctions:bid-stream', args=[auction.id]))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = aiter(response.streaming_content)
+        self.assertEqual(await anext(events), b'retry: 3000\n\n')
+        get_broker().publish(bid_channel(auction.id), '{"id": 1}')
+        self.assertEqual(await asyncio.wait_for(anext(events), 1), b'event: bid\ndata: {"id": 1}\n\n')
+        await events.aclose()
+        response.close()
+        self.assertEqual(get_broker().subscriber_count(bid_channel(auction.id)), 0)
+
+    async def test_stream_unknown_auction(self):
+        response = await self.async_client.get(reverse('auctions:bid-stream', args=[0]))
+        self.assertEqual(response.status_code, 404)
+
+
+class ResponseCacheTests(AuctionDataMixin, APITestCase):
+
+    def get(self, url, **extra):
+        response = self.client.get(url, **extra)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_second_request_is_served_from_cache(self):
+        url = reverse('auctions:auction-list-create')
+        first = self.get(url)
+        with self.assertNumQueries(0):
+            second = self.get(url)
+        self.assertEqual((first['X-Cache'], second['X-Cache']), ('MISS', 'HIT'))
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(second['Content-Type'], first['Content-Type'])
+        self.assertEqual(self.get(url, data={'page': 2})['X-Cache'], 'MISS')
+
+    def test_writes_invalidate(self):
+        url = reverse('auctions:auction-detail', args=[self.auctions[1].id])
+        self.get(url)
+        self.client.force_authenticate(self.users[0])
+        # Las versiones cambian tras el commit de la escritura
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('auctions:bid-list-create', args=[self.auctions[1].id]), {'price': '500'})
+        self.client.force_authenticate(None)
+        response = self.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['current_price'], '500.00')
+
+        self.get(url)
+        Category.objects.filter(pk=self.categories[1].pk).update(name='No se entera')
+        self.assertEqual(self.get(url)['X-Cache'], 'HIT')
+        self.categories[1].name = 'Renombrada'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.categories[1].save()
+        self.assertEqual(self.get(url).data['category_name'], 'Renombrada')
+
+    def test_version_bumped_after_commit(self):
+        before = get_versions([Category._meta.label])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.categories[1].save()
+            # Sin confirmar: una lectura simultánea no puede cachear las filas viejas con la versión nueva
+            self.assertEqual(get_versions([Category._meta.label]), before)
+        self.assertNotEqual(get_versions([Category._meta.label]), before)
+
+    def test_process_local_cache_is_not_used(self):
+        # Con LocMemCache y varios workers un proceso no vería las invalidaciones de los demás
+        url = reverse('auctions:category-list-create')
+        with self.settings(CACHE_SHARED=False):
+            self.get(url)
+            with self.assertNumQueries(2):
+                response = self.get(url)
+        self.assertFalse(response.has_header('X-Cache'))
+
+    def test_authenticated_requests_bypass_cache(self):
+        url = reverse('auctions:category-list-create')
+        self.get(url)
+        # Un token inválido sigue dando 401 aunque haya una respuesta cacheada
+        response = self.client.get(url, HTTP_AUTHORIZATION='Bearer x')
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(response.has_header('X-Cache'))
+
+    def test_expires_when_next_auction_closes(self):
+        self.assertEqual(AuctionListCreate().get_cache_timeout(), 300)
+        Auction.objects.filter(pk=self.auction.pk).update(closing_date=timezone.now() + timedelta(seconds=2))
+        self.assertLessEqual(AuctionListCreate().get_cache_timeout(), 2)
+        self.assertEqual(CategoryListCreate().get_cache_timeout(), 300)
+
+    def test_stats(self):
+        url = reverse('auctions:category-list-create')
+        self.get(url)
+        self.get(url)
+        self.owner.is_staff = True
+        self.client.force_authenticate(self.owner)
+        self.assertEqual(self.get(reverse('auctions:cache-stats')).data,
+                         {'hits': 1, 'misses': 1, 'hit_ratio': 0.5})
+
+
+class ConditionalGetTests(AuctionDataMixin, APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        # Dos segundos después de los cambios: Last-Modified solo se envía con el segundo ya cerrado
+        now = time.time
+        self.clock = mock.patch('auctions.conditional.time.time', side_effect=lambda: now() + 2)
+        self.clock.start()
+        self.addCleanup(self.clock.stop)
+
+    def assertNotModified(self, url, response, queries=1):
+        with self.assertNumQueries(queries):
+            again = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.content, b'')
+        since = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(since.status_code, 304)
+
+    def assertModified(self, url, response):
+        again = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 200)
+        self.assertNotEqual(again['ETag'], response['ETag'])
+        return again
+
+    def test_auction_detail(self):
+        url = reverse('auctions:auction-detail', args=[self.auctions[1].id])
+        # Con cabecera Authorization no se usa la caché de respuestas: la vista
+        # responde 304 con la consulta de los validadores y sin serializar
+        response = self.client.get(url, HTTP_AUTHORIZATION='')
+        with self.assertNumQueries(1):
+            again = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'], HTTP_AUTHORIZATION='')
+        self.assertEqual(again.status_code, 304)
+        # Desde la caché de respuestas el 304 no toca la base de datos
+        cached = self.client.get(url)
+        self.assertNotModified(url, cached, queries=0)
+
+        self.client.force_authenticate(self.users[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('auctions:auction-rating', args=[self.auctions[1].id]), {'value': 5})
+        self.client.force_authenticate(None)
+        self.assertModified(url, response)
+
+    def test_bid_list(self):
+        url = reverse('auctions:bid-list-create', args=[self.auction.id])
+        response = self.client.get(url)
+        self.assertNotModified(url, response)
+        self.client.force_authenticate(self.users[0])
+        self.client.post(url, {'price': '999'})
+        response = self.assertModified(url, response)
+        self.assertNotModified(url, response)
+        self.assertNotEqual(self.client.get(url, {'page': 2})['ETag'], response['ETag'])
+
+    def test_comment_list(self):
+        url = reverse('auctions:comment-list-create', args=[self.auction.id])
+        response = self.client.get(url)
+        self.assertNotModified(url, response)
+        comment = self.auction.comments.first()
+        self.client.force_authenticate(comment.user)
+        self.client.delete(reverse('auctions:comment-detail', args=[self.auction.id, comment.id]))
+        response = self.assertModified(url, response)
+        since = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(since.status_code, 304)
+
+    def test_change_in_the_same_second(self):
+        self.clock.stop()
+        url = reverse('auctions:bid-list-create', args=[self.auction.id])
+        self.client.force_authenticate(self.users[0])
+        self.client.post(url, {'price': '999'})
+        second = int(Auction.objects.get(pk=self.auction.pk).updated_at.timestamp())
+        with mock.patch('auctions.conditional.time.time', return_value=second + 0.5):
+            response = self.client.get(url)
+            self.assertFalse(response.has_header('Last-Modified'))
+            # Otra puja en el mismo segundo: If-Modified-Since no puede dar un 304
+            self.client.post(url, {'price': '1000'})
+            self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=http_date(second)).status_code, 200)
+            self.assertModified(url, response)
+
+    def test_etag_depends_on_renderer(self):
+        url = reverse('auctions:bid-list-create', args=[self.auction.id])
+        response = self.client.get(url)
+        html = self.client.get(url, HTTP_ACCEPT='text/html')
+        self.assertEqual(html['Content-Type'], 'text/html; charset=utf-8')
+        self.assertNotEqual(html['ETag'], response['ETag'])
+        self.assertEqual(self.client.get(url, HTTP_ACCEPT='text/html', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_missing_auction(self):
+        response = self.client.get(reverse('auctions:bid-list-create', args=[0]))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
+
+
+class QueryPlanTests(AuctionDataMixin, APITestCase):
+    """La consulta principal de cada endpoint debe usar un índice (EXPLAIN QUERY PLAN de SQLite)."""
+
+    def setUp(self):
+        super().setUp()
+        if connection.vendor != 'sqlite':
+            self.skipTest('EXPLAIN QUERY PLAN is SQLite specific')
+
+    def plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return ' | '.join(row[-1] for row in cursor.fetchall())
+
+    def main_query_plan(self, url, table, **params):
+        """Plan de la última SELECT sobre ``table`` que no es un COUNT."""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params, HTTP_AUTHORIZATION='')
+        self.assertEqual(response.status_code, 200)
+        queries = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT') and f'FROM "{table}"' in query['sql'] and 'COUNT(' not in query['sql']
+        ]
+        return self.plan(queries[-1])
+
+    def assertUsesIndex(self, plan, index):
+        self.assertIn(f'INDEX {index}', plan)
+        self.assertNotRegex(plan, r'SCAN auctions_\w+\b(?! USING)')
+
+    def test_auctions_by_category_and_price(self):
+        plan = self.main_query_plan(
+            reverse('auctions:auction-list-create'), 'auctions_auction',
+            category=self.categories[0].id, price_min=1, price_max=100)
+        self.assertUsesIndex(plan, 'auction_category_price_idx')
+
+    def test_auctions_by_price(self):
+        plan = self.main_query_plan(reverse('auctions:auction-list-create'), 'auctions_auction', price_min=1, price_max=12)
+        self.assertUsesIndex(plan, 'auction_price_idx')
+
+    def test_auctions_by_rating(self):
+        plan = self.main_query_plan(reverse('auctions:auction-list-create'), 'auctions_auction', rating=2)
+        self.assertUsesIndex(plan, 'auction_rated_idx')
+
+    def test_closed_auctions(self):
+        Auction.objects.filter(pk=self.auction.pk).update(closing_date=timezone.now() - timedelta(days=1))
+        plan = self.main_query_plan(reverse('auctions:auction-list-create'), 'auctions_auction', open='false')
+        self.assertUsesIndex(plan, 'auction_closing_idx')
+
+    def test_next_closing(self):
+        query = Auction.objects.filter(closing_date__gt=timezone.now()).order_by('closing_date')[:1]
+        self.assertUsesIndex(query.explain(), 'auction_closing_idx')
+
+    def test_winning_bid(self):
+        query = Bid.objects.filter(auction=self.auction).order_by('-price', 'id')[:1]
+        self.assertUsesIndex(query.explain(), 'bid_auction_price_idx')
+        self.assertNotIn('TEMP B-TREE', query.explain())
+
+    def test_user_bids(self):
+        self.client.force_authenticate(self.owner)
+        plan = self.main_query_plan(reverse('users:user-bids'), 'auctions_bid')
+        self.assertUsesIndex(plan, 'bid_bidder_id_idx')
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_auction_comments(self):
+        plan = self.main_query_plan(reverse('auctions:comment-list-create', args=[self.auction.id]), 'auctions_comment')
+        self.assertUsesIndex(plan, 'comment_auction_created_idx')
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_user_comments(self):
+        self.client.force_authenticate(self.owner)
+        plan = self.main_query_plan(reverse('auctions:user-comments'), 'auctions_comment')
+        self.assertUsesIndex(plan, 'comment_user_id_idx')
+        self.assertNotIn('TEMP B-TREE', plan)
+
+
+class AsyncReadViewTests(AuctionDataMixin, APITestCase):
+    """Los GET asíncronos (async_views.py) responden lo mismo que las vistas síncronas."""
+    HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Allow', 'Vary', 'X-Cache', 'WWW-Authenticate')
+
+    def summary(self, response, content):
+        return response.status_code, content, {header: response.get(header) for header in self.HEADERS}
+
+    def fetch(self, view_class, url, kwargs, headers):
+        response = view_class.as_view()(RequestFactory().get(url, headers=headers), **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        content = b''.join(response.streaming_content) if response.streaming else response.content
+        return self.summary(response, content)
+
+    async def afetch(self, view_class, url, kwargs, headers):
+        response = await view_class.as_read_view()(AsyncRequestFactory().get(url, headers=headers), **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        content = b''.join([chunk async for chunk in response]) if response.streaming else response.content
+        return self.summary(response, content)
+
+    def assertSameResponse(self, view_class, url, headers=None, clear=True, **kwargs):
+        headers = headers or {}
+        if clear:
+            cache.clear()
+        expected = self.fetch(view_class, url, kwargs, headers)
+        if clear:
+            cache.clear()
+        actual = async_to_sync(self.afetch)(view_class, url, kwargs, headers)
+        self.assertEqual(actual, expected)
+        return actual
+
+    def test_categories(self):
+        url = reverse('auctions:category-list-create')
+        self.assertEqual(self.assertSameResponse(CategoryListCreate, url)[0], 200)
+        self.assertSameResponse(CategoryListCreate, url + '?page=2')
+        self.assertEqual(self.assertSameResponse(CategoryListCreate, url + '?page=9')[0], 404)
+
+    def test_sync_get_fallback(self):
+        # Una vista sin aget propio responde con su get síncrono en lugar de fallar
+        view_class = type('SyncCategoryList', (CategoryListCreate,), {'aget': AsyncReadMixin.aget})
+        url = reverse('auctions:category-list-create')
+        self.assertEqual(self.assertSameResponse(view_class, url)[0], 200)
+        self.assertEqual(self.assertSameResponse(view_class, url + '?page=9')[0], 404)
+
+    def test_auction_list(self):
+        url = reverse('auctions:auction-list-create')
+        status, content, headers = self.assertSameResponse(AuctionListCreate, url)
+        self.assertEqual((status, headers['X-Cache']), (200, 'MISS'))
+        cursor = self.assertSameResponse(AuctionListCreate, url + '?pagination=cursor')[1]
+        self.assertSameResponse(AuctionListCreate, json.loads(cursor)['next'])
+        for query in ('?page=2', f'?category={self.categories[1].id}', '?search=Propia', '?open=false',
+                      '?price_min=6&price_max=12&rating=1', '?output=json'):
+            self.assertEqual(self.assertSameResponse(AuctionListCreate, url + query)[0], 200, query)
+        for query in ('?category=0', '?search=ab', '?price_min=x', '?closing_before=ayer', '?output=ndjson'):
+            self.assertEqual(self.assertSameResponse(AuctionListCreate, url + query)[0], 400, query)
+
+    def test_auction_detail(self):
+        url = reverse('auctions:auction-detail', args=[self.auction.id])
+        status, content, headers = self.assertSameResponse(AuctionRetrieveUpdateDestroy, url, pk=self.auction.id)
+        self.assertEqual(status, 200)
+        self.assertSameResponse(AuctionRetrieveUpdateDestroy, url, {'If-None-Match': headers['ETag']}, pk=self.auction.id)
+        self.assertEqual(self.assertSameResponse(
+            AuctionRetrieveUpdateDestroy, url, {'Authorization': '', 'If-None-Match': headers['ETag']},
+            pk=self.auction.id)[0], 304)
+        self.assertEqual(self.assertSameResponse(AuctionRetrieveUpdateDestroy, '/api/auctions/0/', pk=0)[0], 404)
+
+    def test_bid_and_comment_lists(self):
+        for view_class, name in ((BidListCreate, 'auctions:bid-list-create'),
+                                 (CommentListCreateView, 'auctions:comment-list-create')):
+            url = reverse(name, args=[self.auction.id])
+            status, content, headers = self.assertSameResponse(view_class, url, auction_id=self.auction.id)
+            self.assertEqual(status, 200)
+            self.assertEqual(self.assertSameResponse(
+                view_class, url, {'If-None-Match': headers['ETag']}, auction_id=self.auction.id)[0], 304)
+            for query in ('?page=2', '?pagination=cursor'):
+                self.assertSameResponse(view_class, url + query, auction_id=self.auction.id)
+            self.assertEqual(self.assertSameResponse(
+                view_class, url + '?output=ndjson', auction_id=self.auction.id)[0], 400)
+
+    def test_authentication(self):
+        url = reverse('auctions:auction-list-create')
+        token = RefreshToken.for_user(self.users[0]).access_token
+        self.assertEqual(self.assertSameResponse(AuctionListCreate, url, {'Authorization': f'Bearer {token}'})[0], 200)
+        self.assertEqual(self.assertSameResponse(AuctionListCreate, url, {'Authorization': 'Bearer x'})[0], 401)
+
+    def test_cache_hit(self):
+        url = reverse('auctions:auction-list-create')
+        cache.clear()
+        self.fetch(AuctionListCreate, url, {}, {})
+        hit = async_to_sync(self.afetch)(AuctionListCreate, url, {}, {})
+        self.assertEqual(hit[2]['X-Cache'], 'HIT')
+        self.assertEqual(hit, self.assertSameResponse(AuctionListCreate, url, clear=False))
+
+    def test_writes_use_sync_view(self):
+        view = BidListCreate.as_read_view()
+        self.assertTrue(iscoroutinefunction(view))
+        self.assertIs(view.cls, BidListCreate)
+        request = AsyncRequestFactory().post(reverse('auctions:bid-list-create', args=[self.auctions[2].id]),
+                                             {'price': '500'}, content_type='application/json',
+                                             headers={'Authorization': f'Bearer {RefreshToken.for_user(self.owner).access_token}'})
+        response = async_to_sync(view)(request, auction_id=self.auctions[2].id)
+        self.assertEqual(response.status_code, 201)
+        with self.settings(ASYNC_READ_VIEWS=False):
+            self.assertFalse(iscoroutinefunction(read_view(BidListCreate)))
+
+    def test_metrics_in_async_mode(self):
+        # El middleware ve las consultas aunque se ejecuten en el hilo de sync_to_async
+        response = async_to_sync(AsyncClient().get)(reverse('auctions:bid-list-create', args=[self.auction.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response['Server-Timing'], r'desc="[1-9]\d* queries"')
 
-# Create your tests here.
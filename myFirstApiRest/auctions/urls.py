@@ -1,19 +1,27 @@
 from django.urls import path
-from .views import CategoryListCreate, CategoryRetrieveUpdateDestroy, AuctionListCreate, AuctionRetrieveUpdateDestroy, BidListCreate, BidRetrieveUpdateDestroy, UserAuctionListView, CommentListCreateView, CommentRetrieveUpdateDestroyView, RatingListCreate, RatingRetrieveUpdateDestroy,UserRatingDetail, UserCommentsView
+from .async_views import read_view
+from .views import CategoryListCreate, CategoryRetrieveUpdateDestroy, AuctionListCreate, AuctionRetrieveUpdateDestroy, BidListCreate, BidRetrieveUpdateDestroy, UserAuctionListView, CommentListCreateView, CommentRetrieveUpdateDestroyView, RatingListCreate, RatingRetrieveUpdateDestroy,UserRatingDetail, UserCommentsView, bid_stream, CacheStatsView, BulkBidCreate, BulkCommentCreate, BulkRatingCreate, AuctionImportView, ExportView
 app_name="auctions"
 urlpatterns = [
-    path('categories/', CategoryListCreate.as_view(), name='category-list-create'),
+    path('categories/', read_view(CategoryListCreate), name='category-list-create'),
     path('categories/<int:pk>/', CategoryRetrieveUpdateDestroy.as_view(), name='category-detail'),
-    path('', AuctionListCreate.as_view(), name='auction-list-create'),
-    path('<int:pk>/', AuctionRetrieveUpdateDestroy.as_view(), name='auction-detail'),
-    path('<int:auction_id>/bid/', BidListCreate.as_view(), name='bid-list-create'),
+    path('', read_view(AuctionListCreate), name='auction-list-create'),
+    path('<int:pk>/', read_view(AuctionRetrieveUpdateDestroy), name='auction-detail'),
+    path('<int:auction_id>/bid/', read_view(BidListCreate), name='bid-list-create'),
     path('<int:auction_id>/bid/<int:pk>/', BidRetrieveUpdateDestroy.as_view(), name='bid-detail'),
+    path('<int:auction_id>/bid/stream/', bid_stream, name='bid-stream'),
     path('users/', UserAuctionListView.as_view(), name='action-from-users'),
     path('myAuctions/',UserAuctionListView.as_view(),name ="user-auctions" ),
-    path('<int:auction_id>/comments/', CommentListCreateView.as_view(), name='comment-list-create'),
+    path('<int:auction_id>/comments/', read_view(CommentListCreateView), name='comment-list-create'),
     path('<int:auction_id>/comments/<int:pk>/', CommentRetrieveUpdateDestroyView.as_view(), name='comment-detail'),
     path('<int:auction_id>/rating/', RatingListCreate.as_view(), name='auction-rating'),
     path('<int:auction_id>/ratings/<int:pk>/', RatingRetrieveUpdateDestroy.as_view(), name='rating-detail'),
     path('<int:auction_id>/rating/user/', UserRatingDetail.as_view(), name='user-rating'),
     path('user/comments/', UserCommentsView.as_view(), name='user-comments'),
+    path('import/', AuctionImportView.as_view(), name='auction-import'),
+    path('export/<slug:name>/', ExportView.as_view(), name='export'),
+    path('cache/stats/', CacheStatsView.as_view(), name='cache-stats'),
+    path('bulk/bids/', BulkBidCreate.as_view(), name='bulk-bids'),
+    path('bulk/comments/', BulkCommentCreate.as_view(), name='bulk-comments'),
+    path('bulk/ratings/', BulkRatingCreate.as_view(), name='bulk-ratings'),
 ]
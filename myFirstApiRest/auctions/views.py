@@ -1,19 +1,108 @@
+import asyncio
+import io
+
+from django.conf import settings
 from django.shortcuts import render
+from django.db import transaction
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
 from rest_framework import generics, status
 from .models import Category, Auction, Bid, Rating, Comment
-from .serializers import CategoryListCreateSerializer, CategoryDetailSerializer, AuctionListCreateSerializer, AuctionDetailSerializer, BidDetailSerializer, BidListCreateSerializer, RatingListCreateSerializer, CommentSerializer
-from django.db.models import Q
-from rest_framework.exceptions import ValidationError
+from .serializers import CategoryListCreateSerializer, CategoryDetailSerializer, AuctionListCreateSerializer, AuctionDetailSerializer, BidDetailSerializer, BidListCreateSerializer, RatingListCreateSerializer, CommentSerializer, BulkBidSerializer, BulkCommentSerializer, BulkRatingSerializer
+from django.db.models import BooleanField, ExpressionWrapper, Q
+from rest_framework.exceptions import ParseError, ValidationError
+from rest_framework.parsers import MultiPartParser
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
 from rest_framework.response import Response
-from .permisions import IsOwnerOrAdmin, IsBidOwnerOrAdmin, IsCommentOwnerOrAdmin
-from django.db.models import Avg
+from myFirstApiRest.fastjson import FastJSONRenderer
+from myFirstApiRest.throttling import BidThrottle, BulkBidThrottle
+from users.models import CustomUser
+from .permisions import IsOwnerOrAdmin, IsBidOwnerOrAdmin, IsCommentOwnerOrAdmin, IsRatingOwnerOrAdmin
 from drf_spectacular.utils import extend_schema
-
-
-
-class CategoryListCreate(generics.ListCreateAPIView):
+from .search import search_auctions
+from .pagination import (
+    AuctionPagination, BidPagination, CommentPagination, UserAuctionPagination, UserCommentPagination,
+)
+from .ratings import rate_auction, change_rating, remove_rating
+from .bidding import change_bid, place_bid, remove_bid
+from .pubsub import get_broker, bid_channel
+from .cache import VersionedCacheMixin, cache_stats
+from .fast_serializers import (
+    FastListMixin, AuctionListFastSerializer, BidListFastSerializer, CommentFastSerializer,
+)
+from .bulk import MAX_ITEMS as BULK_MAX_ITEMS, bulk_place_bids, bulk_create_comments, bulk_rate_auctions
+from .importer import READERS as IMPORT_READERS, AuctionImporter, guess_format
+from .export import EXPORTS, OUTPUTS as EXPORT_OUTPUTS, astream_export, parse_moment, stream_export
+from .conditional import (
+    aconditional_get, conditional_get, aauction_validators, abid_list_validators, acomment_list_validators,
+    auction_validators, bid_list_validators, comment_list_validators,
+)
+from .async_views import AsyncReadMixin
+
+# Relaciones que recorre CommentSerializer (usuario, subasta y su categoría)
+COMMENT_RELATED = ('user', 'auction__category')
+# Modelos que aparecen en la respuesta de una subasta (precio actual, rating, nombres)
+AUCTION_CACHE_MODELS = ('auctions.Auction', 'auctions.Category', 'auctions.Bid', 'auctions.Rating', settings.AUTH_USER_MODEL)
+
+
+def annotate_is_open(queryset, now=None):
+    """Calcula ``is_open`` en la base de datos con una sola hora para toda la página."""
+    now = now or timezone.now()
+    return queryset.annotate(is_open=ExpressionWrapper(Q(closing_date__gt=now), output_field=BooleanField()))
+
+
+def parse_datetime_param(params, name):
+    try:
+        return parse_moment(params.get(name))
+    except ValueError:
+        raise ValidationError({name: "Must be an ISO 8601 date or datetime."}, code=status.HTTP_400_BAD_REQUEST)
+
+
+def filter_open(queryset, params, now, field='closing_date'):
+    """Filtro ``open=true|false`` sobre la fecha de cierre ``field``."""
+    is_open = params.get('open', None)
+    if is_open:
+        if is_open.lower() not in ('true', 'false'):
+            raise ValidationError({"open": "Open must be true or false."}, code=status.HTTP_400_BAD_REQUEST)
+        if is_open.lower() == 'true':
+            queryset = queryset.filter(**{f'{field}__gt': now})
+        else:
+            queryset = queryset.filter(**{f'{field}__lte': now})
+    return queryset
+
+
+def filter_closing(queryset, params, now):
+    """Filtros ``open``, ``closing_before`` y ``closing_after`` de los listados de subastas."""
+    queryset = filter_open(queryset, params, now)
+    closing_before = parse_datetime_param(params, 'closing_before')
+    closing_after = parse_datetime_param(params, 'closing_after')
+    if closing_before and closing_after and closing_after >= closing_before:
+        raise ValidationError({"closing_before": "Closing before must be later than closing after."},
+                              code=status.HTTP_400_BAD_REQUEST)
+    if closing_before:
+        queryset = queryset.filter(closing_date__lt=closing_before)
+    if closing_after:
+        queryset = queryset.filter(closing_date__gt=closing_after)
+    return queryset
+
+
+def filter_date_range(queryset, params, field):
+    """Filtros ``since`` (incluido) y ``until`` (excluido) sobre ``field``."""
+    since = parse_datetime_param(params, 'since')
+    until = parse_datetime_param(params, 'until')
+    if since and until and since >= until:
+        raise ValidationError({"until": "Until must be later than since."}, code=status.HTTP_400_BAD_REQUEST)
+    if since:
+        queryset = queryset.filter(**{f'{field}__gte': since})
+    if until:
+        queryset = queryset.filter(**{f'{field}__lt': until})
+    return queryset
+
+
+class CategoryListCreate(VersionedCacheMixin, AsyncReadMixin, generics.ListCreateAPIView):
+    cache_models = ('auctions.Category',)
     queryset = Category.objects.all() # Que dato tengo que devolver
     serializer_class = CategoryListCreateSerializer # Como lo devuelvo
     def get_permissions(self):
@@ -21,17 +110,32 @@ class CategoryListCreate(generics.ListCreateAPIView):
             return [AllowAny()]  # cualquier usuario puede ver
         return [IsAdminUser()] 
 
+    async def aget(self, request, *args, **kwargs):
+        return await self.alist(request, *args, **kwargs)
+
 class CategoryRetrieveUpdateDestroy(generics.RetrieveUpdateDestroyAPIView):
     queryset = Category.objects.all()
     serializer_class = CategoryDetailSerializer
     permission_classes = [IsAdminUser]
 
-class AuctionListCreate(generics.ListCreateAPIView):
+class AuctionListCreate(VersionedCacheMixin, FastListMixin, AsyncReadMixin, generics.ListCreateAPIView):
+    cache_models = AUCTION_CACHE_MODELS
+    cache_until_auction_closes = True
     queryset = Auction.objects.all()
     serializer_class = AuctionListCreateSerializer
+    fast_serializer_class = AuctionListFastSerializer
     permission_classes = [AllowAny] 
+    pagination_class = AuctionPagination
+    # Resultado de la comprobación de la categoría hecha ya por aget (get_queryset no puede consultar allí)
+    category_checked = None
+
+    def category_exists(self, category_id):
+        if self.category_checked is not None:
+            return self.category_checked
+        return Category.objects.filter(id=category_id).exists()
+
     def get_queryset(self):
-        queryset = Auction.objects.all()
+        queryset = Auction.objects.select_related('auctioneer', 'category')
         params = self.request.query_params
         search = params.get('search', None)
         if search and len(search) < 3:
@@ -39,10 +143,10 @@ class AuctionListCreate(generics.ListCreateAPIView):
                 {"search": "Search query must be at least 3 characters long."}, code=status.HTTP_400_BAD_REQUEST)
 
         if search:
-            queryset = queryset.filter(Q(title__icontains=search) | Q(description__icontains=search))
+            queryset = search_auctions(queryset, search)  # Ordenado por relevancia
         category_id = params.get('category', None)
         if category_id:
-            if not Category.objects.filter(id=category_id).exists():
+            if not self.category_exists(category_id):
                 raise ValidationError(
                     {"category": "Category must be a valid category id."}, code=status.HTTP_400_BAD_REQUEST)
             queryset = queryset.filter(category_id=category_id)
@@ -75,23 +179,49 @@ class AuctionListCreate(generics.ListCreateAPIView):
             try:
                 rating_min = float(rating_min)
                 queryset = queryset.filter(rating__gte=rating_min)
+                if rating_min > 0:
+                    # Condición del índice parcial auction_rated_idx
+                    queryset = queryset.filter(rating_count__gt=0)
             except ValueError:
                 raise ValidationError({"rating": "Rating must be a number between 0 and 5."}, code=status.HTTP_400_BAD_REQUEST)
 
-        return queryset
+        # Filtrado por estado y fecha de cierre (índice auction_closing_idx)
+        now = timezone.now()
+        queryset = filter_closing(queryset, params, now)
+        return annotate_is_open(queryset, now)
+
 
+    async def aget(self, request, *args, **kwargs):
+        category_id = request.query_params.get('category', None)
+        if category_id:
+            self.category_checked = await Category.objects.filter(id=category_id).aexists()
+        return await self.alist(request, *args, **kwargs)
     
     def perform_create(self, serializer):
         serializer.save(auctioneer=self.request.user)
 
 
-class AuctionRetrieveUpdateDestroy(generics.RetrieveUpdateDestroyAPIView):
+class AuctionRetrieveUpdateDestroy(VersionedCacheMixin, AsyncReadMixin, generics.RetrieveUpdateDestroyAPIView):
+    cache_models = AUCTION_CACHE_MODELS
+    cache_until_auction_closes = True
     permission_classes = [IsOwnerOrAdmin] 
-    queryset = Auction.objects.all()
+    queryset = Auction.objects.select_related('auctioneer', 'category')
     serializer_class = AuctionDetailSerializer
 
-class BidListCreate(generics.ListCreateAPIView):
+    @conditional_get(auction_validators)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    @aconditional_get(aauction_validators)
+    async def aget(self, request, *args, **kwargs):
+        return await self.aretrieve(request, *args, **kwargs)
+
+class BidListCreate(FastListMixin, AsyncReadMixin, generics.ListCreateAPIView):
     serializer_class = BidListCreateSerializer
+    fast_serializer_class = BidListFastSerializer
+    pagination_class = BidPagination
+    # Solo limitan los POST: las pujas se disparan al cierre de la subasta
+    throttle_classes = [BidThrottle]
     
     def get_permissions(self):
         if self.request.method == 'GET':
@@ -99,11 +229,24 @@ class BidListCreate(generics.ListCreateAPIView):
         return [IsAuthenticated()]
 
     def get_queryset(self):
-        return Bid.objects.filter(auction_id=self.kwargs['auction_id'])
+        return Bid.objects.filter(auction_id=self.kwargs['auction_id']).select_related('bidder')
+
+    @conditional_get(bid_list_validators)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    @aconditional_get(abid_list_validators)
+    async def aget(self, request, *args, **kwargs):
+        return await self.alist(request, *args, **kwargs)
 
     def perform_create(self, serializer):
-        auction_id = self.kwargs['auction_id']
-        serializer.save(auction_id=auction_id, bidder=self.request.user)
+        # La validación de importe y cierre se hace de forma atómica en place_bid
+        serializer.instance = place_bid(
+            self.kwargs['auction_id'], self.request.user, serializer.validated_data['price'])
+        # Se emite a los clientes de bid_stream una vez confirmada la transacción
+        message = FastJSONRenderer().render(serializer.data).decode()
+        channel = bid_channel(self.kwargs['auction_id'])
+        transaction.on_commit(lambda: get_broker().publish(channel, message))
 
 
 class BidRetrieveUpdateDestroy(generics.RetrieveUpdateDestroyAPIView):
@@ -111,20 +254,37 @@ class BidRetrieveUpdateDestroy(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsBidOwnerOrAdmin]
 
     def get_queryset(self):
-        return Bid.objects.filter(auction_id=self.kwargs['auction_id'])
+        return Bid.objects.filter(auction_id=self.kwargs['auction_id']).select_related('bidder')
+
+    def perform_update(self, serializer):
+        # El importe es lo único editable de una puja
+        if 'price' in serializer.validated_data:
+            change_bid(serializer.instance, serializer.validated_data['price'])
+
+    def perform_destroy(self, instance):
+        remove_bid(instance)
     
 
-class UserAuctionListView(APIView):
+class UserAuctionListView(FastListMixin, generics.ListAPIView):
+    """Subastas del usuario, paginadas por cursor y con los filtros de cierre y ``since``/``until``."""
     permission_classes = [IsAuthenticated]
     serializer_class = AuctionListCreateSerializer
-    def get(self, request, *args, **kwargs):
-        user_auctions = Auction.objects.filter(auctioneer=request.user)
-        serializer = AuctionListCreateSerializer(user_auctions, many=True)
-        return Response(serializer.data)
+    fast_serializer_class = AuctionListFastSerializer
+    pagination_class = UserAuctionPagination
+    ndjson_output = True
+
+    def get_queryset(self):
+        params = self.request.query_params
+        now = timezone.now()
+        queryset = Auction.objects.filter(auctioneer=self.request.user).order_by('id')
+        queryset = filter_date_range(filter_closing(queryset, params, now), params, 'creation_date')
+        return annotate_is_open(queryset, now)
     
 
-class CommentListCreateView(generics.ListCreateAPIView):
+class CommentListCreateView(FastListMixin, AsyncReadMixin, generics.ListCreateAPIView):
     serializer_class = CommentSerializer
+    fast_serializer_class = CommentFastSerializer
+    pagination_class = CommentPagination
 
     def get_permissions(self):
         if self.request.method == 'GET':
@@ -132,7 +292,15 @@ class CommentListCreateView(generics.ListCreateAPIView):
         return [IsAuthenticated()]
 
     def get_queryset(self):
-        return Comment.objects.filter(auction_id=self.kwargs['auction_id'])
+        return Comment.objects.filter(auction_id=self.kwargs['auction_id']).select_related(*COMMENT_RELATED)
+
+    @conditional_get(comment_list_validators)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    @aconditional_get(acomment_list_validators)
+    async def aget(self, request, *args, **kwargs):
+        return await self.alist(request, *args, **kwargs)
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user, auction_id=self.kwargs['auction_id'])
@@ -144,17 +312,27 @@ class CommentRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsCommentOwnerOrAdmin]
 
     def get_queryset(self):
-        return Comment.objects.filter(auction_id=self.kwargs['auction_id'])
+        return Comment.objects.filter(auction_id=self.kwargs['auction_id']).select_related(*COMMENT_RELATED)
 
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        # El Last-Modified del listado de comentarios sale de la subasta
+        Auction.objects.filter(pk=instance.auction_id).update(updated_at=timezone.now())
 
-class UserCommentsView(APIView):
+
+class UserCommentsView(FastListMixin, generics.ListAPIView):
+    """Comentarios del usuario, del último al primero, paginados por cursor."""
     permission_classes = [IsAuthenticated]
+    serializer_class = CommentSerializer
+    fast_serializer_class = CommentFastSerializer
+    pagination_class = UserCommentPagination
+    ndjson_output = True
 
-    def get(self, request):
-        user = request.user
-        comments = Comment.objects.filter(user=user).order_by('-updated_at')
-        serializer = CommentSerializer(comments, many=True)
-        return Response(serializer.data)
+    def get_queryset(self):
+        params = self.request.query_params
+        queryset = Comment.objects.filter(user=self.request.user).order_by('-id')
+        queryset = filter_open(queryset, params, timezone.now(), 'auction__closing_date')
+        return filter_date_range(queryset, params, 'created_at')
     
 
 class RatingListCreate(generics.ListCreateAPIView):
@@ -166,60 +344,178 @@ class RatingListCreate(generics.ListCreateAPIView):
         return [IsAuthenticated()]
 
     def get_queryset(self):
-        return Rating.objects.filter(auction_id=self.kwargs['auction_id'])
+        return Rating.objects.filter(auction_id=self.kwargs['auction_id']).select_related('user')
 
     def perform_create(self, serializer):
-        auction_id = self.kwargs['auction_id']
-        value = serializer.validated_data['value']
-        rating, created = Rating.objects.update_or_create(
-            user=self.request.user,
-            auction_id=auction_id,
-            defaults={'value': value}
-        )
-        self._rating_instance = rating
-        self.update_mean(auction_id)
+        self._rating_instance = rate_auction(
+            self.request.user, self.kwargs['auction_id'], serializer.validated_data['value'])
 
     def create(self, request, *args, **kwargs):
         response = super().create(request, *args, **kwargs)
         serializer = self.get_serializer(self._rating_instance)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
-
-    def update_mean(self, auction_id):
-        auction = Auction.objects.get(pk=auction_id)
-        ratings = Rating.objects.filter(auction_id=auction_id)
-        avg = ratings.aggregate(Avg('value'))['value__avg']
-        auction.rating = round(avg, 2) if avg else 0
-        auction.save()
         
 
 class RatingRetrieveUpdateDestroy(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = RatingListCreateSerializer
-    permission_classes = [IsAuthenticated, IsOwnerOrAdmin]
+    permission_classes = [IsAuthenticated, IsRatingOwnerOrAdmin]
 
     def get_queryset(self):
-        return Rating.objects.filter(auction_id=self.kwargs['auction_id'])
+        return Rating.objects.filter(auction_id=self.kwargs['auction_id']).select_related('user')
     def perform_update(self, serializer):
-        instance = serializer.save()
-        self.update_mean(instance.auction_id)
+        change_rating(serializer.instance, serializer.validated_data.get('value', serializer.instance.value))
 
     def perform_destroy(self, instance):
-        auction_id = instance.auction_id
-        instance.delete()
-        self.update_mean(auction_id)
-
-    def update_mean(self, auction_id):
-        auction = Auction.objects.get(pk=auction_id)
-        avg = Rating.objects.filter(auction_id=auction_id).aggregate(Avg('value'))['value__avg']
-        auction.rating = round(avg, 2) if avg else 0
-        auction.save()
+        remove_rating(instance)
 
 class UserRatingDetail(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, auction_id):
         try:
-            rating = Rating.objects.get(user=request.user, auction_id=auction_id)
+            rating = Rating.objects.select_related('user').get(user=request.user, auction_id=auction_id)
             serializer = RatingListCreateSerializer(rating)
             return Response(serializer.data, status=200)
         except Rating.DoesNotExist:
-            return Response({"detail": "No rating found"}, status=404)
\ No newline at end of file
+            return Response({"detail": "No rating found"}, status=404)
+
+
+class BulkCreateView(APIView):
+    """
+    Recibe una lista de elementos y devuelve el resultado de cada uno: 201 si se
+    han creado todos, 207 si solo algunos y 400 si ninguno.
+    """
+    permission_classes = [IsAuthenticated]
+    bulk_operation = None
+
+    def post(self, request):
+        items = request.data
+        if not isinstance(items, list) or not items:
+            raise ValidationError({"detail": "Expected a non-empty list of items."})
+        if len(items) > BULK_MAX_ITEMS:
+            raise ValidationError({"detail": f"At most {BULK_MAX_ITEMS} items per request."})
+        data, code = self.bulk_operation(request.user, items)
+        return Response(data, status=code)
+
+
+class BulkBidCreate(BulkCreateView):
+    serializer_class = BulkBidSerializer
+    throttle_classes = [BulkBidThrottle]
+    bulk_operation = staticmethod(bulk_place_bids)
+
+
+class BulkCommentCreate(BulkCreateView):
+    serializer_class = BulkCommentSerializer
+    bulk_operation = staticmethod(bulk_create_comments)
+
+
+class BulkRatingCreate(BulkCreateView):
+    serializer_class = BulkRatingSerializer
+    bulk_operation = staticmethod(bulk_rate_auctions)
+
+
+class AuctionImportView(APIView):
+    """
+    Importación masiva de subastas (solo administradores). Recibe un fichero
+    CSV o NDJSON en ``file`` y devuelve el resumen con una muestra de las filas
+    rechazadas. ``auctioneer`` (nombre de usuario) es opcional.
+    """
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise ValidationError({"file": "This field is required."})
+        input_format = request.data.get('input_format') or guess_format(upload.name)
+        if input_format not in IMPORT_READERS:
+            raise ValidationError({"input_format": f"Must be one of: {', '.join(sorted(IMPORT_READERS))}."})
+        auctioneer = request.user
+        if request.data.get('auctioneer'):
+            auctioneer = CustomUser.objects.filter(username=request.data['auctioneer']).first()
+            if auctioneer is None:
+                raise ValidationError({"auctioneer": "User not found."})
+
+        importer = AuctionImporter(auctioneer)
+        try:
+            importer.run(IMPORT_READERS[input_format](io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')))
+        except UnicodeDecodeError:
+            raise ParseError('The file must be UTF-8.')
+        code = status.HTTP_201_CREATED if importer.created else status.HTTP_400_BAD_REQUEST
+        return Response(importer.summary(), status=code)
+
+
+class ExportView(APIView):
+    """
+    Volcado completo de ``auctions``, ``bids`` o ``ratings`` (solo
+    administradores) en CSV o NDJSON según ``output``, con filtros
+    ``since``/``until`` sobre ``creation_date``. La respuesta se genera por
+    bloques y no se carga la tabla en memoria; con ASGI, con un iterador
+    asíncrono (Django cargaría entero uno síncrono).
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, name):
+        if name not in EXPORTS:
+            raise Http404
+        output = request.query_params.get('output', 'csv')
+        if output not in EXPORT_OUTPUTS:
+            raise ValidationError({"output": f"Must be one of: {', '.join(EXPORT_OUTPUTS)}."})
+        since = parse_datetime_param(request.query_params, 'since')
+        until = parse_datetime_param(request.query_params, 'until')
+        stream = astream_export if isinstance(request._request, ASGIRequest) else stream_export
+        response = StreamingHttpResponse(stream(name, output, since, until), content_type=EXPORT_OUTPUTS[output])
+        response['Content-Disposition'] = f'attachment; filename="{name}.{output}"'
+        return response
+
+
+class CacheStatsView(APIView):
+    """Aciertos y fallos de la caché de respuestas."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(cache_stats())
+
+
+# Cada cuántos segundos se envía un comentario para mantener viva la conexión
+STREAM_KEEPALIVE = 15
+
+
+class BidEventStream:
+    """
+    Iterador asíncrono con los eventos SSE de una suscripción. Django llama a
+    ``close()`` al terminar la respuesta, lo que da de baja al suscriptor.
+    """
+    def __init__(self, subscription):
+        self.subscription = subscription
+        self.started = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.started:
+            self.started = True
+            return 'retry: 3000\n\n'
+        try:
+            message = await asyncio.wait_for(self.subscription.get(), timeout=STREAM_KEEPALIVE)
+        except asyncio.TimeoutError:
+            return ': keep-alive\n\n'
+        return f'event: bid\ndata: {message}\n\n'
+
+    def close(self):
+        self.subscription.close()
+
+
+async def bid_stream(request, auction_id):
+    """
+    Server-Sent Events con las pujas nuevas de una subasta (evento ``bid`` con el
+    mismo JSON que devuelve ``BidListCreate``). Necesita servirse con ASGI.
+    """
+    if not await Auction.objects.filter(pk=auction_id).aexists():
+        raise Http404("Auction not found.")
+    stream = BidEventStream(get_broker().subscribe(bid_channel(auction_id)))
+    response = StreamingHttpResponse(stream, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
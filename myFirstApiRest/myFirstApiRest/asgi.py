@@ -12,5 +12,9 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'myFirstApiRest.settings')
+# Con ASGI los GET de lectura usan las vistas asíncronas (auctions/async_views.py)
+os.environ.setdefault('ASYNC_READ_VIEWS', 'true')
+# Cada petición usa un hilo nuevo: una conexión persistente no se reutilizaría (mejor DB_POOL)
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
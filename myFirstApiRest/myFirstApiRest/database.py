@@ -0,0 +1,55 @@
+"""
+Conexiones a la base de datos: persistentes o con pool.
+
+Con la configuración por defecto de Django cada petición abre una conexión y
+la cierra al terminar; con PostgreSQL eso es, en cada llamada, la conexión TCP
+(y TLS), la autenticación y el arranque del proceso en el servidor.
+:func:`database_config` construye ``DATABASES['default']`` a partir de
+``DATABASE_URL`` con una de estas dos estrategias:
+
+* Conexiones persistentes (``DB_CONN_MAX_AGE`` segundos, 60 por defecto): cada
+  hilo conserva su conexión entre peticiones. Es lo adecuado con WSGI
+  (gunicorn con workers ``sync`` o ``gthread``): una conexión por hilo.
+* Pool de psycopg 3 (``DB_POOL=true``, solo PostgreSQL): cada proceso tiene
+  entre ``DB_POOL_MIN_SIZE`` y ``DB_POOL_MAX_SIZE`` conexiones que se prestan a
+  la petición y se devuelven al terminar; si no hay ninguna libre se espera
+  ``DB_POOL_TIMEOUT`` segundos. Es lo adecuado con ASGI, donde cada petición
+  se ejecuta en un hilo nuevo y una conexión persistente no se volvería a usar
+  (``asgi.py`` pone ``DB_CONN_MAX_AGE=0`` por defecto). Necesita
+  ``psycopg[pool]``: psycopg2 no tiene pool. Django no admite pool y
+  conexiones persistentes a la vez, así que con pool ``CONN_MAX_AGE`` es 0.
+
+Con ``DB_CONN_HEALTH_CHECKS`` (activo por defecto) una conexión reutilizada se
+comprueba antes de la primera consulta de cada petición y, si se ha caído
+(reinicio del servidor, timeout de un proxy), se abre otra en lugar de fallar
+la petición. Con pool la comprobación la hace el pool al prestar la conexión.
+
+Las conexiones abiertas contra el servidor son como mucho ``workers × hilos``
+con conexiones persistentes y ``workers × DB_POOL_MAX_SIZE`` con pool; el
+total tiene que quedar por debajo de ``max_connections`` de PostgreSQL.
+"""
+import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
+
+POSTGRESQL_ENGINE = 'django.db.backends.postgresql'
+
+
+def database_config(url=None, conn_max_age=60, health_checks=True, pool=False, pool_min_size=2, pool_max_size=4,
+                    pool_timeout=10):
+    """``DATABASES['default']`` para ``url``, con conexiones persistentes o con pool."""
+    if not url:
+        return {}
+    config = dj_database_url.parse(url, conn_max_age=conn_max_age, conn_health_checks=health_checks)
+    if not pool:
+        return config
+    if config['ENGINE'] != POSTGRESQL_ENGINE:
+        raise ImproperlyConfigured('DB_POOL requires a PostgreSQL database.')
+    if not 0 < pool_min_size <= pool_max_size:
+        raise ImproperlyConfigured('DB_POOL_MIN_SIZE must be positive and not greater than DB_POOL_MAX_SIZE.')
+    config['CONN_MAX_AGE'] = 0
+    config.setdefault('OPTIONS', {})['pool'] = {
+        'min_size': pool_min_size,
+        'max_size': pool_max_size,
+        'timeout': pool_timeout,
+    }
+    return config
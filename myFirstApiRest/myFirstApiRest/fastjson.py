@@ -0,0 +1,78 @@
+"""
+Renderer y parser JSON basados en orjson.
+
+Generan exactamente los mismos bytes que ``JSONRenderer`` de DRF para lo que
+devuelven nuestros serializers (decimales y fechas ya formateados como texto,
+enteros, booleanos y ``null``). Los casos que orjson no puede reproducir igual
+se delegan en la implementación de DRF:
+
+- salida con sangría (``Accept: application/json; indent=4`` o la API navegable),
+  ``UNICODE_JSON = False`` o ``COMPACT_JSON = False``;
+- enteros de más de 64 bits, claves que no son texto y otros tipos que orjson
+  rechaza.
+
+Los ``datetime``, ``date`` y ``time`` sin formatear pasan por el encoder de DRF
+(milisegundos y sufijo ``Z``). orjson es opcional: si no está instalado ambas
+clases se comportan como las de DRF.
+
+La única diferencia conocida son los ``float`` que Python escribe con exponente
+(``1e+16`` frente a ``1e16``) y ``NaN``/``Infinity``, que orjson escribe como
+``null`` en vez de rechazarlos.
+"""
+import io
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from .metrics import timed
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+LINE_SEPARATORS = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+
+class FastJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timed('render'):
+            return self._render(data, accepted_media_type, renderer_context)
+
+    def _render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (orjson is None or self.ensure_ascii or not self.compact
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        encoder = self.encoder_class()
+        try:
+            ret = orjson.dumps(data, default=encoder.default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Igual que DRF: U+2028 y U+2029 escapados para que sea JavaScript válido
+        for raw, escaped in LINE_SEPARATORS:
+            if raw in ret:
+                ret = ret.replace(raw, escaped)
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace('_', '-') != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            # Mismos datos o mismo mensaje de error que JSONParser
+            # (p. ej. enteros de más de 64 bits o surrogates sueltos)
+            return super().parse(io.BytesIO(body), media_type, parser_context)
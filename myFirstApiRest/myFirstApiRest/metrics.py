@@ -0,0 +1,271 @@
+"""
+Métricas de rendimiento por petición.
+
+``MetricsMiddleware`` mide para cada petición el número de consultas y el tiempo
+en la base de datos (con ``execute_wrapper``, sin ``DEBUG``), el tiempo de
+serialización, el de renderizado y el total, y los devuelve en la cabecera
+``Server-Timing``. Los tiempos se acumulan en histogramas por vista
+(``AuctionListCreate``, ``BidListCreate``...) que ``views.MetricsView``
+expone en formato de texto de Prometheus en ``/api/metrics``.
+
+La serialización y el renderizado se miden donde ocurren: los serializers
+sobre ``values()`` (``FastSerializer``), los ``ModelSerializer`` con
+``TimedSerializerMixin`` y ``FastJSONRenderer``. El tiempo de base de datos
+que cae dentro de esas fases (p. ej. un queryset que se evalúa al
+serializarlo) se descuenta para que las fases no se solapen.
+
+El coste por petición son unas llamadas a ``perf_counter`` y una actualización
+de los histogramas bajo un lock. Los histogramas son de cada proceso: con
+varios workers, cada uno expone los suyos.
+
+Las consultas se interceptan con un único ``execute_wrapper`` permanente en
+cada conexión (:func:`instrument`) que reenvía a los wrappers activos en el
+contexto (:func:`watch_queries`). Con ASGI las consultas de una vista
+asíncrona se ejecutan en el hilo de ``sync_to_async``, con otra conexión que la
+del event loop; la ``ContextVar`` viaja con la petición a ese hilo y así no
+hace falta instalar nada en él.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+# Límites superiores de los cubos en segundos y en número de consultas
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+PHASES = ('serialize', 'render')
+# El método lo elige el cliente: el resto van a OTHER para no crear etiquetas sin límite
+METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'))
+
+_current = ContextVar('request_metrics', default=None)
+_wrappers = ContextVar('execute_wrappers', default=())
+
+
+def _execute(execute, sql, params, many, context):
+    for wrapper in reversed(_wrappers.get()):
+        execute = partial(wrapper, execute)
+    return execute(sql, params, many, context)
+
+
+def instrument(connection, **kwargs):
+    """Añade a ``connection`` el wrapper que reenvía a :func:`watch_queries`."""
+    if _execute not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_execute)
+
+
+# Las conexiones nuevas (p. ej. las de los hilos de sync_to_async) ya nacen instrumentadas
+connection_created.connect(instrument)
+
+
+@contextmanager
+def watch_queries(wrapper):
+    """Pasa por ``wrapper`` (con la firma de ``execute_wrapper``) las consultas de este contexto."""
+    for alias in connections:
+        instrument(connections[alias])
+    token = _wrappers.set(_wrappers.get() + (wrapper,))
+    try:
+        yield
+    finally:
+        _wrappers.reset(token)
+
+
+class RequestMetrics:
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self._depth = dict.fromkeys(PHASES, 0)
+
+    def __call__(self, execute, sql, params, many, context):
+        # execute_wrapper de cada conexión
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - start
+            self.queries += 1
+
+
+@contextmanager
+def timed(phase):
+    """Suma el tiempo del bloque a ``phase`` de la petición en curso (solo el nivel más externo)."""
+    metrics = _current.get()
+    if metrics is None or metrics._depth[phase]:
+        yield
+        return
+    metrics._depth[phase] += 1
+    db_before = metrics.db
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics._depth[phase] -= 1
+        metrics.phases[phase] += time.perf_counter() - start - (metrics.db - db_before)
+
+
+class TimedSerializerMixin:
+    """Cuenta la salida de un serializer de DRF como tiempo de serialización."""
+
+    def to_representation(self, instance):
+        with timed('serialize'):
+            return super().to_representation(instance)
+
+
+class Histogram:
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def samples(self):
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            yield bound, cumulative
+        yield 'sum', self.sum
+        yield 'count', cumulative
+
+
+class Registry:
+    """Histogramas por ``(métrica, vista, método)`` y contador de respuestas por estado."""
+    METRICS = {
+        'http_request_duration_seconds': ('Total time spent handling the request.', LATENCY_BUCKETS),
+        'http_request_db_seconds': ('Time spent in database queries.', LATENCY_BUCKETS),
+        'http_request_db_queries': ('Database queries per request.', QUERY_BUCKETS),
+        'http_request_serialize_seconds': ('Time spent serializing the response data.', LATENCY_BUCKETS),
+        'http_request_render_seconds': ('Time spent rendering the response body.', LATENCY_BUCKETS),
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+            self.responses = {}
+
+    def observe(self, view, method, status, total, metrics):
+        values = (
+            ('http_request_duration_seconds', total),
+            ('http_request_db_seconds', metrics.db),
+            ('http_request_db_queries', metrics.queries),
+            ('http_request_serialize_seconds', metrics.phases['serialize']),
+            ('http_request_render_seconds', metrics.phases['render']),
+        )
+        with self._lock:
+            for name, value in values:
+                key = (name, view, method)
+                histogram = self.histograms.get(key)
+                if histogram is None:
+                    histogram = self.histograms[key] = Histogram(self.METRICS[name][1])
+                histogram.observe(value)
+            key = (view, method, status)
+            self.responses[key] = self.responses.get(key, 0) + 1
+
+    def exposition(self):
+        """Texto en el formato de exposición de Prometheus (versión 0.0.4)."""
+        with self._lock:
+            histograms = sorted(self.histograms.items())
+            responses = sorted(self.responses.items())
+        lines = []
+        current = None
+        for (name, view, method), histogram in histograms:
+            if name != current:
+                current = name
+                lines += [f'# HELP {name} {self.METRICS[name][0]}', f'# TYPE {name} histogram']
+            labels = f'view="{_escape(view)}",method="{method}"'
+            for bound, value in histogram.samples():
+                if bound == 'sum':
+                    lines.append(f'{name}_sum{{{labels}}} {value:.6f}')
+                elif bound == 'count':
+                    lines.append(f'{name}_count{{{labels}}} {value}')
+                else:
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {value}')
+        lines += ['# HELP http_responses_total Responses by view, method and status code.',
+                  '# TYPE http_responses_total counter']
+        for (view, method, status), count in responses:
+            lines.append(f'http_responses_total{{view="{_escape(view)}",method="{method}",status="{status}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = Registry()
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    view = getattr(match.func, 'view_class', None) or getattr(match.func, 'cls', None) or match.func
+    return getattr(view, '__name__', match.view_name)
+
+
+def method_label(request):
+    return request.method if request.method in METHODS else 'OTHER'
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            with watch_queries(metrics):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, start)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            with watch_queries(metrics):
+                response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, start)
+
+    def finish(self, request, response, metrics, start):
+        total = time.perf_counter() - start
+        registry.observe(view_name(request), method_label(request), response.status_code, total, metrics)
+        if settings.SERVER_TIMING_HEADER:
+            response['Server-Timing'] = server_timing(metrics, total)
+        return response
+
+
+def server_timing(metrics, total):
+    parts = [f'db;dur={metrics.db * 1000:.2f};desc="{metrics.queries} queries"']
+    parts += [f'{phase};dur={metrics.phases[phase] * 1000:.2f}' for phase in PHASES]
+    parts.append(f'total;dur={total * 1000:.2f}')
+    return ', '.join(parts)
+
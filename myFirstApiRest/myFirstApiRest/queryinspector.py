@@ -0,0 +1,116 @@
+"""
+Detector de consultas N+1 y de consultas lentas.
+
+``QueryInspectorMiddleware`` intercepta las consultas de la petición (con
+``metrics.watch_queries``, también las de las vistas asíncronas) y agrupa las consultas por su forma: el SQL con los
+literales y los parámetros sustituidos por ``?`` y las listas ``IN (...)``
+colapsadas. Si una misma ``SELECT`` se repite ``QUERY_REPEAT_LIMIT`` veces o
+más en una petición es casi siempre una relación que se recorre fila a fila
+(``auction.category.name`` sin ``select_related``) y se avisa con la vista que
+la ha lanzado. Las consultas que tardan más de ``SLOW_QUERY_MS`` se registran
+también con su vista.
+
+En producción solo se escribe en el logger ``myFirstApiRest.queries``. Con
+``QUERY_INSPECTOR_RAISE`` (lo activa el runner de tests, ``test_runner.py``)
+las consultas repetidas lanzan :class:`QueryInspectionError` y el test falla.
+Las lentas nunca lanzan: dependen de la máquina.
+"""
+import logging
+import re
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .metrics import view_name, watch_queries
+
+logger = logging.getLogger('myFirstApiRest.queries')
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w"])-?\d+(?:\.\d+)?\b')
+_PARAM = re.compile(r'%s|%\(\w+\)s|\?')
+_IN_LIST = re.compile(r'\bIN \((?:\?, )*\?\)', re.IGNORECASE)
+_SPACES = re.compile(r'\s+')
+
+
+class QueryInspectionError(AssertionError):
+    pass
+
+
+def fingerprint(sql):
+    """Forma de la consulta: sin literales ni parámetros y con las listas ``IN`` colapsadas."""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PARAM.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _SPACES.sub(' ', sql).strip()
+
+
+class QueryInspector:
+
+    def __init__(self, repeat_limit=None, slow_ms=None):
+        self.repeat_limit = repeat_limit if repeat_limit is not None else settings.QUERY_REPEAT_LIMIT
+        self.slow_ms = slow_ms if slow_ms is not None else settings.SLOW_QUERY_MS
+        # fingerprint -> [veces, primer SQL]
+        self.shapes = {}
+        self.slow = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            if sql.lstrip()[:6].upper() == 'SELECT':
+                shape = fingerprint(sql)
+                seen = self.shapes.get(shape)
+                if seen is None:
+                    self.shapes[shape] = [1, sql]
+                else:
+                    seen[0] += 1
+            if elapsed >= self.slow_ms:
+                self.slow.append((elapsed, sql))
+
+    def watch(self):
+        return watch_queries(self)
+
+    def repeated(self):
+        return [(count, shape, sql) for shape, (count, sql) in self.shapes.items() if count >= self.repeat_limit]
+
+    def report(self, view, raise_errors=None):
+        for elapsed, sql in self.slow:
+            logger.warning('Slow query in %s (%.1f ms): %s', view, elapsed, sql[:1000])
+        repeated = self.repeated()
+        if not repeated:
+            return
+        lines = [f'{count}x {shape}' for count, shape, _ in repeated]
+        for line in lines:
+            logger.warning('Repeated query in %s (possible N+1): %s', view, line[:1000])
+        if settings.QUERY_INSPECTOR_RAISE if raise_errors is None else raise_errors:
+            raise QueryInspectionError(f'Repeated queries in {view}:\n' + '\n'.join(lines))
+
+
+class QueryInspectorMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        inspector = QueryInspector()
+        with inspector.watch():
+            response = self.get_response(request)
+        inspector.report(view_name(request))
+        return response
+
+    async def __acall__(self, request):
+        inspector = QueryInspector()
+        with inspector.watch():
+            response = await self.get_response(request)
+        inspector.report(view_name(request))
+        return response
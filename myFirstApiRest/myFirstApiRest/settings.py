@@ -13,9 +13,11 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 from pathlib import Path
 from datetime import timedelta
 import os
-import dj_database_url
+import sys
 from dotenv import load_dotenv
 
+from myFirstApiRest.database import database_config
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -50,6 +52,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Primero para que el tiempo total incluya al resto de middlewares
+    'myFirstApiRest.metrics.MetricsMiddleware',
+    'myFirstApiRest.queryinspector.QueryInspectorMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.security.SecurityMiddleware',
@@ -91,14 +96,20 @@ WSGI_APPLICATION = 'myFirstApiRest.wsgi.application'
 #         'NAME': BASE_DIR / 'db.sqlite3',
 #     }
 # }
-# load_dotenv()
-# DATABASES = {
-#     'default': dj_database_url.config(default=os.getenv("DATABASE_URL"))
-#     }
 
 load_dotenv()
+# Conexiones persistentes o pool de psycopg 3, y comprobación de las conexiones reutilizadas
+# (myFirstApiRest/database.py). Con ASGI, DB_CONN_MAX_AGE es 0 por defecto (asgi.py)
 DATABASES = {
-'default': dj_database_url.config(default=os.getenv("DATABASE_URL"))
+'default': database_config(
+    os.getenv("DATABASE_URL"),
+    conn_max_age=int(os.getenv('DB_CONN_MAX_AGE', 60)),
+    health_checks=os.getenv('DB_CONN_HEALTH_CHECKS', 'true').lower() == 'true',
+    pool=os.getenv('DB_POOL', 'false').lower() == 'true',
+    pool_min_size=int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+    pool_max_size=int(os.getenv('DB_POOL_MAX_SIZE', 4)),
+    pool_timeout=float(os.getenv('DB_POOL_TIMEOUT', 10)),
+)
 }
 
 # Password validation
@@ -147,15 +158,45 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 5,
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',),
+        # JWTAuthentication con el usuario cacheado (ver users/authentication.py)
+        'users.authentication.CachedJWTAuthentication',),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
+    # JSON con orjson (mismos bytes que JSONRenderer, ver fastjson.py)
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'myFirstApiRest.fastjson.FastJSONRenderer',
         'rest_framework.renderers.BrowsableAPIRenderer',
-    ]
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'myFirstApiRest.fastjson.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    # Proxies inversos delante de la aplicación (p. ej. 1 con nginx). Con 0 la IP de los límites es
+    # REMOTE_ADDR y no se hace caso de X-Forwarded-For, que el cliente puede falsear
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', 0)),
+    # Cubos de fichas de myFirstApiRest/throttling.py: ráfaga de N y N por periodo sostenidas
+    'DEFAULT_THROTTLE_RATES': {
+        'bid_user': os.getenv('THROTTLE_BID_USER', '30/min'),
+        'bid_ip': os.getenv('THROTTLE_BID_IP', '120/min'),
+        'bid_auction': os.getenv('THROTTLE_BID_AUCTION', '600/min'),
+        # Altas masivas: la capacidad tiene que admitir un lote de MAX_ITEMS (auctions/bulk.py)
+        'bulk_bid_user': os.getenv('THROTTLE_BULK_BID_USER', '2000/hour'),
+        'bulk_bid_ip': os.getenv('THROTTLE_BULK_BID_IP', '5000/hour'),
+        'login_ip': os.getenv('THROTTLE_LOGIN_IP', '20/min'),
+        'login_user': os.getenv('THROTTLE_LOGIN_USER', '5/min'),
+    },
     }
+THROTTLING_ENABLED = os.getenv('THROTTLING_ENABLED', 'true').lower() == 'true'
+
+# GET asíncronos de auctions/async_views.py. asgi.py lo activa; con WSGI se usan las vistas síncronas
+ASYNC_READ_VIEWS = os.getenv('ASYNC_READ_VIEWS', 'false').lower() == 'true'
+
+# En producción (API_PRODUCTION=true) no se sirve la API navegable: solo JSON
+API_PRODUCTION = os.getenv('API_PRODUCTION', 'false').lower() == 'true'
+if API_PRODUCTION:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = ['myFirstApiRest.fastjson.FastJSONRenderer']
 
 SPECTACULAR_SETTINGS = {
     'TITLE': 'API Auctions',
@@ -173,6 +214,43 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
     "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
+    # Comprueban la blacklist con el filtro en memoria de users/blacklist.py
+    "TOKEN_OBTAIN_SERIALIZER": "users.serializers.TokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "users.serializers.TokenRefreshSerializer",
+    }
+
+AUTH_USER_MODEL = 'users.CustomUser'
+
+# Caché (memoria local por defecto; para compartirla entre workers usar p. ej.
+# CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache y un directorio)
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'das-backend'),
     }
+}
 
-AUTH_USER_MODEL = 'users.CustomUser'
\ No newline at end of file
+# ¿Comparten la caché todos los procesos? LocMemCache es de cada proceso: con varios workers uno no ve las
+# invalidaciones de los otros, así que no se cachean respuestas (auctions/cache.py). runserver es un único
+# proceso y la usa; en un despliegue con un solo worker se activa con CACHE_SHARED=true (ver README)
+PROCESS_LOCAL_CACHES = ('django.core.cache.backends.locmem.LocMemCache', 'django.core.cache.backends.dummy.DummyCache')
+CACHE_SHARED = os.getenv('CACHE_SHARED', str(
+    CACHES['default']['BACKEND'] not in PROCESS_LOCAL_CACHES or sys.argv[1:2] == ['runserver'])).lower() == 'true'
+
+# Segundos máximos que se guarda una respuesta en la caché versionada (auctions/cache.py)
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', 300))
+# Segundos que se reutiliza el usuario de un token JWT sin leerlo de la base de datos
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv('AUTH_USER_CACHE_TIMEOUT', 60))
+
+# Cabecera Server-Timing con los tiempos de cada petición (myFirstApiRest/metrics.py)
+SERVER_TIMING_HEADER = os.getenv('SERVER_TIMING_HEADER', 'true').lower() == 'true'
+
+# Detector de consultas N+1 y lentas (myFirstApiRest/queryinspector.py). En los tests
+# las consultas repetidas lanzan una excepción (ver test_runner.py); aquí solo se registran
+QUERY_REPEAT_LIMIT = int(os.getenv('QUERY_REPEAT_LIMIT', 3))
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 200))
+QUERY_INSPECTOR_RAISE = os.getenv('QUERY_INSPECTOR_RAISE', 'false').lower() == 'true'
+TEST_RUNNER = 'myFirstApiRest.test_runner.TestRunner'
+
+# Backend de publicación/suscripción para el stream de pujas (auctions/pubsub.py)
+AUCTIONS_PUBSUB_BACKEND = os.getenv('AUCTIONS_PUBSUB_BACKEND', 'auctions.pubsub.InMemoryBroker')
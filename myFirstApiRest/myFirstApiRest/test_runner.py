@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """
+    En los tests una consulta repetida (posible N+1) hace fallar la petición, y
+    la caché local se trata como compartida: los tests corren en un solo proceso.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        settings.QUERY_INSPECTOR_RAISE = True
+        settings.CACHE_SHARED = True
@@ -0,0 +1,143 @@
+"""
+Límites de peticiones con cubo de fichas (token bucket).
+
+Cada clave (usuario, IP, subasta o nombre de usuario del login) tiene un cubo
+de ``N`` fichas que se rellena a ``N / periodo`` fichas por segundo, con la
+tasa en el formato de DRF (``'30/min'``) en
+``REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']``. Así se admite una ráfaga de
+``N`` peticiones y después un ritmo sostenido, en lugar de la ventana deslizante
+de ``SimpleRateThrottle``, que guarda en la caché la lista de marcas de tiempo
+de cada clave.
+
+Una petición puede gastar de varios cubos a la vez (una puja: el del usuario,
+el de la IP y el de la subasta). Se evalúan juntos y solo se gastan fichas si
+hay suficientes en todos: una petición rechazada por un cubo no vacía los
+demás, y un usuario que insiste no deja sin fichas la subasta a los otros
+pujadores.
+
+Las altas masivas de pujas gastan una ficha por elemento de sus propios cubos
+por usuario y por IP (``bulk_bid_user``, ``bulk_bid_ip``), con capacidad para
+un lote de ``MAX_ITEMS`` (auctions/bulk.py): con los de las pujas sueltas un
+lote más grande que el cubo no se admitiría nunca. En el cubo de cada subasta
+gastan como mucho su capacidad: un lote grande lo vacía, pero no se rechaza
+para siempre.
+
+El estado es una tupla ``(fichas, instante)`` en la caché de Django: con un
+backend compartido (Redis, Memcached) todos los workers ven los mismos cubos.
+Evaluarlo cuesta un ``get_many`` y un ``set`` por cubo. La lectura y la
+escritura no son atómicas, así que con peticiones simultáneas sobre la misma
+clave se puede admitir alguna de más, nunca rechazar de menos.
+
+La IP es la de ``REMOTE_ADDR``, o la de ``X-Forwarded-For`` añadida por el
+último de los ``NUM_PROXIES`` proxies (ver settings); con ``NUM_PROXIES = 0`` la
+cabecera que manda el cliente no cuenta, y no se puede cambiar de cubo
+falseándola.
+
+Al rechazar, DRF responde ``429`` con ``Retry-After`` a partir de ``wait()``;
+sin ``Retry-After`` si la petición pide más fichas de las que caben en el cubo
+(nunca se admitiría). Con ``THROTTLING_ENABLED = False`` no se limita nada (lo
+usa ``bench_endpoints``).
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+DURATIONS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """``'30/min'`` -> ``(capacidad, fichas por segundo)``."""
+    count, period = rate.split('/')
+    count = int(count)
+    return count, count / DURATIONS[period[0]]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    # Métodos a los que se aplica (None: todos)
+    methods = None
+
+    def get_buckets(self, request, view):
+        """``(scope, clave, fichas)`` de cada cubo que gasta la petición; con clave ``None`` no se limita."""
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        if not settings.THROTTLING_ENABLED or (self.methods and request.method not in self.methods):
+            return True
+        buckets = {f'throttle:{scope}:{ident}': (scope, cost)
+                   for scope, ident, cost in self.get_buckets(request, view) if ident is not None}
+        if not buckets:
+            return True
+        now = time.time()
+        states = cache.get_many(buckets)
+        updates = {}
+        self._wait = 0
+        for key, (scope, cost) in buckets.items():
+            capacity, refill = parse_rate(api_settings.DEFAULT_THROTTLE_RATES[scope])
+            tokens, updated = states.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill)
+            if cost > capacity:
+                self._wait = None
+                return False
+            if tokens < cost:
+                self._wait = max(self._wait, (cost - tokens) / refill)
+            # Pasado ese tiempo el cubo estaría lleno, que es lo mismo que no tener clave
+            updates[key] = ((tokens - cost, now), int(capacity / refill) + 1)
+        if self._wait:
+            return False
+        for key, (state, timeout) in updates.items():
+            cache.set(key, state, timeout)
+        return True
+
+    def wait(self):
+        return self._wait
+
+
+class BidThrottle(TokenBucketThrottle):
+    """Pujas: cubos por usuario, por IP y por subasta."""
+    methods = ('POST',)
+
+    def get_buckets(self, request, view):
+        user = request.user.pk if request.user.is_authenticated else None
+        return [
+            ('bid_user', user, 1),
+            ('bid_ip', self.get_ident(request), 1),
+            ('bid_auction', view.kwargs.get('auction_id'), 1),
+        ]
+
+
+class BulkBidThrottle(TokenBucketThrottle):
+    """Altas masivas de pujas: cubos propios por usuario y por IP y el de cada subasta, una ficha por elemento."""
+    methods = ('POST',)
+
+    def get_buckets(self, request, view):
+        items = request.data if isinstance(request.data, list) else [request.data]
+        auctions = {}
+        for item in items:
+            try:
+                auction = int(item['auction'])
+            except (KeyError, TypeError, ValueError):
+                # No es una puja válida y no llega a ninguna subasta
+                continue
+            auctions[auction] = auctions.get(auction, 0) + 1
+        user = request.user.pk if request.user.is_authenticated else None
+        auction_capacity = parse_rate(api_settings.DEFAULT_THROTTLE_RATES['bid_auction'])[0]
+        return [
+            ('bulk_bid_user', user, len(items)),
+            ('bulk_bid_ip', self.get_ident(request), len(items)),
+            *(('bid_auction', auction, min(count, auction_capacity)) for auction, count in auctions.items()),
+        ]
+
+
+class LoginThrottle(TokenBucketThrottle):
+    """Intentos de login por IP y contra una misma cuenta, vengan de la IP que vengan."""
+    methods = ('POST',)
+
+    def get_buckets(self, request, view):
+        username = request.data.get('username') if hasattr(request.data, 'get') else None
+        # Hash: el nombre puede tener caracteres no válidos en claves de Memcached
+        account = hashlib.sha1(str(username).lower().encode()).hexdigest() if username else None
+        return [('login_ip', self.get_ident(request), 1), ('login_user', account, 1)]
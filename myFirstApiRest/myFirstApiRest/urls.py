@@ -17,16 +17,19 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import include, path
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
-from rest_framework_simplejwt.views import (TokenObtainPairView, TokenRefreshView)
+from rest_framework_simplejwt.views import TokenRefreshView
+from users.views import LoginView
 from django.http import JsonResponse
+from .views import MetricsView
 
 def index(request):
     return JsonResponse({"mensaje": "Bienvenido a la API de subastas"})
 urlpatterns = [
     path("api/auctions/", include("auctions.urls")),
     path("api/users/", include("users.urls")),
-    path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('api/token/', LoginView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('api/metrics', MetricsView.as_view(), name='metrics'),
     path("admin/", admin.site.urls),
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
     path('api/schema/swagger-ui/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
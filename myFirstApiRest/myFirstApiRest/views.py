@@ -0,0 +1,13 @@
+from django.http import HttpResponse
+from rest_framework.permissions import IsAdminUser
+from rest_framework.views import APIView
+
+from .metrics import registry
+
+
+class MetricsView(APIView):
+    """Métricas de este proceso en formato de Prometheus (solo administradores)."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return HttpResponse(registry.exposition(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,65 @@
+"""
+Autenticación JWT con el usuario cacheado.
+
+``JWTAuthentication`` lee el ``CustomUser`` de la base de datos en cada
+petición autenticada. Aquí la fila se guarda en la caché unos segundos
+(``AUTH_USER_CACHE_TIMEOUT``) con una clave que incluye el id del usuario y su
+versión. Cualquier escritura o borrado del usuario incrementa la versión
+(``signals.py``), así que tras editar el perfil, cambiar la contraseña,
+desactivarlo o borrarlo la entrada vieja deja de usarse en todos los procesos.
+Eso solo es cierto con una caché compartida: con la local de cada proceso
+(``CACHE_SHARED = False``) el usuario se lee siempre de la base de datos.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from auctions.cache import bump_version, get_versions
+
+USER_KEY = 'auth:user:{}:{}'
+
+
+def user_version_label(user_id):
+    return f'auth.user.{user_id}'
+
+
+def invalidate_cached_user(user_id):
+    bump_version(user_version_label(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        if not settings.CACHE_SHARED:
+            return super().get_user(validated_token)
+        version, = get_versions([user_version_label(user_id)])
+        key = USER_KEY.format(user_id, version)
+        user = cache.get(key)
+        if user is None:
+            # Comprueba que existe, que está activo y la revocación por contraseña
+            user = super().get_user(validated_token)
+            cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+            return user
+
+        # Las mismas comprobaciones que JWTAuthentication sobre la copia cacheada
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return user
+
+
+class CachedJWTScheme(SimpleJWTScheme):
+    # Mismo esquema (Bearer JWT) en el OpenAPI que JWTAuthentication
+    target_class = CachedJWTAuthentication
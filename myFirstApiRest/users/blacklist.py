@@ -0,0 +1,149 @@
+"""
+Filtro en memoria de la blacklist de refresh tokens.
+
+Con ``ROTATE_REFRESH_TOKENS`` y ``BLACKLIST_AFTER_ROTATION`` cada refresco
+añade una fila a ``BlacklistedToken`` y comprueba el token con un
+``EXISTS`` sobre esa tabla. Casi ningún token que llega está en la blacklist, así
+que cada proceso mantiene:
+
+- un filtro de Bloom con los JTI de la blacklist: si el JTI no está, el token
+  seguro que no está en la blacklist y no se consulta la base de datos;
+- un conjunto exacto y acotado con los JTI recientes (los que este proceso ha
+  puesto en la blacklist o ha confirmado en la base de datos), que responde
+  "sí" sin consultar nada a los reintentos de tokens ya usados.
+
+Solo los positivos del filtro de Bloom que no están en el conjunto reciente
+(falsos positivos, alrededor del 1 %) se confirman en la base de datos.
+
+Cada alta en la blacklist incrementa una versión en la caché de Django tras el
+commit (``signals.py``). Los procesos que ven una versión nueva, o cuyo filtro
+tiene más de ``SYNC_INTERVAL`` segundos, leen las filas nuevas por rango de
+clave primaria, releyendo las ``SYNC_OVERLAP`` últimas por si alguna
+transacción confirmó tarde un id menor. La propagación es inmediata porque la
+caché es compartida entre workers. Con la caché local de cada proceso
+(``CACHE_SHARED = False``) un worker no vería la versión nueva de los demás y
+aceptaría unos segundos un token ya revocado, así que entonces no se usa el
+filtro y cada comprobación es el ``EXISTS`` exacto (ver ``tokens.py``).
+"""
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from auctions.cache import bump_version, get_versions
+
+VERSION_LABEL = 'auth.token-blacklist'
+# JTI esperados en el filtro antes de reconstruirlo más grande, y tasa de falsos positivos
+CAPACITY = 100_000
+ERROR_RATE = 0.01
+RECENT_SIZE = 10_000
+SYNC_INTERVAL = 5
+SYNC_OVERLAP = 1000
+CHUNK_SIZE = 5000
+
+
+class BloomFilter:
+
+    def __init__(self, capacity, error_rate=ERROR_RATE):
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        # Doble hashing: h1 + i * h2 a partir de un único blake2b
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item):
+        if item in self:
+            return
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class BlacklistFilter:
+
+    def __init__(self, capacity=CAPACITY, recent_size=RECENT_SIZE):
+        self.capacity = capacity
+        self.recent_size = recent_size
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.bloom = None
+            self.recent = OrderedDict()
+            self.last_id = 0
+            self.version = None
+            self.synced_at = 0.0
+
+    def lookup(self, jti):
+        """``True`` si está en la blacklist, ``False`` si seguro que no, ``None`` si hay que consultarlo."""
+        self.sync()
+        with self._lock:
+            if jti in self.recent:
+                self.recent.move_to_end(jti)
+                return True
+            if jti not in self.bloom:
+                return False
+        return None
+
+    def remember(self, jti):
+        """Añade un JTI confirmado en la blacklist (por este proceso o por la base de datos)."""
+        with self._lock:
+            if self.bloom is not None:
+                self.bloom.add(jti)
+            self.recent[jti] = True
+            self.recent.move_to_end(jti)
+            while len(self.recent) > self.recent_size:
+                self.recent.popitem(last=False)
+
+    def sync(self, force=False):
+        version, = get_versions([VERSION_LABEL])
+        if (not force and self.bloom is not None and version == self.version
+                and time.monotonic() - self.synced_at < SYNC_INTERVAL):
+            return
+        with self._lock:
+            if self.bloom is None or self.bloom.count > self.bloom.capacity:
+                self._rebuild()
+            else:
+                self._load(BlacklistedToken.objects.filter(id__gt=max(self.last_id - SYNC_OVERLAP, 0)))
+            self.version = version
+            self.synced_at = time.monotonic()
+
+    def _rebuild(self):
+        # Solo los tokens sin caducar: los caducados ya no pasan la verificación
+        live = BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now())
+        self.bloom = BloomFilter(max(self.capacity, 2 * live.count()))
+        self._load(live)
+
+    def _load(self, queryset):
+        rows = queryset.order_by('id').values_list('id', 'token__jti')
+        last_id = 0
+        while True:
+            chunk = list(rows.filter(id__gt=last_id)[:CHUNK_SIZE])
+            for last_id, jti in chunk:
+                self.bloom.add(jti)
+            if len(chunk) < CHUNK_SIZE:
+                break
+        self.last_id = max(self.last_id, last_id)
+
+
+def notify_blacklisted():
+    """Avisa al resto de procesos de que hay filas nuevas en la blacklist."""
+    bump_version(VERSION_LABEL)
+
+
+blacklist_filter = BlacklistFilter()
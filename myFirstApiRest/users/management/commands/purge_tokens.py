@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+
+class Command(BaseCommand):
+    help = ('Borra por lotes los refresh tokens caducados (OutstandingToken y BlacklistedToken). '
+            'Cada lote es una transacción corta, así que no bloquea las tablas mientras dura.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--sleep', type=float, default=0.0, help='Pausa en segundos entre lotes.')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        chunk_size = options['chunk_size']
+        expired = OutstandingToken.objects.filter(expires_at__lte=now).order_by('id')
+        outstanding = blacklisted = 0
+        last_id = 0
+        while True:
+            # Recorrido por clave primaria: los tokens caducan más o menos en orden de creación
+            ids = list(expired.filter(id__gt=last_id).values_list('id', flat=True)[:chunk_size])
+            if not ids:
+                break
+            with transaction.atomic():
+                blacklisted += BlacklistedToken.objects.filter(token_id__in=ids).delete()[0]
+                outstanding += OutstandingToken.objects.filter(id__in=ids).delete()[0]
+            last_id = ids[-1]
+            if options['sleep']:
+                time.sleep(options['sleep'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {outstanding} expired outstanding tokens and {blacklisted} blacklisted tokens.'))
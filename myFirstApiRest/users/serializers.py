@@ -1,7 +1,10 @@
 from rest_framework import serializers
+from rest_framework_simplejwt import serializers as jwt_serializers
+from myFirstApiRest.metrics import TimedSerializerMixin
 from .models import CustomUser
+from .tokens import RefreshToken
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = CustomUser
         fields = ('id', 'first_name','last_name','username', 'email', 'birth_date', 'municipality',
@@ -19,4 +22,12 @@ class UserSerializer(serializers.ModelSerializer):
     
 class ChangePasswordSerializer(serializers.Serializer):
     old_password = serializers.CharField(required=True)
-    new_password = serializers.CharField(required=True)
\ No newline at end of file
+    new_password = serializers.CharField(required=True)
+
+
+# Login y refresco con el RefreshToken que consulta la blacklist en memoria (ver blacklist.py)
+class TokenObtainPairSerializer(jwt_serializers.TokenObtainPairSerializer):
+    token_class = RefreshToken
+
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    token_class = RefreshToken
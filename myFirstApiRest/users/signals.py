@@ -0,0 +1,36 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from .authentication import invalidate_cached_user
+from .blacklist import notify_blacklisted
+from .models import CustomUser
+
+
+def invalidate_user(sender, instance, **kwargs):
+    invalidate_cached_user(instance.pk)
+
+
+def invalidate_user_permissions(sender, instance, pk_set, model, **kwargs):
+    # Los cambios de grupos/permisos llegan desde el usuario o desde el grupo
+    if isinstance(instance, CustomUser):
+        invalidate_cached_user(instance.pk)
+    elif model is CustomUser:
+        for user_id in pk_set or ():
+            invalidate_cached_user(user_id)
+
+
+def token_blacklisted(sender, created, **kwargs):
+    # Tras el commit, para que los demás procesos ya encuentren la fila al sincronizar
+    if created:
+        transaction.on_commit(notify_blacklisted)
+
+
+def connect_signals():
+    # Perfil, cambio de contraseña, edición desde el admin o borrado
+    post_save.connect(invalidate_user, sender=CustomUser, dispatch_uid='auth-user-save')
+    post_delete.connect(invalidate_user, sender=CustomUser, dispatch_uid='auth-user-delete')
+    for through in (CustomUser.groups.through, CustomUser.user_permissions.through):
+        m2m_changed.connect(invalidate_user_permissions, sender=through, dispatch_uid=f'auth-user-m2m-{through.__name__}')
+    # Logout, rotación de refresh tokens o la acción del admin de simplejwt
+    post_save.connect(token_blacklisted, sender=BlacklistedToken, dispatch_uid='auth-token-blacklisted')
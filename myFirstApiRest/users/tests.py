@@ -1,3 +1,236 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from .blacklist import BlacklistFilter, BloomFilter, blacklist_filter
+from .tokens import RefreshToken
+
+from auctions.tests import AuctionDataMixin, create_user, throttle_rates
+
+
+class UserQueryCountTests(AuctionDataMixin, APITestCase):
+    """Los listados de usuario no deben lanzar una consulta por fila."""
+
+    def test_user_bids(self):
+        self.client.force_authenticate(self.owner)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('users:user-bids'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 5)
+
+    def test_user_bids_cursor(self):
+        self.client.force_authenticate(self.owner)
+        first = self.client.get(reverse('users:user-bids'))
+        second = self.client.get(first.data['next'])
+        ids = [row['id'] for row in first.data['results'] + second.data['results']]
+        self.assertEqual(len(ids), self.rows)
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        self.assertIsNone(second.data['next'])
+
+    def test_user_list(self):
+        self.owner.is_staff = True
+        self.client.force_authenticate(self.owner)
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('users:user-list'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_profile(self):
+        self.client.force_authenticate(self.owner)
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('users:user-profile'))
+        self.assertEqual(response.status_code, 200)
+
+
+class LoginThrottleTests(APITestCase):
+    """Los intentos de login se limitan por IP y por cuenta en las dos URLs."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user('cliente')
+
+    def login(self, username, password='Secreta.123', url=None, ip='10.0.0.1'):
+        return self.client.post(url or reverse('users:user-login'), {'username': username, 'password': password},
+                                REMOTE_ADDR=ip)
+
+    def test_per_account(self):
+        with self.settings(REST_FRAMEWORK=throttle_rates(login_user='2/min')):
+            self.assertEqual(self.login('cliente', 'mala', ip='10.0.0.1').status_code, 401)
+            self.assertEqual(self.login('Cliente', 'mala', ip='10.0.0.2').status_code, 401)
+            # El cubo de la cuenta es compartido entre IPs y con /api/token/
+            response = self.login('cliente', url=reverse('token_obtain_pair'), ip='10.0.0.3')
+            self.assertEqual(response.status_code, 429)
+            self.assertIn(int(response['Retry-After']), range(25, 31))
+            self.assertEqual(self.login('otro', 'mala', ip='10.0.0.3').status_code, 401)
+
+    def test_per_ip(self):
+        with self.settings(REST_FRAMEWORK=throttle_rates(login_ip='3/min')):
+            for username in ('a', 'b', 'c'):
+                self.assertEqual(self.login(username).status_code, 401)
+            self.assertEqual(self.login('cliente').status_code, 429)
+            self.assertEqual(self.login('cliente', ip='10.0.0.9').status_code, 200)
+
+    def test_rejected_attempts_do_not_drain_ip(self):
+        with self.settings(REST_FRAMEWORK=throttle_rates(login_user='1/min', login_ip='3/min')):
+            self.login('cliente', 'mala')
+            self.assertEqual(self.login('cliente', 'mala').status_code, 429)
+            self.assertEqual(self.login('cliente', 'mala').status_code, 429)
+            # Los intentos rechazados por el cubo de la cuenta no gastan el de la IP
+            self.assertEqual(self.login('otro', 'mala').status_code, 401)
+
+    def test_forwarded_for_is_ignored(self):
+        with self.settings(REST_FRAMEWORK=throttle_rates(login_ip='2/min')):
+            codes = [self.client.post(reverse('users:user-login'), {'username': f'u{i}', 'password': 'mala'},
+                                      REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR=f'203.0.113.{i}').status_code
+                     for i in range(3)]
+            self.assertEqual(codes, [401, 401, 429])
+
+
+class CachedJWTAuthenticationTests(APITestCase):
+    """El usuario del token se cachea y se invalida en cuanto cambia o se borra."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user('cliente')
+        self.admin = create_user('admin', is_staff=True)
+        self.login(self.user)
+
+    def login(self, user):
+        token = RefreshToken.for_user(user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def profile(self, queries=None):
+        if queries is None:
+            return self.client.get(reverse('users:user-profile'))
+        with self.assertNumQueries(queries):
+            return self.client.get(reverse('users:user-profile'))
+
+    def test_user_is_cached(self):
+        self.assertEqual(self.profile(queries=1).status_code, 200)
+        self.assertEqual(self.profile(queries=0).data['username'], 'cliente')
+
+    def test_process_local_cache_is_not_used(self):
+        # Los demás workers no verían la versión nueva tras desactivarlo o cambiar la contraseña
+        with self.settings(CACHE_SHARED=False):
+            self.profile()
+            self.assertEqual(self.profile(queries=1).status_code, 200)
+
+    def test_profile_patch(self):
+        self.profile()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(reverse('users:user-profile'), {'locality': 'Madrid'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.profile(queries=1).data['locality'], 'Madrid')
+
+    def test_profile_delete(self):
+        self.profile()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.delete(reverse('users:user-profile')).status_code, 204)
+        self.assertEqual(self.profile().status_code, 401)
+
+    def test_change_password(self):
+        self.profile()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('users:change-password'), {'old_password': 'Secreta.123', 'new_password': 'Otra.Clave.456'})
+        self.assertEqual(response.status_code, 200)
+        self.profile(queries=1)
+
+    def test_admin_edit(self):
+        self.profile()
+        self.login(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(reverse('users:user-detail', args=[self.user.id]), {'first_name': 'Editado'})
+        self.assertEqual(response.status_code, 200)
+        self.login(self.user)
+        self.assertEqual(self.profile(queries=1).data['first_name'], 'Editado')
+
+    def test_deactivated_user(self):
+        self.profile()
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertEqual(self.profile().status_code, 401)
+
+
+class TokenBlacklistTests(APITestCase):
+    """Blacklist de refresh tokens con el filtro en memoria y la purga por lotes."""
+
+    def setUp(self):
+        cache.clear()
+        blacklist_filter.reset()
+        self.user = create_user('cliente')
+
+    def refresh(self, token):
+        return self.client.post(reverse('token_refresh'), {'refresh': str(token)})
+
+    def test_bloom_filter(self):
+        bloom = BloomFilter(1000)
+        jtis = [f'jti-{i}' for i in range(1000)]
+        for jti in jtis:
+            bloom.add(jti)
+        self.assertTrue(all(jti in bloom for jti in jtis))
+        false_positives = sum(f'otro-{i}' in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+    def test_rotation_blacklists_old_token(self):
+        token = RefreshToken.for_user(self.user)
+        response = self.refresh(token)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.refresh(token).status_code, 401)
+        self.assertEqual(self.refresh(response.data['refresh']).status_code, 200)
+
+    def test_logout(self):
+        token = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token.access_token}')
+        self.assertEqual(self.client.post(reverse('users:log-out'), {'refresh': str(token)}).status_code, 205)
+        self.assertEqual(self.refresh(token).status_code, 401)
+
+    def test_check_without_queries(self):
+        token = RefreshToken.for_user(self.user)
+        blacklist_filter.sync(force=True)
+        with self.assertNumQueries(0):
+            token.check_blacklist()
+        token.blacklist()
+        with self.assertNumQueries(0), self.assertRaises(TokenError):
+            RefreshToken(str(token))
+
+    def test_process_local_cache_checks_database(self):
+        token = RefreshToken.for_user(self.user)
+        blacklist_filter.sync(force=True)
+        with self.settings(CACHE_SHARED=False):
+            with self.assertNumQueries(1):
+                token.check_blacklist()
+            # Blacklist hecha por otro proceso, cuyo aviso en la caché local de ese proceso no llega aquí
+            BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=token['jti']))
+            with self.assertRaises(TokenError):
+                RefreshToken(str(token))
+
+    def test_other_process_sees_blacklist(self):
+        other = BlacklistFilter()
+        token = RefreshToken.for_user(self.user)
+        self.assertFalse(other.lookup(token['jti']))
+        # Blacklist hecha por otro proceso (p. ej. la acción del admin): solo queda la fila y la versión
+        with self.captureOnCommitCallbacks(execute=True):
+            BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=token['jti']))
+        self.assertIsNot(other.lookup(token['jti']), False)
+
+    def test_purge_expired_tokens(self):
+        tokens = [RefreshToken.for_user(self.user) for _ in range(5)]
+        for token in tokens[:3]:
+            token.blacklist()
+        expired = [token['jti'] for token in tokens[1:4]]
+        OutstandingToken.objects.filter(jti__in=expired).update(expires_at=timezone.now() - timedelta(days=1))
+
+        out = StringIO()
+        call_command('purge_tokens', chunk_size=2, stdout=out)
+        self.assertIn('Deleted 3 expired outstanding tokens and 2 blacklisted tokens', out.getvalue())
+        self.assertEqual(set(OutstandingToken.objects.values_list('jti', flat=True)),
+                         {tokens[0]['jti'], tokens[4]['jti']})
+        self.assertEqual(BlacklistedToken.objects.get().token.jti, tokens[0]['jti'])
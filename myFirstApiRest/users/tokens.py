@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken as BaseRefreshToken
+
+from .blacklist import blacklist_filter
+
+
+class RefreshToken(BaseRefreshToken):
+    """
+    Refresh token que consulta la blacklist a través de ``blacklist_filter``, o
+    directamente en la base de datos si la caché no es compartida.
+    """
+
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        # Sin caché compartida no llegarían los avisos de los demás procesos: la revocación tiene que ser inmediata
+        blacklisted = blacklist_filter.lookup(jti) if settings.CACHE_SHARED else None
+        if blacklisted is None:
+            # Positivo del filtro de Bloom, o sin filtro: se confirma en la base de datos
+            blacklisted = BlacklistedToken.objects.filter(token__jti=jti).exists()
+            if blacklisted:
+                blacklist_filter.remember(jti)
+        if blacklisted:
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        # El token casi siempre está ya en OutstandingToken: no hace falta cargar el usuario
+        token_id = OutstandingToken.objects.filter(jti=jti).values_list('id', flat=True).first()
+        if token_id is None:
+            result = super().blacklist()
+        else:
+            result = BlacklistedToken.objects.get_or_create(token_id=token_id)
+        blacklist_filter.remember(jti)
+        return result
@@ -1,12 +1,11 @@
 from django.urls import path
-from .views import UserRegisterView, UserListView, UserRetrieveUpdateDestroyView, LogoutView, UserProfileView, ChangePasswordView, UserBidListView
-from rest_framework_simplejwt.views import TokenObtainPairView
+from .views import UserRegisterView, UserListView, UserRetrieveUpdateDestroyView, LogoutView, UserProfileView, ChangePasswordView, UserBidListView, LoginView
 
 
 app_name="users"
 urlpatterns = [
     path('register/', UserRegisterView.as_view(), name='user-register'),
-    path("login/", TokenObtainPairView.as_view(), name="user-login"),
+    path("login/", LoginView.as_view(), name="user-login"),
     path('', UserListView.as_view(), name='user-list'),
     path('<int:pk>/', UserRetrieveUpdateDestroyView.as_view(), name='user-detail'),
     path('profile/', UserProfileView.as_view(), name='user-profile'),
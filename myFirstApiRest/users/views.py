@@ -1,6 +1,6 @@
 from rest_framework import status, generics
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
+from .tokens import RefreshToken
 from rest_framework.views import APIView
 from .models import CustomUser
 from .serializers import UserSerializer, ChangePasswordSerializer
@@ -8,7 +8,13 @@ from rest_framework.exceptions import ValidationError
 from django.contrib.auth.password_validation import validate_password
 from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
 from auctions.models import Bid
+from django.utils import timezone
+from auctions.fast_serializers import BidDetailFastSerializer, FastListMixin
+from auctions.pagination import UserBidPagination
 from auctions.serializers import BidDetailSerializer
+from auctions.views import filter_date_range, filter_open
+from myFirstApiRest.throttling import LoginThrottle
+from rest_framework_simplejwt.views import TokenObtainPairView
 
 
 class UserRegisterView(generics.CreateAPIView):
@@ -28,10 +34,14 @@ class UserRegisterView(generics.CreateAPIView):
             }, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class LoginView(TokenObtainPairView):
+    # Cada intento calcula el hash de la contraseña: se limita por IP y por cuenta
+    throttle_classes = [LoginThrottle]
+
 class UserListView(generics.ListAPIView):
     permission_classes = [IsAdminUser]
     serializer_class = UserSerializer
-    queryset = CustomUser.objects.all()
+    queryset = CustomUser.objects.order_by('id')
 
 class UserRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAdminUser]
@@ -95,9 +105,16 @@ class ChangePasswordView(APIView):
             return Response({"detail": "Password updated successfully."})
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class UserBidListView(APIView):
+class UserBidListView(FastListMixin, generics.ListAPIView):
+    """Pujas del usuario, de la última a la primera, paginadas por cursor."""
     permission_classes = [IsAuthenticated]
-    def get(self, request):
-        user_bids = Bid.objects.filter(bidder=request.user).order_by("-price")
-        serializer = BidDetailSerializer(user_bids, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+    serializer_class = BidDetailSerializer
+    fast_serializer_class = BidDetailFastSerializer
+    pagination_class = UserBidPagination
+    ndjson_output = True
+
+    def get_queryset(self):
+        params = self.request.query_params
+        queryset = Bid.objects.filter(bidder=self.request.user).order_by('-id')
+        queryset = filter_open(queryset, params, timezone.now(), 'auction__closing_date')
+        return filter_date_range(queryset, params, 'creation_date')
\ No newline at end of file